@@ -0,0 +1,388 @@
+"""
+Ce script mesure les performances des fonctions de prétraitement et de visualisation de `src`,
+sur des données synthétiques de 1, 10 et 100 fois la taille de l'enquête.
+
+Pour chaque fonction et chaque taille, on mesure le temps d'exécution (minimum et médiane sur
+plusieurs répétitions), le débit en lignes par seconde et le pic de mémoire allouée pendant
+l'appel (tracemalloc, lors d'une exécution séparée pour ne pas fausser les temps). Les
+résultats sont écrits dans un fichier JSON, qui peut servir de référence : avec
+`--baseline`, les résultats sont comparés à une référence précédente et les régressions sont
+signalées (code de sortie 1).
+
+Le script fonctionne hors ligne : la table des codes ISO et le fichier Excel des continents sont
+générés à partir des pays des données synthétiques.
+
+Utilisation :
+    python -m benchmarks.helpers --scales 1 10 --output benchmarks/results/helpers.json
+    python -m benchmarks.helpers --baseline benchmarks/results/helpers.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from src.data_preprocessing import (
+    LABELS_TRANSLATIONS,
+    add_continent_info,
+    add_iso_codes,
+    categorize_employment_status,
+    compute_top_languages_count,
+    group_percentage_by,
+    labels_translation,
+)
+from src.plot_utils import (
+    histogram_counts,
+    make_wordcloud,
+    plot_bar,
+    plot_bar_orders,
+    plot_box,
+    plot_choropleth_map,
+    plot_hist,
+    plot_hist_from_counts,
+    plot_hist_orders,
+)
+
+# Nombre de répondants de l'enquête 2022
+SURVEY_ROWS = 73_462
+DEFAULT_OUTPUT = "benchmarks/results/helpers.json"
+
+LANGUAGES = [
+    "JavaScript", "HTML/CSS", "SQL", "Python", "TypeScript", "Java", "Bash/Shell", "C#", "C++",
+    "PHP", "C", "PowerShell", "Go", "Rust", "Kotlin", "Dart", "Ruby", "Assembly", "Swift", "R",
+    "VBA", "MATLAB", "Lua", "Groovy", "Delphi", "Scala", "Perl", "Haskell", "Elixir", "Julia",
+]
+COUNTRIES = {
+    "United States of America": ("USA", "North,Central America"),
+    "India": ("IND", "Asia (South)"),
+    "Germany": ("DEU", "Europe"),
+    "United Kingdom of Great Britain and Northern Ireland": ("GBR", "Europe"),
+    "Canada": ("CAN", "North,Central America"),
+    "France": ("FRA", "Europe"),
+    "Brazil": ("BRA", "South America"),
+    "Poland": ("POL", "Europe"),
+    "Netherlands": ("NLD", "Europe"),
+    "Spain": ("ESP", "Europe"),
+    "Italy": ("ITA", "Europe"),
+    "Australia": ("AUS", "Oceania"),
+    "Russian Federation": ("RUS", "Europe"),
+    "Sweden": ("SWE", "Europe"),
+    "Turkey": ("TUR", "Asia (West)"),
+    "Japan": ("JPN", "Asia (East)"),
+    "Nigeria": ("NGA", "Africa"),
+    "Israel": ("ISR", "Asia (West)"),
+    "Mexico": ("MEX", "North,Central America"),
+    "Nomadic": (None, None),
+}
+
+
+def synthetic_survey(n_rows, seed=0):
+    """
+    Données synthétiques ayant les colonnes et les modalités de l'enquête.
+
+    Les variables sont tirées indépendamment selon des lois proches des distributions
+    observées : seuls les volumes et les types comptent pour ces mesures.
+    """
+    rng = np.random.default_rng(seed)
+
+    def choice(values, p=None):
+        return rng.choice(np.array(values, dtype=object), n_rows, p=p)
+
+    n_languages = np.clip(rng.poisson(6, n_rows), 1, len(LANGUAGES))
+    popularity = 1 / np.arange(1, len(LANGUAGES) + 1)
+    popularity /= popularity.sum()
+    # Langages tirés par popularité décroissante, sans doublon au sein d'une ligne
+    keys = rng.random((n_rows, len(LANGUAGES))) ** (1 / popularity)
+    order = np.argsort(-keys, axis=1)
+    language_names = np.array(LANGUAGES, dtype=object)
+    have_worked_with = [
+        ";".join(language_names[order[i, : n_languages[i]]]) for i in range(n_rows)
+    ]
+
+    years_code = np.clip(rng.gamma(2.0, 6.0, n_rows).round(), 0, 50).astype(int)
+    employed = (rng.random(n_rows) < 0.2 + 0.04 * n_languages.clip(max=15)).astype(int)
+
+    return pd.DataFrame(
+        {
+            "Age": choice(["<35", ">35"], [0.65, 0.35]),
+            "Accessibility": choice(["No", "Yes"], [0.97, 0.03]),
+            "EdLevel": choice(
+                list(LABELS_TRANSLATIONS["EdLevel"]), [0.1, 0.45, 0.3, 0.05, 0.1]
+            ),
+            "Employment": rng.integers(0, 2, n_rows),
+            "Gender": choice(["Man", "Woman", "NonBinary"], [0.93, 0.05, 0.02]),
+            "MentalHealth": choice(["No", "Yes"], [0.8, 0.2]),
+            "MainBranch": choice(["Dev", "NotDev"], [0.9, 0.1]),
+            "YearsCode": years_code,
+            "YearsCodePro": np.maximum(years_code - rng.integers(0, 8, n_rows), 0),
+            "Country": choice(list(COUNTRIES)),
+            "PreviousSalary": rng.lognormal(10.8, 0.8, n_rows).round(),
+            "HaveWorkedWith": have_worked_with,
+            "ComputerSkills": n_languages,
+            "Employed": employed,
+        }
+    )
+
+
+def write_continents_excel(path):
+    """
+    Écrit un fichier Excel des continents au format de `CountryLanguageStats.xls`.
+    """
+    continents = pd.DataFrame(
+        [(country, continent) for country, (_, continent) in COUNTRIES.items() if continent],
+        columns=["Country", "Continental Region"],
+    )
+    continents.to_excel(path, index=False, startrow=1)
+
+
+def write_iso_codes_html(path):
+    """
+    Écrit une page HTML contenant la table des codes ISO des pays, au format de la page
+    d'iban.com lue par `get_iso_country_codes` (colonnes utilisées par l'application).
+    """
+    iso_codes = pd.DataFrame(
+        [(country, iso) for country, (iso, _) in COUNTRIES.items() if iso],
+        columns=["Country", "Alpha-3 code"],
+    )
+    iso_codes.to_html(path, index=False)
+
+
+def benchmark_cases(df, continents_path):
+    """
+    Fonctions mesurées : {nom: préparation}, où chaque préparation renvoie la fonction à
+    chronométrer (sans argument).
+
+    Les fonctions dont le résultat est mis en cache par DataFrame (traduction, comptages des
+    histogrammes et des box plots) reçoivent une copie superficielle du DataFrame à chaque
+    répétition : on mesure le calcul, et non la lecture du cache.
+    """
+    translated = labels_translation(df)
+    iso_df = pd.DataFrame(
+        [(country, iso) for country, (iso, _) in COUNTRIES.items() if iso],
+        columns=["Country", "Alpha-3 code"],
+    )
+    top_languages = LANGUAGES[:10]
+    with_top_count = compute_top_languages_count(translated, "HaveWorkedWith", top_languages)
+    age_df = group_percentage_by(translated, ["Age", "EmployedCat"])
+    carto_df = (
+        add_iso_codes(group_percentage_by(translated, ["Country", "EmployedCat"]), iso_df)
+        .query("EmployedCat == 'En emploi'")
+        .dropna(subset=["ISO"])
+    )
+    language_counts = (
+        df["HaveWorkedWith"]
+        .str.split(";")
+        .explode()
+        .value_counts()
+        .head(20)
+        .rename_axis("Langage")
+        .reset_index(name="Count")
+    )
+    status_counts = histogram_counts(translated, "EmployedCat")
+
+    def fresh(frame):
+        return frame.copy(deep=False)
+
+    return {
+        "labels_translation": lambda: lambda d=fresh(df): labels_translation(d),
+        "categorize_employment_status": lambda: lambda: categorize_employment_status(df),
+        "add_iso_codes": lambda: lambda: add_iso_codes(df, iso_df),
+        "add_continent_info": lambda: lambda: add_continent_info(df, continents_path),
+        "compute_top_languages_count": lambda: lambda: compute_top_languages_count(
+            df, "HaveWorkedWith", top_languages
+        ),
+        "group_percentage_by": lambda: lambda: group_percentage_by(
+            translated, ["EdLevel", "EmployedCat"]
+        ),
+        "make_wordcloud": lambda: lambda: make_wordcloud(df, "HaveWorkedWith"),
+        "plot_hist": lambda: lambda d=fresh(translated): plot_hist(d, "YearsCode", "Années"),
+        "plot_hist_orders": lambda: lambda d=fresh(translated): plot_hist_orders(
+            d, "EdLevel", "Éducation", {"EdLevel": list(LABELS_TRANSLATIONS["EdLevel"].values())}
+        ),
+        "plot_hist_from_counts": lambda: lambda: plot_hist_from_counts(
+            status_counts, "EmployedCat", "Statut d'emploi"
+        ),
+        "plot_bar": lambda: lambda: plot_bar(language_counts, "Langage", "Langages"),
+        "plot_bar_orders": lambda: lambda: plot_bar_orders(
+            age_df, "Age", "EmployedCat", "Âge", {"Age": ["Moins de 35 ans", "Plus de 35 ans"]}
+        ),
+        "plot_box": lambda: lambda d=fresh(with_top_count): plot_box(
+            d, "EmployedCat", "TopLanguagesCount", "EmployedCat", "Compétences"
+        ),
+        "plot_choropleth_map": lambda: lambda: plot_choropleth_map(
+            carto_df, "ISO", "percentage", "Country", filter_col="count", min_value=100
+        ),
+    }
+
+
+def measure(prepare, repeat):
+    """
+    Temps (en secondes) de `repeat` exécutions, puis pic de mémoire (en octets) d'une
+    exécution supplémentaire sous tracemalloc.
+    """
+    times = []
+    for _ in range(repeat):
+        func = prepare()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+        plt.close("all")
+
+    func = prepare()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        plt.close("all")
+
+    return times, peak
+
+
+def run(scales, repeat=3, seed=0, only=None):
+    """
+    Lance les mesures pour chaque taille de données.
+
+    Returns
+    -------
+    list of dict
+        Une entrée par (fonction, taille) : nombre de lignes, temps minimal et médian, débit
+        (lignes par seconde, sur le temps minimal) et pic de mémoire en Mo.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        continents_path = os.path.join(tmp_dir, "continents.xlsx")
+        write_continents_excel(continents_path)
+
+        for scale in scales:
+            n_rows = int(SURVEY_ROWS * scale)
+            df = synthetic_survey(n_rows, seed)
+            for name, prepare in benchmark_cases(df, continents_path).items():
+                if only and name not in only:
+                    continue
+                times, peak = measure(prepare, repeat)
+                results.append(
+                    {
+                        "helper": name,
+                        "scale": scale,
+                        "rows": n_rows,
+                        "min_seconds": round(min(times), 6),
+                        "median_seconds": round(statistics.median(times), 6),
+                        "rows_per_second": round(n_rows / max(min(times), 1e-9)),
+                        "peak_memory_mb": round(peak / 2**20, 3),
+                    }
+                )
+                print(f"{name:<30} x{scale:<6g} {min(times):9.4f} s {peak / 2**20:10.1f} Mo")
+            del df
+
+    return results
+
+
+def environment():
+    """Description de l'environnement de mesure, enregistrée avec les résultats."""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def compare(results, baseline, tolerance=0.2):
+    """
+    Compare les résultats à une référence.
+
+    Une régression est signalée quand le temps minimal ou le pic de mémoire dépasse celui de la
+    référence de plus de `tolerance` (en proportion).
+
+    Returns
+    -------
+    pandas.DataFrame
+        Une ligne par (fonction, taille) présente dans les deux jeux de résultats, avec les
+        rapports de temps et de mémoire et l'indicateur 'regression'.
+    """
+    current = pd.DataFrame(results).set_index(["helper", "scale"])
+    reference = pd.DataFrame(baseline["results"]).set_index(["helper", "scale"])
+    joined = current.join(reference, rsuffix="_baseline", how="inner")
+
+    comparison = pd.DataFrame(
+        {
+            "time_ratio": joined["min_seconds"] / joined["min_seconds_baseline"],
+            "memory_ratio": joined["peak_memory_mb"]
+            / joined["peak_memory_mb_baseline"].where(joined["peak_memory_mb_baseline"] > 0),
+        }
+    ).round(3)
+    comparison["regression"] = (comparison["time_ratio"] > 1 + tolerance) | (
+        comparison["memory_ratio"] > 1 + tolerance
+    )
+
+    return comparison.reset_index()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--scales",
+        type=float,
+        nargs="+",
+        default=[1, 10, 100],
+        help="Tailles des données, en multiples de la taille de l'enquête",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Nombre de répétitions")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="+", help="Fonctions à mesurer (par défaut, toutes)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Fichier JSON des résultats")
+    parser.add_argument("--baseline", help="Fichier JSON de référence à comparer")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Dégradation tolérée avant de signaler une régression (0.2 = 20%%)",
+    )
+    args = parser.parse_args()
+
+    # Référence lue avant l'écriture des résultats, qui peuvent la remplacer
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results = run(args.scales, args.repeat, args.seed, args.only)
+
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    report = {
+        "benchmark": "helpers",
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": environment(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Résultats écrits dans {args.output}")
+
+    if baseline is not None:
+        comparison = compare(results, baseline, args.tolerance)
+        with pd.option_context("display.width", 200, "display.max_rows", None):
+            print(comparison.to_string(index=False))
+        regressions = comparison[comparison["regression"]]
+        if not regressions.empty:
+            print(f"{len(regressions)} régression(s) par rapport à {args.baseline}")
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
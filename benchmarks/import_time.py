@@ -0,0 +1,187 @@
+"""
+Ce script mesure le temps d'import des modules `src` utilisés par chaque page de
+l'application, avec `python -X importtime`, et vérifie qu'il reste sous un budget.
+
+Pour chaque page, les instructions `import` du script sont exécutées dans un nouvel
+interpréteur : d'abord les bibliothèques communes à toutes les pages (Streamlit, pandas,
+Plotly...), déjà chargées dans un serveur en fonctionnement, puis les imports de `src`, seuls
+mesurés. Le temps retenu est la médiane sur plusieurs répétitions. Les dépendances les plus
+lourdes importées par `src` sont listées, pour repérer un import qui devrait être différé
+jusqu'à son utilisation (matplotlib, dalex, scikit-learn...).
+
+Le code de sortie est 1 si une page dépasse son budget.
+
+Utilisation :
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --budget 100 --output benchmarks/results/import_time.json
+"""
+
+import argparse
+import ast
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+DEFAULT_OUTPUT = "benchmarks/results/import_time.json"
+DEFAULT_BUDGET_MS = 150
+# Bibliothèques chargées avant la mesure : elles sont importées par toutes les pages
+SHARED_IMPORTS = [
+    "import numpy",
+    "import pandas",
+    "import plotly.express",
+    "import plotly.graph_objects",
+    "import streamlit",
+    "import dotenv",
+]
+# Dépendances directes de `src` affichées si leur import dépasse ce seuil
+HEAVY_IMPORT_MS = 20
+
+
+def page_imports(path):
+    """
+    Instructions d'import de premier niveau d'un script, séparées entre les imports de `src`
+    et les autres.
+
+    Returns
+    -------
+    tuple of list of str
+        Les imports de `src` et les autres, sous forme de code source.
+    """
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    src_imports, other_imports = [], []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            names = [node.module or ""]
+        else:
+            continue
+        target = src_imports if any(n.split(".")[0] == "src" for n in names) else other_imports
+        target.append(ast.unparse(node))
+
+    return src_imports, other_imports
+
+
+def parse_importtime(stderr):
+    """
+    Lit la sortie de `-X importtime` et attribue le temps des imports de premier niveau aux
+    modules `src`.
+
+    Returns
+    -------
+    tuple
+        Temps cumulé des modules `src` importés au premier niveau (ms) et temps cumulé de leurs
+        dépendances directes hors `src` ({module: ms}).
+    """
+    src_ms = 0.0
+    dependencies = {}
+    children = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        name, cumulative_ms = name.strip(), int(cumulative) / 1000
+
+        # La sortie est écrite à la fin de chaque import : les dépendances directes d'un
+        # module de premier niveau précèdent sa propre ligne
+        if depth == 1:
+            children.append((name, cumulative_ms))
+        elif depth == 0:
+            if name.split(".")[0] == "src":
+                src_ms += cumulative_ms
+                for child, child_ms in children:
+                    if child.split(".")[0] != "src":
+                        dependencies[child] = dependencies.get(child, 0.0) + child_ms
+            children = []
+
+    return src_ms, dependencies
+
+
+def measure_page(path, repeat=5):
+    """
+    Mesure le temps d'import des modules `src` d'une page, dans un nouvel interpréteur.
+
+    Returns
+    -------
+    dict
+        'src_ms' (médiane), 'runs_ms' (toutes les mesures) et 'heavy' (dépendances lourdes de
+        la dernière mesure, en ms).
+    """
+    src_imports, other_imports = page_imports(path)
+    code = "\n".join(SHARED_IMPORTS + other_imports + src_imports)
+
+    runs, dependencies = [], {}
+    for _ in range(repeat):
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        if process.returncode != 0:
+            raise RuntimeError(f"Échec des imports de {path} :\n{process.stderr[-2000:]}")
+        src_ms, dependencies = parse_importtime(process.stderr)
+        runs.append(src_ms)
+
+    heavy = {
+        name: round(ms, 1)
+        for name, ms in sorted(dependencies.items(), key=lambda item: -item[1])
+        if ms >= HEAVY_IMPORT_MS
+    }
+    return {"src_ms": round(statistics.median(runs), 1), "runs_ms": runs, "heavy": heavy}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pages", nargs="+", help="Pages à mesurer (par défaut, toutes)")
+    parser.add_argument("--repeat", type=int, default=5, help="Nombre de répétitions")
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=DEFAULT_BUDGET_MS,
+        help="Temps d'import maximal des modules src d'une page (ms)",
+    )
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Fichier JSON des résultats")
+    args = parser.parse_args()
+
+    pages = args.pages or ["Accueil.py"] + sorted(glob.glob("pages/*.py"))
+    results = {}
+    for path in pages:
+        result = measure_page(path, args.repeat)
+        result["over_budget"] = result["src_ms"] > args.budget
+        results[path] = result
+
+        heavy = ", ".join(f"{name} {ms:.0f} ms" for name, ms in result["heavy"].items())
+        status = "HORS BUDGET" if result["over_budget"] else "ok"
+        print(f"{path:<55} {result['src_ms']:8.1f} ms  {status:<11} {heavy}")
+
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    report = {
+        "benchmark": "import_time",
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "budget_ms": args.budget,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Résultats écrits dans {args.output}")
+
+    over_budget = [path for path, result in results.items() if result["over_budget"]]
+    if over_budget:
+        print(f"{len(over_budget)} page(s) au-dessus du budget de {args.budget:.0f} ms")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
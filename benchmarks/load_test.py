@@ -0,0 +1,405 @@
+"""
+Ce script mesure le comportement des pages de l'application sous plusieurs sessions
+simultanées, sans navigateur, avec l'API de test de Streamlit (`streamlit.testing.v1.AppTest`).
+
+Chaque session simulée exécute une page puis rejoue un scénario d'interactions réaliste
+(changement d'onglet, de langue, de variables du modèle, de filtres...) ; chaque interaction
+déclenche une réexécution de la page, dont on mesure la durée. Les sessions d'une même page
+tournent en parallèle dans le même processus, comme sur un serveur Streamlit : elles partagent
+les caches (données, cubes, figures). On mesure aussi la mémoire résidente du processus.
+
+Les données sont servies en HTTP par un serveur local, à la place du stockage MinIO : un CSV
+synthétique (appris sur le vrai fichier avec `--source`, voir `src.synthetic_data`, ou tiré
+hors ligne comme dans `benchmarks.helpers`), un fichier Excel des continents et une page HTML
+des codes ISO des pays (à la place d'iban.com) : toutes les pages s'exécutent hors ligne.
+
+Les pages 7 et 8 nécessitent les modèles entraînés (`output/`) : si elles ne peuvent pas
+s'exécuter, leurs erreurs sont comptées dans les résultats.
+
+Utilisation :
+    python -m benchmarks.load_test --sessions 8 --iterations 3 --rows 200000
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import contextlib
+import functools
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import resource
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.helpers import synthetic_survey, write_continents_excel, write_iso_codes_html
+
+DEFAULT_OUTPUT = "benchmarks/results/load_test.json"
+PERCENTILES = (50, 90, 95, 99)
+SURVEY_FILE = "StackOverflowSurvey.csv"
+COUNTRIES_FILE = "CountryLanguageStats.xlsx"
+ISO_CODES_FILE = "country-codes.html"
+
+
+# ==========================
+# Scénarios d'interaction
+# ==========================
+# Chaque étape modifie l'état des widgets d'une session (AppTest) puis rend la main avec un
+# libellé : la page est alors réexécutée et la durée de la réexécution est enregistrée.
+
+
+def _tab_switches(key):
+    def steps(at):
+        options = list(at.radio(key=key).options)
+        for option in options[1:] + options[:1]:
+            at.radio(key=key).set_value(option)
+            yield f"onglet {key}"
+
+    return steps
+
+
+def _set_value(widget, value, label, index=0, key=None):
+    def steps(at):
+        elements = getattr(at, widget)
+        element = elements(key=key) if key is not None else elements[index]
+        element.set_value(value)
+        yield label
+
+    return steps
+
+
+def _rerun(at):
+    yield "réexécution"
+
+
+def _locale_switch(at):
+    for locale in ("en", "fr"):
+        at.radio(key="labels_locale_radio").set_value(locale)
+        yield "changement de langue"
+
+
+def _model_variables(at):
+    at.multiselect[0].unselect("Gender")
+    yield "variables du modèle"
+    at.multiselect[0].select("PreviousSalary")
+    yield "variables du modèle"
+    at.multiselect[0].unselect("PreviousSalary").select("Gender")
+    yield "variables du modèle"
+
+
+def _cross_filters(at):
+    gender = at.multiselect(key="cross_filter_Gender")
+    gender.set_value(gender.options[:1])
+    yield "filtre"
+    languages = at.multiselect(key="cross_filter_Language")
+    languages.set_value(languages.options[:2])
+    yield "filtre"
+    at.selectbox(key="cross_filter_breakdown").set_value("Continent")
+    yield "ventilation"
+    at.multiselect(key="cross_filter_Gender").set_value([])
+    at.multiselect(key="cross_filter_Language").set_value([])
+    yield "filtre"
+
+
+SCENARIOS = {
+    "pages/1_Distribution_des_variables_principales.py": [
+        _tab_switches("distribution_tab_radio"),
+        _locale_switch,
+    ],
+    "pages/2_Taux_d_emploi_global.py": [_rerun],
+    "pages/3_Répartition_géographique.py": [_rerun],
+    "pages/4_Langages_utilisés.py": [_rerun],
+    "pages/5_Emploi_et_variables_catégorielles.py": [_rerun],
+    "pages/6_Emploi_et_variables_numériques.py": [_tab_switches("numeric_tab_radio")],
+    "pages/7_Modélisation_de_l_emploi.py": [_model_variables],
+    "pages/8_Etude_de_l_équité.py": [
+        _set_value("selectbox", "Woman", "catégorie privilégiée", index=0),
+        _tab_switches("bias5_plot_radio"),
+        _set_value(
+            "radio", "Ajustement des seuils de décision", "mitigation", key="bias6_method_radio"
+        ),
+        _set_value("selectbox", "Gradient Boosting", "modèle", key="bias6_model_selectbox"),
+        _set_value("selectbox", "Man", "catégorie privilégiée", index=0),
+    ],
+    "pages/9_Filtres_croisés.py": [_cross_filters],
+}
+
+
+# ==========================
+# Mesures
+# ==========================
+
+
+def current_rss():
+    """Mémoire résidente du processus, en octets (pic depuis le démarrage hors Linux)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class MemorySampler:
+    """Relève la mémoire résidente du processus à intervalle régulier, dans un fil dédié."""
+
+    def __init__(self, interval=0.1):
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.samples.append(current_rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.samples.append(current_rss())
+        return False
+
+
+@contextlib.contextmanager
+def shared_test_runtime():
+    """
+    Permet d'exécuter plusieurs sessions AppTest en parallèle.
+
+    AppTest installe un runtime Streamlit factice au début de chaque exécution et le retire à
+    la fin (`Runtime._instance = None`) : avec des sessions simultanées, la fin d'une exécution
+    retirerait le runtime des autres. Pendant le bloc, le dernier runtime installé reste
+    disponible.
+    """
+    from streamlit.runtime.runtime import Runtime
+
+    original_instance, original_exists = Runtime.__dict__["instance"], Runtime.__dict__["exists"]
+    last = {}
+
+    def instance(cls):
+        if cls._instance is not None:
+            last["runtime"] = cls._instance
+        if "runtime" not in last:
+            raise RuntimeError("Runtime hasn't been created!")
+        return last["runtime"]
+
+    def exists(cls):
+        return cls._instance is not None or "runtime" in last
+
+    Runtime.instance, Runtime.exists = classmethod(instance), classmethod(exists)
+    try:
+        yield
+    finally:
+        Runtime.instance, Runtime.exists = original_instance, original_exists
+
+
+def run_session(page, iterations, timeout):
+    """
+    Rejoue le scénario d'une page dans une session.
+
+    Returns
+    -------
+    list of tuple
+        (étape, durée en secondes, erreur) pour chaque exécution de la page.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    records = []
+    at = AppTest.from_file(page, default_timeout=timeout)
+
+    def timed_run(step):
+        start = time.perf_counter()
+        try:
+            at.run()
+            error = bool(at.exception) or bool(at.error)
+        except Exception:
+            error = True
+        records.append((step, time.perf_counter() - start, error))
+
+    timed_run("première exécution")
+    for _ in range(iterations):
+        for scenario in SCENARIOS[page]:
+            try:
+                for step in scenario(at):
+                    timed_run(step)
+            except Exception:
+                # Widget absent (page en erreur) : le reste du scénario est abandonné
+                records.append(("scénario", 0.0, True))
+                break
+
+    return records
+
+
+def run_page(page, sessions, iterations, timeout):
+    """
+    Exécute `sessions` sessions simultanées d'une page.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Une ligne par exécution : 'session', 'step', 'seconds' et 'error'.
+    dict
+        Mémoire résidente du processus (en Mo) au début, au pic et à la fin.
+    """
+    rss_start = current_rss()
+    with (
+        shared_test_runtime(),
+        MemorySampler() as sampler,
+        ThreadPoolExecutor(max_workers=sessions) as executor,
+    ):
+        futures = [
+            executor.submit(run_session, page, iterations, timeout) for _ in range(sessions)
+        ]
+        rows = [
+            (session, step, seconds, error)
+            for session, future in enumerate(futures)
+            for step, seconds, error in future.result()
+        ]
+
+    memory = {
+        "rss_start_mb": round(rss_start / 2**20, 1),
+        "rss_peak_mb": round(max(sampler.samples) / 2**20, 1),
+        "rss_end_mb": round(sampler.samples[-1] / 2**20, 1),
+    }
+    return pd.DataFrame(rows, columns=["session", "step", "seconds", "error"]), memory
+
+
+def latency_summary(runs):
+    """
+    Percentiles des durées d'exécution, en millisecondes, par étape et pour toutes les étapes.
+    """
+
+    def summarize(frame):
+        summary = {"runs": len(frame), "errors": int(frame["error"].sum())}
+        for p in PERCENTILES:
+            summary[f"p{p}_ms"] = round(float(np.percentile(frame["seconds"], p)) * 1000, 1)
+        summary["max_ms"] = round(float(frame["seconds"].max()) * 1000, 1)
+        return summary
+
+    return {
+        "all": summarize(runs),
+        "steps": {step: summarize(frame) for step, frame in runs.groupby("step", sort=False)},
+    }
+
+
+# ==========================
+# Source de données locale
+# ==========================
+
+
+def prepare_data(directory, rows, source=None, seed=0):
+    """
+    Écrit les fichiers servis par le serveur local : CSV de l'enquête, Excel des continents
+    et page HTML des codes ISO.
+    """
+    survey_path = os.path.join(directory, SURVEY_FILE)
+    if source is not None:
+        from src.data_loading import load_survey
+        from src.synthetic_data import SyntheticSurveyModel, write_synthetic_survey
+
+        model = SyntheticSurveyModel().fit(load_survey(source))
+        write_synthetic_survey(model, rows, survey_path, seed=seed)
+    else:
+        synthetic_survey(rows, seed).to_csv(survey_path)
+    write_continents_excel(os.path.join(directory, COUNTRIES_FILE))
+    write_iso_codes_html(os.path.join(directory, ISO_CODES_FILE))
+
+
+def serve_directory(directory):
+    """
+    Sert un répertoire en HTTP sur un port libre de la machine locale, dans un fil dédié.
+
+    Returns
+    -------
+    http.server.ThreadingHTTPServer
+        Le serveur (à arrêter avec `shutdown()`).
+    str
+        L'URL de base.
+    """
+
+    class QuietHandler(SimpleHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), functools.partial(QuietHandler, directory=directory)
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pages", nargs="+", default=list(SCENARIOS), help="Pages à tester")
+    parser.add_argument("--sessions", type=int, default=8, help="Sessions simultanées")
+    parser.add_argument("--iterations", type=int, default=3, help="Répétitions du scénario")
+    parser.add_argument("--rows", type=int, default=73_462, help="Lignes des données servies")
+    parser.add_argument("--source", help="Vraies données pour apprendre le générateur")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=300, help="Délai maximal par exécution")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Fichier JSON des résultats")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir = os.path.join(tmp_dir, "data")
+        os.makedirs(data_dir)
+        prepare_data(data_dir, args.rows, args.source, args.seed)
+        server, base_url = serve_directory(data_dir)
+
+        # Configuration lue par les pages : données servies localement, caches et journaux
+        # dans le répertoire temporaire
+        os.environ.update(
+            {
+                "stack_users_data_path": f"{base_url}/{SURVEY_FILE}",
+                "countries_lang_data_path": f"{base_url}/{COUNTRIES_FILE}",
+                "iso_url": f"{base_url}/{ISO_CODES_FILE}",
+                "figure_cache_dir": os.path.join(tmp_dir, "figures"),
+                "log_path": os.path.join(tmp_dir, "logs", "app.log"),
+                "metrics_path": os.path.join(tmp_dir, "logs", "metrics.json"),
+            }
+        )
+
+        results = {}
+        try:
+            for page in args.pages:
+                runs, memory = run_page(page, args.sessions, args.iterations, args.timeout)
+                results[page] = {**latency_summary(runs), "memory": memory}
+                overall = results[page]["all"]
+                print(
+                    f"{os.path.basename(page):<50} p50 {overall['p50_ms']:>8} ms  "
+                    f"p95 {overall['p95_ms']:>8} ms  erreurs {overall['errors']:>3}  "
+                    f"RSS max {memory['rss_peak_mb']} Mo"
+                )
+        finally:
+            server.shutdown()
+
+        # Durées des étapes mesurées par les pages elles-mêmes (voir src/metrics.py)
+        from src.metrics import registry
+
+        stage_metrics = registry.snapshot()
+
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    report = {
+        "benchmark": "load_test",
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "sessions": args.sessions,
+        "iterations": args.iterations,
+        "rows": args.rows,
+        "pages": results,
+        "stage_metrics": stage_metrics,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Résultats écrits dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
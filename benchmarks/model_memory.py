@@ -0,0 +1,200 @@
+"""
+Ce script mesure la mémoire utilisée par plusieurs processus qui chargent les modèles de
+l'application, au format joblib puis au format projeté en mémoire (`src.model_artifacts`).
+
+Pour chaque format, plusieurs processus sont lancés en même temps, comme les répliques d'un
+même nœud. Chacun charge les modèles, calcule leurs prédictions sur des données synthétiques
+(pour lire toutes les pages des modèles), puis mesure sa mémoire pendant que les autres sont
+encore en vie :
+- RSS : mémoire résidente, pages partagées comprises ;
+- PSS : mémoire résidente, chaque page partagée étant divisée par le nombre de processus qui
+  la partagent ;
+- privée : pages utilisées par ce seul processus.
+On retient l'écart avec la mesure faite avant le chargement des modèles, après avoir rendu au
+système la mémoire des tableaux temporaires. Les mesures viennent de
+`/proc/<pid>/smaps_rollup` : Linux uniquement.
+
+Les forêts aléatoires doivent d'abord être exportées :
+    python -m src.model_artifacts output/models
+
+Utilisation :
+    python -m benchmarks.model_memory --processes 4
+"""
+
+import argparse
+import ctypes
+import gc
+import json
+import multiprocessing
+import os
+import statistics
+import time
+
+from src.models_visualisation_utils import MODEL_FEATURES, MODEL_FILES, MODELS_DIR
+
+DEFAULT_OUTPUT = "benchmarks/results/model_memory.json"
+FORMATS = ["joblib", "memmap"]
+SMAPS_FIELDS = {
+    "Rss": "rss_mb",
+    "Pss": "pss_mb",
+    "Private_Clean": "private_mb",
+    "Private_Dirty": "private_mb",
+}
+
+
+def read_memory(pid="self"):
+    """
+    Mémoire d'un processus, en Mo : 'rss_mb', 'pss_mb' et 'private_mb'.
+    """
+    memory = {"rss_mb": 0.0, "pss_mb": 0.0, "private_mb": 0.0}
+    with open(f"/proc/{pid}/smaps_rollup", encoding="utf-8") as f:
+        for line in f:
+            field, _, rest = line.partition(":")
+            if field in SMAPS_FIELDS:
+                memory[SMAPS_FIELDS[field]] += int(rest.split()[0]) / 1024
+
+    return memory
+
+
+def release_free_memory():
+    """
+    Rend au système la mémoire libérée mais conservée par l'allocateur (glibc), pour ne
+    mesurer que la mémoire encore utilisée, et non les tableaux temporaires des prédictions.
+    """
+    gc.collect()
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def model_paths():
+    """Fichiers joblib des modèles affichés par l'application."""
+    return [os.path.join(MODELS_DIR, name) for files in MODEL_FILES.values() for name in files]
+
+
+def _worker(model_format, paths, n_rows, barrier, queue):
+    import joblib
+    # Modules des modèles importés avant la mesure de référence : seuls les modèles comptent
+    import sklearn.compose  # noqa: F401
+    import sklearn.ensemble  # noqa: F401
+    import sklearn.linear_model  # noqa: F401
+    import sklearn.pipeline  # noqa: F401
+    import sklearn.preprocessing  # noqa: F401
+    import xgboost  # noqa: F401
+
+    from benchmarks.helpers import synthetic_survey
+    from src.model_artifacts import load_model
+
+    loader = joblib.load if model_format == "joblib" else load_model
+    X = synthetic_survey(n_rows)[MODEL_FEATURES]
+
+    # Mesure de référence une fois tous les processus démarrés, bibliothèques importées
+    barrier.wait()
+    release_free_memory()
+    before = read_memory()
+
+    start = time.perf_counter()
+    models = [loader(path) for path in paths]
+    for model in models:
+        model.predict_proba(X)
+    seconds = time.perf_counter() - start
+
+    # Mesure pendant que tous les processus ont leurs modèles en mémoire
+    barrier.wait()
+    release_free_memory()
+    after = read_memory()
+    queue.put(
+        {
+            "pid": os.getpid(),
+            "seconds": seconds,
+            **{key: after[key] - before[key] for key in after},
+        }
+    )
+    barrier.wait()
+
+
+def measure(model_format, n_processes, paths, n_rows):
+    """
+    Lance `n_processes` processus qui chargent les modèles au format donné.
+
+    Returns
+    -------
+    dict
+        Mesures de chaque processus ('processes') et leurs totaux ('total_rss_mb',
+        'total_pss_mb', 'total_private_mb'), ainsi que la durée médiane de chargement et de
+        prédiction ('median_seconds').
+    """
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(n_processes)
+    queue = context.Queue()
+    processes = [
+        context.Process(target=_worker, args=(model_format, paths, n_rows, barrier, queue))
+        for _ in range(n_processes)
+    ]
+    for process in processes:
+        process.start()
+    results = [queue.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    return {
+        "processes": results,
+        **{
+            f"total_{key}": round(sum(result[key] for result in results), 1)
+            for key in ["rss_mb", "pss_mb", "private_mb"]
+        },
+        "median_seconds": round(statistics.median(r["seconds"] for r in results), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--processes", type=int, default=4, help="Processus simultanés")
+    parser.add_argument("--rows", type=int, default=20_000, help="Lignes prédites par modèle")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Fichier JSON des résultats")
+    args = parser.parse_args()
+
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        raise SystemExit("Mesure impossible : /proc/self/smaps_rollup est propre à Linux.")
+    paths = model_paths()
+    missing = [
+        path
+        for path in paths
+        if "random_forest" in path and not os.path.isdir(os.path.splitext(path)[0])
+    ]
+    if missing:
+        raise SystemExit(
+            f"Forêts non exportées ({', '.join(missing)}) : "
+            "lancer d'abord `python -m src.model_artifacts output/models`."
+        )
+
+    results = {}
+    for model_format in FORMATS:
+        results[model_format] = measure(model_format, args.processes, paths, args.rows)
+        result = results[model_format]
+        print(
+            f"{model_format:<8} RSS {result['total_rss_mb']:8.1f} Mo  "
+            f"PSS {result['total_pss_mb']:8.1f} Mo  "
+            f"privée {result['total_private_mb']:8.1f} Mo  "
+            f"({args.processes} processus, {result['median_seconds']} s par processus)"
+        )
+
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    report = {
+        "benchmark": "model_memory",
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "processes": args.processes,
+        "rows": args.rows,
+        "models": paths,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Résultats écrits dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
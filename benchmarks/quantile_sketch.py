@@ -0,0 +1,113 @@
+"""
+Ce script compare les quantiles des sketches KLL (`src.quantile_sketch`) aux quantiles exacts,
+sur des données synthétiques volumineuses.
+
+Les valeurs sont générées par morceaux et réparties entre plusieurs partitions : chaque
+partition alimente son propre sketch, puis les sketches sont fusionnés, comme pour un jeu de
+données partitionné par année. On mesure l'erreur maximale sur le rang des quantiles (à
+comparer à la borne `normalized_rank_error(k)`), la mémoire conservée et le temps de calcul.
+
+Utilisation :
+    python -m benchmarks.quantile_sketch --rows 10000000 --k 100 200 400
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.quantile_sketch import KLLSketch, normalized_rank_error
+
+QUANTILES = np.linspace(0.01, 0.99, 99)
+
+
+def synthetic_columns(n_rows, seed=0):
+    """
+    Variables synthétiques proches de celles de l'enquête : salaire (log-normal), années de
+    code (entiers, nombreuses valeurs égales) et nombre de langages maîtrisés.
+    """
+    rng = np.random.default_rng(seed)
+    years_code = rng.gamma(2.0, 6.0, n_rows).round()
+    return {
+        "PreviousSalary": rng.lognormal(10.8, 0.8, n_rows),
+        "YearsCode": years_code,
+        "YearsCodePro": np.maximum(years_code - rng.integers(0, 8, n_rows), 0),
+        "ComputerSkills": rng.poisson(13, n_rows).astype(float),
+    }
+
+
+def max_rank_error(sorted_values, estimates, q=QUANTILES):
+    """
+    Écart maximal entre l'ordre demandé et le rang réel des quantiles estimés. Pour des valeurs
+    égales, on retient le rang le plus proche de l'ordre demandé.
+    """
+    n = len(sorted_values)
+    lower = np.searchsorted(sorted_values, estimates, side="left") / n
+    upper = np.searchsorted(sorted_values, estimates, side="right") / n
+    return float(np.max(np.abs(np.clip(q, lower, upper) - q)))
+
+
+def run(n_rows, ks, n_partitions=4, chunksize=500_000, seed=0):
+    """
+    Lance la comparaison pour chaque variable et chaque valeur de `k`.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Une ligne par (variable, k) : erreur de rang maximale, borne théorique, nombre de
+        valeurs conservées, temps du sketch et temps du calcul exact.
+    """
+    columns = synthetic_columns(n_rows, seed)
+    rows = []
+    for col, values in columns.items():
+        start = time.perf_counter()
+        sorted_values = np.sort(values)
+        exact = np.quantile(sorted_values, QUANTILES)
+        exact_time = time.perf_counter() - start
+
+        for k in ks:
+            start = time.perf_counter()
+            partitions = [KLLSketch(k, seed=seed + i) for i in range(n_partitions)]
+            for i, begin in enumerate(range(0, n_rows, chunksize)):
+                partitions[i % n_partitions].update(values[begin:begin + chunksize])
+            sketch = partitions[0]
+            for other in partitions[1:]:
+                sketch.merge(other)
+            estimates = sketch.quantiles(QUANTILES)
+            sketch_time = time.perf_counter() - start
+
+            rows.append(
+                {
+                    "column": col,
+                    "k": k,
+                    "max_rank_error": max_rank_error(sorted_values, estimates),
+                    "error_bound": normalized_rank_error(k),
+                    "max_relative_error": float(
+                        np.max(np.abs(estimates - exact) / np.maximum(np.abs(exact), 1))
+                    ),
+                    "retained": sketch.n_retained,
+                    "sketch_seconds": round(sketch_time, 3),
+                    "exact_seconds": round(exact_time, 3),
+                }
+            )
+
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=5_000_000, help="Nombre de valeurs")
+    parser.add_argument("--k", type=int, nargs="+", default=[100, 200, 400])
+    parser.add_argument("--partitions", type=int, default=4, help="Nombre de partitions")
+    parser.add_argument("--chunksize", type=int, default=500_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results = run(args.rows, args.k, args.partitions, args.chunksize, args.seed)
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(results.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
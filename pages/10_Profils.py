@@ -0,0 +1,85 @@
+"""Ce module génère la page de consultation des profils d'exécution des pages."""
+
+import streamlit as st
+
+from src.logging_setup import get_page_logger
+from src.profiling import list_profiles, profile_dir, top_allocations, top_functions
+
+# ==========================
+# Initialisation du logger
+# ==========================
+
+logger = get_page_logger("profils")
+logger.info("Début de la page Streamlit : Profils")
+
+# Nombre de lignes affichées dans chaque tableau
+N_TOP = 30
+
+# ==========================
+# Configuration de la page Streamlit
+# ==========================
+
+st.set_page_config(page_title="Profils", page_icon=":chart_with_upwards_trend:")
+
+with st.sidebar:
+    st.title("Projet Mise en production pour la data-science")
+    st.subheader("Louise LIGONNIERE")
+    st.subheader("Amina MANSEUR")
+    st.subheader("Lila MEKKI")
+
+st.markdown(
+    """
+    ## Profils d'exécution des pages
+
+    Cette page liste les captures cProfile et tracemalloc des exécutions de pages. Une capture
+    est faite pour toutes les exécutions des pages listées dans la variable d'environnement
+    `profile_pages` (ou `all`), ou pour une seule exécution en ajoutant `?profile=<jeton>` à
+    l'URL d'une page, le jeton étant la valeur de la variable `profile_token`.
+    """
+)
+
+# ==========================
+# Choix de la capture
+# ==========================
+
+profiles = list_profiles()
+if profiles.empty:
+    st.info(f"Aucune capture dans `{profile_dir()}`.")
+    st.stop()
+
+selected = st.selectbox(
+    "Capture",
+    profiles.index,
+    format_func=lambda i: (
+        f"{profiles.loc[i, 'page']} - {profiles.loc[i, 'captured_at']:%Y-%m-%d %H:%M:%S}"
+    ),
+    key="profile_selectbox",
+)
+prefix = profiles.loc[selected, "prefix"]
+logger.info(f"Capture sélectionnée : {prefix}")
+
+# ==========================
+# Affichage de la capture
+# ==========================
+
+sort_labels = {"Temps cumulé": "cumtime", "Temps propre": "tottime"}
+sort_by = st.radio(
+    "Trier les fonctions par", list(sort_labels), horizontal=True, key="profile_sort_radio"
+)
+
+try:
+    functions_df = top_functions(prefix, N_TOP, sort_labels[sort_by])
+    allocations_df = top_allocations(prefix, N_TOP)
+except Exception as e:
+    logger.error(f"Erreur lors de la lecture de la capture {prefix} : {e}")
+    st.error("Impossible de lire la capture sélectionnée.")
+    st.stop()
+
+st.subheader("Fonctions les plus coûteuses")
+st.dataframe(functions_df.round(4), hide_index=True)
+
+st.subheader("Principaux sites d'allocation mémoire")
+st.caption("Mémoire encore allouée à la fin de l'exécution, par ligne de code.")
+st.dataframe(allocations_df.round(1), hide_index=True)
+
+logger.info("Fin de l'exécution de la page Profils")
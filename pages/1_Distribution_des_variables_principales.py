@@ -6,23 +6,25 @@ import os
 import streamlit as st
 import pandas as pd
 from dotenv import load_dotenv
-from loguru import logger
 
-from src.data_preprocessing import labels_translation
-from src.plot_utils import plot_hist, plot_hist_orders
+from src.data_loading import dataset_version
+from src.data_preprocessing import LOCALE_TRANSLATIONS, labels_translation
+from src.descriptive_stats import load_survey_summary
+from src.figure_cache import cached_figure
+from src.logging_setup import get_page_logger
+from src.metrics import PageTimer
+from src.plot_utils import LazyFigure, plot_hist, plot_hist_orders, prefetch_figures
 
 # ==========================
 # Initialisation du logger
 # ==========================
 
-logger.add(
-    "logs/distribution_variables.log",
-    rotation="1 MB",
-    retention="10 days",
-    level="DEBUG",
-)
+logger = get_page_logger("distribution_variables")
 logger.info("Début de la page Streamlit : Distribution des variables principales")
 
+# Chronométrage des étapes de la page (métriques exportées, voir src/metrics.py)
+page_timer = PageTimer("distribution_variables")
+
 # ==========================
 # Chargement des variables d'environnement
 # ==========================
@@ -47,6 +49,13 @@ with st.sidebar:
     st.subheader("Louise LIGONNIERE")
     st.subheader("Amina MANSEUR")
     st.subheader("Lila MEKKI")
+    locale = st.radio(
+        "Langue des libellés",
+        options=["fr", "en"],
+        format_func={"fr": "Français", "en": "English"}.get,
+        horizontal=True,
+        key="labels_locale_radio",
+    )
 
 st.markdown(
     """
@@ -65,9 +74,17 @@ st.markdown(
 # Chargement et prétraitement des données
 # ==========================
 
+
+# Les données sont chargées une seule fois par processus et partagées entre les sessions :
+# elles ne doivent pas être modifiées (les traductions renvoient des vues)
+@st.cache_resource
+def load_stack_users(path):
+    return pd.read_csv(path, index_col="Unnamed: 0")
+
+
 # Chargement des données depuis le répertoire sspcloud
 try:
-    stack_users_df = pd.read_csv(stack_users_data_path, index_col="Unnamed: 0")
+    stack_users_df = load_stack_users(stack_users_data_path)
     logger.success(f"Fichier chargé avec succès : {stack_users_data_path}")
 except Exception as e:
     logger.error(f"Erreur lors du chargement du fichier : {e}")
@@ -75,119 +92,112 @@ except Exception as e:
         "Impossible de charger les données. Veuillez vérifier le chemin ou le format du fichier."
     )
     st.stop()
+page_timer.lap("load")
 
-# Traduction des labels
+# Traduction des labels (mise en cache par langue : changer de langue ne relit pas les données)
 try:
-    stack_users_df_fr = labels_translation(stack_users_df)
-    logger.info("Traduction des labels effectuée avec succès")
+    stack_users_df_loc = labels_translation(stack_users_df, locale)
+    logger.info(f"Traduction des labels effectuée avec succès ({locale})")
 except Exception as e:
     logger.error(f"Erreur lors de la traduction des labels : {e}")
     st.error("Erreur lors du traitement des données.")
     st.stop()
+page_timer.lap("preprocess")
 
 # ==========================
-# Génération des graphiques
+# Préparation des graphiques
 # ==========================
 
-logger.info("Début de la génération des graphiques")
-
-# 1. Graphe Age
-fig_age = plot_hist(stack_users_df_fr, "Age", "Distribution de l'âge")
-
-# 2. Graphe Genre
-fig_genre = plot_hist(stack_users_df_fr, "Gender", "Distribution du genre")
-
-# 3. Graphe Niveau d'éducation
-fig_ed = plot_hist_orders(
-    stack_users_df_fr,
-    "EdLevel",
-    "Distribution du niveau d'éducation",
-    {
-        "EdLevel": [
-            "Pas d'éducation supérieure",
-            "Licence",
-            "Master",
-            "Doctorat",
-            "Autre",
-        ]
-    },
-)
-
-# 4. Graphe Branche pro
-fig_branch = plot_hist(
-    stack_users_df_fr, "MainBranch", "Distribution de la branche professionnelle"
-)
-
-# 5. Graphe Années de code
-fig_code = plot_hist(stack_users_df_fr, "YearsCode", "Distribution des années de code")
-
-# 6. Graphe Années de code pro
-fig_codepro = plot_hist(
-    stack_users_df_fr, "YearsCodePro", "Distribution des années de code professionnel"
-)
-
-# 7. Graphe Salaire précédent
-fig_salaire = plot_hist(
-    stack_users_df_fr, "PreviousSalary", "Distribution du salaire précédent"
-)
-
-# 8. Graphe Compétences en informatique
-fig_info = plot_hist(
-    stack_users_df_fr,
-    "ComputerSkills",
-    "Distribution des compétences en informatique",
-)
-
-logger.success("Tous les graphiques ont été générés avec succès")
+# Les figures sont mises en cache par version des données et par langue. Elles ne sont
+# construites qu'à l'affichage de l'onglet correspondant.
+figures_version = f"{dataset_version(stack_users_data_path)}-{locale}"
+
+
+# Figures paresseuses conservées d'une exécution à l'autre et partagées entre les sessions : une
+# figure déjà construite n'est ni reconstruite ni relue du cache des figures, et la préparation
+# en arrière-plan n'a plus rien à faire une fois tous les onglets construits
+@st.cache_resource(max_entries=8)
+def distribution_figures(_stack_users_df_loc, version, locale):
+    def lazy_hist(col, title):
+        return LazyFigure(
+            cached_figure, plot_hist, _stack_users_df_loc, col, title, version=version
+        )
+
+    return {
+        "Age": lazy_hist("Age", "Distribution de l'âge"),
+        "Genre": lazy_hist("Gender", "Distribution du genre"),
+        "Niveau d'éducation": LazyFigure(
+            cached_figure,
+            plot_hist_orders,
+            _stack_users_df_loc,
+            "EdLevel",
+            "Distribution du niveau d'éducation",
+            {"EdLevel": list(LOCALE_TRANSLATIONS[locale]["EdLevel"].values())},
+            version=version,
+        ),
+        "Branche professionnelle": lazy_hist(
+            "MainBranch", "Distribution de la branche professionnelle"
+        ),
+        "Années de code": lazy_hist("YearsCode", "Distribution des années de code"),
+        "Années de code professionnel": lazy_hist(
+            "YearsCodePro", "Distribution des années de code professionnel"
+        ),
+        "Salaire précédent": lazy_hist("PreviousSalary", "Distribution du salaire précédent"),
+        "Compétences en informatique": lazy_hist(
+            "ComputerSkills", "Distribution des compétences en informatique"
+        ),
+    }
+
+
+figures = distribution_figures(stack_users_df_loc, figures_version, locale)
 
 # Choix du graphe
-tab_age, tab_genre, tab_ed, tab_branch, tab_code, tab_codepro, tab_salaire, tab_info = (
-    st.tabs(
-        [
-            "Age",
-            "Genre",
-            "Niveau d'éducation",
-            "Branche professionnelle",
-            "Années de code",
-            "Années de code professionnel",
-            "Salaire précédent",
-            "Compétences en informatique",
-        ]
-    )
+selected_tab = st.radio(
+    "Graphique",
+    list(figures),
+    horizontal=True,
+    key="distribution_tab_radio",
+    label_visibility="collapsed",
 )
 
 # ==========================
 # Affichage des graphiques
 # ==========================
 
-with tab_age:
-    st.plotly_chart(fig_age)
-with tab_genre:
-    st.plotly_chart(fig_genre)
-with tab_ed:
-    st.plotly_chart(fig_ed)
-with tab_branch:
-    st.plotly_chart(fig_branch)
-
-with tab_code:
-    st.plotly_chart(fig_code)
-with tab_codepro:
-    st.plotly_chart(fig_codepro)
-with tab_salaire:
-    st.plotly_chart(fig_salaire)
-with tab_info:
-    st.plotly_chart(fig_info)
+try:
+    fig = figures[selected_tab].get()
+    page_timer.lap("plot")
+    st.plotly_chart(fig)
+    page_timer.lap("render")
+    logger.success(f"Graphique affiché avec succès : {selected_tab}")
+except Exception as e:
+    logger.error(f"Erreur lors de la génération du graphique {selected_tab} : {e}")
+    st.error("Erreur lors de la génération du graphique.")
+    st.stop()
+
+# Préparation des autres onglets en arrière-plan
+prefetch_figures(figures.values())
 
 
 # ==========================
 # Création et affichage des commentaires automatisés des graphiques
 # ==========================
 
+# Résumé descriptif calculé en un seul parcours des données, une fois par version du fichier
+try:
+    summary = load_survey_summary(stack_users_data_path)
+    logger.info("Résumé descriptif chargé avec succès")
+except Exception as e:
+    logger.error(f"Erreur lors du calcul du résumé descriptif : {e}")
+    st.error("Erreur lors du calcul des statistiques descriptives.")
+    st.stop()
+page_timer.lap("summary")
+
 # Initialisation des commentaires
 COMMENTAIRE = ""
 
 # 1. Âge
-age_counts = stack_users_df_fr["Age"].value_counts(normalize=True)
+age_counts = summary.shares("Age")
 if "Moins de 35 ans" in age_counts:
     pct_jeunes = round(100 * age_counts["Moins de 35 ans"], 1)
     COMMENTAIRE += f"- 👶 **{pct_jeunes}%** des répondants ont moins de 35 ans.\n"
@@ -196,7 +206,7 @@ if "Plus de 35 ans" in age_counts:
     COMMENTAIRE += f"- 👴 **{pct_plus_35}%** des répondants ont 35 ans ou plus.\n"
 
 # 2. Genre
-genre_counts = stack_users_df_fr["Gender"].value_counts(normalize=True)
+genre_counts = summary.shares("Gender")
 if "Homme" in genre_counts:
     pct_hommes = round(100 * genre_counts["Homme"], 1)
     COMMENTAIRE += (
@@ -212,7 +222,7 @@ if "Autre" in genre_counts:
     COMMENTAIRE += f"- 🚻 **{pct_autre}%** des répondants se considèrent dans une autre catégorie.\n"
 
 # 3. Niveau d'éducation
-ed_counts = stack_users_df_fr["EdLevel"].value_counts(normalize=True)
+ed_counts = summary.shares("EdLevel")
 licence_pct = round(100 * ed_counts.get("Licence", 0), 1)
 master_pct = round(100 * ed_counts.get("Master", 0), 1)
 doctorat_pct = round(100 * ed_counts.get("Doctorat", 0), 1)
@@ -222,7 +232,7 @@ COMMENTAIRE += (
 )
 
 # 4. Branche professionnelle
-branch_counts = stack_users_df_fr["MainBranch"].value_counts(normalize=True)
+branch_counts = summary.shares("MainBranch")
 dev_pct = round(100 * branch_counts.iloc[0], 1)
 branche_dev = branch_counts.index[0]
 COMMENTAIRE += (
@@ -230,36 +240,39 @@ COMMENTAIRE += (
 )
 
 # 5. Langages (Compétences en informatique)
-skills_series = pd.to_numeric(stack_users_df_fr["ComputerSkills"], errors="coerce")
-skill_mean = round(skills_series.mean(), 1)
+skill_mean = round(summary.mean("ComputerSkills"), 1)
 COMMENTAIRE += (
     f"- 💡 Les répondants connaissent en moyenne **{skill_mean} langages** informatiques.\n"
 )
 
 # 6. Années de code
-years_code_series = pd.to_numeric(stack_users_df_fr["YearsCode"], errors="coerce")
-years_code_mean = round(years_code_series.mean(), 1)
+years_code_mean = round(summary.mean("YearsCode"), 1)
+years_code_median = round(summary.quantiles("YearsCode")[0.5], 1)
 COMMENTAIRE += (
-    f"- 💻 Les répondants ont en moyenne **{years_code_mean} années de code**.\n"
+    f"- 💻 Les répondants ont en moyenne **{years_code_mean} années de code** "
+    f"(médiane : {years_code_median}).\n"
 )
 
 # 7. Années de code professionnel
-years_codepro_series = pd.to_numeric(stack_users_df_fr["YearsCodePro"], errors="coerce")
-years_codepro_mean = round(years_codepro_series.mean(), 1)
+years_codepro_mean = round(summary.mean("YearsCodePro"), 1)
 COMMENTAIRE += (
     f"- 💼 Les répondants ont en moyenne **{years_codepro_mean} années "
     f"d'expérience professionnelle**.\n"
 )
 
 # 8. Salaire précédent
-salary_series = pd.to_numeric(stack_users_df_fr["PreviousSalary"], errors="coerce")
-salary_mean = round(salary_series.mean(), 1)
+salary_mean = round(summary.mean("PreviousSalary"), 1)
+salary_quartiles = summary.quantiles("PreviousSalary")
 COMMENTAIRE += (
-    f"- 💸 Le salaire précédent moyen des répondants est de **{salary_mean}**$.\n"
+    f"- 💸 Le salaire précédent moyen des répondants est de **{salary_mean}**$ "
+    f"(la moitié des répondants gagnait entre {salary_quartiles[0.25]:.0f}$ "
+    f"et {salary_quartiles[0.75]:.0f}$).\n"
 )
 
 # 🔽 Affichage
 st.markdown("### Synthèse automatisée")
 st.markdown(COMMENTAIRE)
+page_timer.lap("commentary")
 
+page_timer.finish()
 logger.info("Fin de l'exécution de la page Distribution des variables principales")
@@ -4,20 +4,25 @@ Ce module génère le graphique représentant le taux d'emploi
 
 import os
 import streamlit as st
-import pandas as pd
 from dotenv import load_dotenv
-from loguru import logger
 
-from src.data_preprocessing import labels_translation
-from src.plot_utils import plot_hist
+from src.aggregation_cube import load_employment_cube
+from src.data_loading import survey_years
+from src.figure_cache import cached_figure
+from src.logging_setup import get_page_logger
+from src.metrics import PageTimer
+from src.plot_utils import plot_hist_from_counts
 
 # ==========================
 # Initialisation du logger
 # ==========================
 
-logger.add("logs/taux_emploi.log", rotation="1 MB", retention="10 days", level="DEBUG")
+logger = get_page_logger("taux_emploi")
 logger.info("Début de la page Streamlit : Taux d'emploi")
 
+# Chronométrage des étapes de la page (métriques exportées, voir src/metrics.py)
+page_timer = PageTimer("taux_emploi")
+
 # ==========================
 # Chargement des variables d'environnement
 # ==========================
@@ -26,6 +31,11 @@ load_dotenv()
 stack_users_data_path = os.environ.get(
     "stack_users_data_path", "data/StackOverflowSurvey.csv"
 )
+# Jeu Parquet partitionné par année s'il est configuré, extrait CSV 2022 sinon
+survey_source = os.environ.get("survey_dataset_path", stack_users_data_path)
+countries_lang_data_path = os.environ.get(
+    "countries_lang_data_path", "data/CountryLanguageStats.xls"
+)
 logger.debug(f"Chemin des données StackOverflow : {stack_users_data_path}")
 
 # ==========================
@@ -42,6 +52,13 @@ with st.sidebar:
     st.subheader("Amina MANSEUR")
     st.subheader("Lila MEKKI")
 
+    # Année de l'enquête : la plus récente par défaut (une seule pour l'extrait CSV)
+    available_years = survey_years(survey_source)
+    survey_year = st.selectbox(
+        "Année de l'enquête", available_years, index=len(available_years) - 1
+    )
+logger.info(f"Année de l'enquête sélectionnée : {survey_year}")
+
 st.markdown(
     """
     ## Taux d'emploi global
@@ -53,50 +70,50 @@ st.markdown(
 # Chargement et prétraitement des données
 # ==========================
 
-# Chargement des données
+# Chargement du cube d'agrégation (construit une seule fois par version des données)
 try:
-    stack_users_df = pd.read_csv(stack_users_data_path, index_col="Unnamed: 0")
-    logger.success("Fichier de données chargé avec succès.")
+    employment_cube = load_employment_cube(
+        survey_source, countries_lang_data_path, years=[survey_year]
+    )
+    logger.success("Cube d'agrégation de l'emploi chargé avec succès.")
 except Exception as e:
     logger.error(f"Erreur lors du chargement des données : {e}")
     st.error("Erreur lors du chargement des données.")
     st.stop()
-
-# Traduction des labels
-try:
-    stack_users_df_fr = labels_translation(stack_users_df)
-    logger.info("Traduction des labels effectuée.")
-except Exception as e:
-    logger.error(f"Erreur lors de la traduction des labels : {e}")
-    st.error("Erreur lors du traitement des données.")
-    st.stop()
-
+page_timer.lap("load")
 
 # ==========================
 # Génération du graphique
 # ==========================
 
 try:
-    fig = plot_hist(stack_users_df_fr, "EmployedCat", "Distribution du statut d'emploi")
+    fig = cached_figure(
+        plot_hist_from_counts,
+        employment_cube.status_counts(),
+        "EmployedCat",
+        "Distribution du statut d'emploi",
+        version=employment_cube.version,
+    )
     logger.info("Graphique du taux d'emploi généré avec succès.")
 except Exception as e:
     logger.error(f"Erreur lors de la génération du graphique : {e}")
     st.error("Erreur lors de la génération du graphique.")
     st.stop()
+page_timer.lap("plot")
 
 # ==========================
 # Affichage du graphique
 # ==========================
 
 st.plotly_chart(fig)
+page_timer.lap("render")
 
 # ==========================
 # Création et affichage des commentaires automatisés du graphique
 # ==========================
 
 # Calcul du taux d'emploi
-emploi_counts = stack_users_df_fr["EmployedCat"].value_counts(normalize=True)
-pct_employed = round(100 * emploi_counts.get("En emploi", 0), 1)
+pct_employed = round(100 * employment_cube.n_employed / employment_cube.n_respondents, 1)
 
 # Génération du commentaire
 if pct_employed < 70:
@@ -125,5 +142,7 @@ pourront être envisagées pour garantir des performances fiables.
 # Affichage dans Streamlit
 st.markdown("### Synthèse automatisée")
 st.markdown(COMMENTAIRE)
+page_timer.lap("commentary")
 
+page_timer.finish()
 logger.info("Fin de l'exécution de la page Taux d'emploi.")
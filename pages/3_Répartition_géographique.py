@@ -4,29 +4,30 @@ Ce module génère la répartition géographique des répondants
 
 import os
 import streamlit as st
-import pandas as pd
 from dotenv import load_dotenv
-from loguru import logger
 
+from src.aggregation_cube import load_employment_cube
+from src.data_loading import frame_version, survey_years
 from src.data_preprocessing import (
     get_iso_country_codes,
     add_iso_codes,
-    add_continent_info,
 )
+from src.descriptive_stats import load_survey_summary
+from src.figure_cache import cached_figure
+from src.logging_setup import get_page_logger
+from src.metrics import PageTimer
 from src.plot_utils import plot_choropleth_map
 
 # ==========================
 # Initialisation du logger
 # ==========================
 
-logger.add(
-    "logs/repartition_geographique.log",
-    rotation="1 MB",
-    retention="10 days",
-    level="DEBUG",
-)
+logger = get_page_logger("repartition_geographique")
 logger.info("Début de la page Streamlit : Répartition géographique")
 
+# Chronométrage des étapes de la page (métriques exportées, voir src/metrics.py)
+page_timer = PageTimer("repartition_geographique")
+
 # ==========================
 # Chargement des variables d'environnement
 # ==========================
@@ -35,6 +36,8 @@ load_dotenv()
 stack_users_data_path = os.environ.get(
     "stack_users_data_path", "data/StackOverflowSurvey.csv"
 )
+# Jeu Parquet partitionné par année s'il est configuré, extrait CSV 2022 sinon
+survey_source = os.environ.get("survey_dataset_path", stack_users_data_path)
 countries_lang_data_path = os.environ.get(
     "countries_lang_data_path", "data/CountryLanguageStats.xls"
 )
@@ -58,6 +61,13 @@ with st.sidebar:
     st.subheader("Amina MANSEUR")
     st.subheader("Lila MEKKI")
 
+    # Année de l'enquête : la plus récente par défaut (une seule pour l'extrait CSV)
+    available_years = survey_years(survey_source)
+    survey_year = st.selectbox(
+        "Année de l'enquête", available_years, index=len(available_years) - 1
+    )
+logger.info(f"Année de l'enquête sélectionnée : {survey_year}")
+
 st.markdown(
     """
     ## Répartition géographique des répondants
@@ -72,32 +82,31 @@ st.markdown(
 # Chargement et prétraitement des données
 # ==========================
 
-# Chargement des données
+# Chargement du cube d'agrégation (construit une seule fois par version des données)
 try:
-    stack_users_df = pd.read_csv(stack_users_data_path, index_col="Unnamed: 0")
-    logger.success("Données StackOverflow chargées avec succès.")
+    employment_cube = load_employment_cube(
+        survey_source, countries_lang_data_path, years=[survey_year]
+    )
+    logger.success("Cube d'agrégation de l'emploi chargé avec succès.")
 except Exception as e:
     logger.error(f"Erreur lors du chargement des données : {e}")
     st.error("Erreur lors du chargement des données.")
     st.stop()
+page_timer.lap("load")
 
-# Ajout des codes ISO
+# Création du DataFrame pour la carte
 try:
+    df_carto = employment_cube.employment_rate(["Country"])
     iso_df = get_iso_country_codes(iso_url)
-    stack_users_df = add_iso_codes(stack_users_df, iso_df)
+    df_carto = add_iso_codes(df_carto, iso_df).dropna(subset=["ISO"])
     logger.info("Ajout des codes ISO réussi.")
 except Exception as e:
     logger.error(f"Erreur lors de l'ajout des codes ISO : {e}")
     st.error("Erreur lors de la récupération des codes ISO.")
     st.stop()
 
-# Création du DataFrame pour la carte
 try:
-    df_carto = (
-        stack_users_df.groupby(["Country", "ISO"])["Employed"]
-        .agg(["count", "mean"])
-        .reset_index()
-    )
+    df_carto = df_carto[["Country", "ISO", "count", "mean"]].reset_index(drop=True)
     df_carto.columns = ["Country", "ISO", "count", "percentage"]
     df_carto["percentage"] *= 100
     logger.info("Tableau de base pour les cartes généré.")
@@ -105,23 +114,30 @@ except Exception as e:
     logger.error(f"Erreur lors de l'agrégation des données : {e}")
     st.error("Erreur lors de la préparation des données pour les cartes.")
     st.stop()
+page_timer.lap("preprocess")
 
 # ==========================
 # Création des cartes
 # ==========================
 
+# Les cartes dépendent des données de l'enquête et du contenu de la table des codes ISO
+figures_version = f"{employment_cube.version}-{frame_version(iso_df)}"
+
 # 1. Carte du nb de développeurs par pays
-fig_nb = plot_choropleth_map(
+fig_nb = cached_figure(
+    plot_choropleth_map,
     df=df_carto,
     location_col="ISO",
     value_col="count",
     hover_col="Country",
     title="Nombre de répondants par pays",
     colorbar_title="Effectif",
+    version=figures_version,
 )
 
 # 2. Carte du taux d'emploi par pays
-fig_taux = plot_choropleth_map(
+fig_taux = cached_figure(
+    plot_choropleth_map,
     df=df_carto,
     location_col="ISO",
     value_col="percentage",
@@ -130,23 +146,16 @@ fig_taux = plot_choropleth_map(
     min_value=100,
     title="Taux d'emploi par pays (≥ 100 répondants)",
     colorbar_title="Taux d'emploi",
+    version=figures_version,
 )
-
-# Ajout des infos continentales
-try:
-    stack_users_df = add_continent_info(stack_users_df, countries_lang_data_path)
-    logger.info("Ajout des informations de continent effectué.")
-except Exception as e:
-    logger.error(f"Erreur lors de l'ajout des continents : {e}")
-    st.error("Erreur lors de l'ajout des données continentales.")
-    st.stop()
+page_timer.lap("plot")
 
 # Agrégation continentale
 try:
-    df_carto_cont = stack_users_df.groupby(["Continent"])["Employed"].agg(
-        ["count", "mean"]
+    df_carto_cont = employment_cube.employment_rate(["Continent"])
+    df_carto_cont = df_carto_cont.sort_values(by="count", ascending=False).reset_index(
+        drop=True
     )
-    df_carto_cont = df_carto_cont.sort_values(by="count", ascending=False).reset_index()
     df_carto_cont["mean"] = (df_carto_cont["mean"] * 100).round(2)
     df_carto_cont.columns = ["Continent", "Nombre de répondants", "Taux d'emploi"]
     logger.info("Tableau des continents généré.")
@@ -174,28 +183,34 @@ with tab_taux:
     st.plotly_chart(fig_taux)
 with tab_cont:
     st.dataframe(df_carto_cont)
+page_timer.lap("render")
 
 
 # ==========================
 # Création et affichage des commentaires automatisés des cartes
 # ==========================
 
-# Calcul du pourcentage de répondants par continent
-total_repondants = df_carto_cont["Nombre de répondants"].sum()
-df_carto_cont["Part en %"] = (
-    100 * df_carto_cont["Nombre de répondants"] / total_repondants
-).round(1)
+# Répartition par continent issue du résumé descriptif (un seul parcours des données)
+try:
+    continents = load_survey_summary(
+        survey_source, countries_lang_data_path, years=[survey_year]
+    ).continents
+    logger.info("Résumé descriptif chargé.")
+except Exception as e:
+    logger.error(f"Erreur lors du calcul du résumé descriptif : {e}")
+    st.error("Erreur lors du calcul des statistiques descriptives.")
+    st.stop()
 
-top_continents = df_carto_cont[df_carto_cont["Part en %"] > 10]
-low_continents = df_carto_cont[df_carto_cont["Part en %"] < 10]
+top_continents = continents[continents["share"] > 10]
+low_continents = continents[continents["share"] < 10]
 
 COMMENTAIRE = """- 🌍 **Répartition des répondants par continent** :"""
 
 # Continents bien représentés
 for _, row in top_continents.iterrows():
-    continent = row['Continent']
-    pourcentage = row['Part en %']
-    employed_rate = row['Taux d\'emploi']
+    continent = row["Continent"]
+    pourcentage = row["share"]
+    employed_rate = row["employment_rate"]
     COMMENTAIRE += (
         f"\n - {continent} : {pourcentage}% des répondants"
         f" (Taux d'emploi : {employed_rate}%)"
@@ -210,7 +225,7 @@ if not low_continents.empty:
     )
 
 # Commentaire sur le taux d’emploi global
-mean_employment_rate = df_carto_cont["Taux d'emploi"].mean().round(1)
+mean_employment_rate = continents["employment_rate"].mean().round(1)
 if mean_employment_rate < 60:
     COMMENTAIRE += f"""
 
@@ -227,5 +242,7 @@ Cela montre une population majoritairement en emploi, avec toutefois des dispari
 # Affichage dans Streamlit
 st.markdown("### Synthèse automatisée")
 st.markdown(COMMENTAIRE)
+page_timer.lap("commentary")
 
+page_timer.finish()
 logger.info("Fin de l'exécution de la page Répartition géographique.")
@@ -1,26 +1,29 @@
 """Ce module génère la page de rapport sur les langages utilisés."""
 
+import io
 import os
 import streamlit as st
 import pandas as pd
 from dotenv import load_dotenv
-from loguru import logger
 
 from src.plot_utils import plot_hist, make_wordcloud, plot_bar
+from src.data_loading import dataset_version
 from src.data_preprocessing import compute_top_languages_count
+from src.descriptive_stats import load_survey_summary
+from src.figure_cache import cached_figure
+from src.logging_setup import get_page_logger
+from src.metrics import PageTimer
 
 # ==========================
 # Initialisation du logger
 # ==========================
 
-logger.add(
-    "logs/langages_utilises.log",
-    rotation="1 MB",
-    retention="10 days",
-    level="DEBUG",
-)
+logger = get_page_logger("langages_utilises")
 logger.info("Début de la page Streamlit : Langages utilisés")
 
+# Chronométrage des étapes de la page (métriques exportées, voir src/metrics.py)
+page_timer = PageTimer("langages_utilises")
+
 # ==========================
 # Chargement des variables d'environnement
 # ==========================
@@ -58,8 +61,36 @@ st.markdown(
 # Chargement et prétraitemet des données
 # ==========================
 
+# Données, nuage de mots et mesure alternative calculés une seule fois par version du fichier et
+# partagés entre les sessions (ils ne doivent pas être modifiés)
+@st.cache_resource(max_entries=2)
+def load_stack_users(path, version):
+    return pd.read_csv(path, index_col="Unnamed: 0")
+
+
+@st.cache_resource(max_entries=2)
+def load_wordcloud(path, version):
+    """Image PNG du nuage de mots et décompte des langages."""
+    import matplotlib.pyplot as plt
+
+    fig, lang_count = make_wordcloud(load_stack_users(path, version), "HaveWorkedWith")
+    # Image rendue une fois : la figure matplotlib n'est pas partagée entre les sessions
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", bbox_inches="tight")
+    plt.close(fig)
+    return buffer.getvalue(), lang_count
+
+
+@st.cache_resource(max_entries=2)
+def load_top_languages_count(path, version, top_languages_list):
+    return compute_top_languages_count(
+        load_stack_users(path, version), "HaveWorkedWith", list(top_languages_list)
+    )
+
+
 try:
-    stack_users_df = pd.read_csv(stack_users_data_path, index_col="Unnamed: 0")
+    data_version = dataset_version(stack_users_data_path)
+    stack_users_df = load_stack_users(stack_users_data_path, data_version)
     logger.success(f"Fichier chargé avec succès : {stack_users_data_path}")
 except Exception as e:
     logger.error(f"Erreur lors du chargement du fichier : {e}")
@@ -67,6 +98,17 @@ except Exception as e:
         "Impossible de charger les données. Veuillez vérifier le chemin ou le format du fichier."
     )
     st.stop()
+page_timer.lap("load")
+
+# Résumé descriptif calculé en un seul parcours des données, une fois par version du fichier
+try:
+    summary = load_survey_summary(stack_users_data_path)
+    logger.info("Résumé descriptif chargé avec succès")
+except Exception as e:
+    logger.error(f"Erreur lors du calcul du résumé descriptif : {e}")
+    st.error("Erreur lors du calcul des statistiques descriptives.")
+    st.stop()
+page_timer.lap("summary")
 
 
 # ==========================
@@ -74,11 +116,12 @@ except Exception as e:
 # ==========================
 
 # Génération nuage de mots pour vue globale
-fig_lang_cloud, lang_count = make_wordcloud(stack_users_df, "HaveWorkedWith")
+lang_cloud_png, lang_count = load_wordcloud(stack_users_data_path, data_version)
 st.markdown(
     """☁️ **Nuage de mots** : vue d'ensemble des langages mentionnés par les répondants."""
 )
-st.pyplot(fig_lang_cloud)
+st.image(lang_cloud_png)
+page_timer.lap("wordcloud")
 
 # Dataframe réduit des 20 langages les plus utilisés
 try:
@@ -99,8 +142,8 @@ try:
         columns=["Langage", "Nombre d'occurences"],
         index=range(1, 11),
     )
-    top_lang_alter = compute_top_languages_count(
-        stack_users_df, "HaveWorkedWith", top_languages["Langage"].tolist()
+    top_lang_alter = load_top_languages_count(
+        stack_users_data_path, data_version, tuple(top_languages["Langage"].tolist())
     )
     logger.info(
         "Dataframe des 10 langages mieux maîtrisés parmi les 20 plus fréquents calculé avec succès"
@@ -110,6 +153,7 @@ except Exception as e:
     logger.error(f"Erreur lors de la création du Dataframe : {e}")
     st.error("Erreur lors du traitement des données.")
     st.stop()
+page_timer.lap("preprocess")
 
 # ==========================
 # Génération des graphiques
@@ -117,16 +161,23 @@ except Exception as e:
 
 logger.info("Début de la génération des graphiques")
 
+# Graphiques mis en cache par version des données (voir src/figure_cache.py)
 # 1. Graphe Langages les plus employés
-fig_lang = plot_bar(top_languages20, "Langage", "Les 20 langages les plus employés")
+fig_lang = cached_figure(
+    plot_bar,
+    top_languages20,
+    "Langage",
+    "Les 20 langages les plus employés",
+    version=data_version,
+)
 st.plotly_chart(fig_lang)
 
 # Statistiques descriptives sur les plus fréquents
-most_used_langs = top_languages20.head(4)
-max_usage = most_used_langs.iloc[0]["Count"] / stack_users_df.shape[0] * 100
+most_used_langs = [lang for lang, _ in summary.top_languages(4)]
+max_usage = summary.language_share(most_used_langs[0]) * 100
 st.markdown(
-    f"""- 🔝 **Top 20 langages** : {', '.join(most_used_langs['Langage'])}
-    sont les plus cités. Le plus populaire ({most_used_langs.iloc[0]['Langage']}) est utilisé
+    f"""- 🔝 **Top 20 langages** : {', '.join(most_used_langs)}
+    sont les plus cités. Le plus populaire ({most_used_langs[0]}) est utilisé
     par environ {max_usage:.1f}% des répondants."""
 )
 
@@ -145,17 +196,20 @@ st.markdown(
 )
 
 # 2. Graphe Langages les plus employés parmi les top 10 langages
-fig_lang_alter = plot_hist(
+fig_lang_alter = cached_figure(
+    plot_hist,
     top_lang_alter,
     "TopLanguagesCount",
     "Distribution des compétences en informatique - mesure alternative",
     xaxis_title="Nombre de langages maîtrisés parmi les 10 les plus présents",
+    version=data_version,
 )
 st.plotly_chart(fig_lang_alter)
+page_timer.lap("plot_render")
 
 # Statistiques
-competence_mean = top_lang_alter["TopLanguagesCount"].mean()
-competence_pct = (top_lang_alter["TopLanguagesCount"] >= 1).mean() * 100
+competence_mean, competence_pct = summary.top_languages_competence(10)
+competence_pct *= 100
 st.markdown(
     f"""- 🧠 **Compétence informatique (alternative)** : en moyenne, les répondants
     maîtrisent {competence_mean:.1f} langages parmi les 10 principaux. {competence_pct:.1f}% en
@@ -168,10 +222,11 @@ st.markdown(
 
 conclusion = f"""
 Les langages de programmation sont très concentrés.
-{most_used_langs.iloc[0]['Langage']} domine avec un usage par environ {max_usage:.1f}%
+{most_used_langs[0]} domine avec un usage par environ {max_usage:.1f}%
 des répondants. Presque {competence_pct:.1f}% des participants maîtrisent au moins un des
 10 langages principaux, avec une moyenne de {competence_mean:.1f} langages par répondant.
 """
 st.markdown("**Conclusion automatisée**")
 st.markdown(conclusion)
+page_timer.finish()
 logger.info("Fin de l'exécution de la page Langages utilisés")
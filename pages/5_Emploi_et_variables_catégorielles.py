@@ -2,27 +2,27 @@
 
 import os
 import streamlit as st
-import pandas as pd
 from dotenv import load_dotenv
-from loguru import logger
 
+from src.aggregation_cube import load_employment_cube
+from src.data_loading import survey_years
+from src.figure_cache import cached_figure
+from src.logging_setup import get_page_logger
+from src.metrics import PageTimer
 from src.plot_utils import (
     plot_bar_orders,
 )
-from src.data_preprocessing import group_percentage_by, labels_translation
 
 # ==========================
 # Initialisation du logger
 # ==========================
 
-logger.add(
-    "logs/emplois_vars_cat.log",
-    rotation="1 MB",
-    retention="10 days",
-    level="DEBUG",
-)
+logger = get_page_logger("emplois_vars_cat")
 logger.info("Début de la page Streamlit : Emplois et variables catégorielles")
 
+# Chronométrage des étapes de la page (métriques exportées, voir src/metrics.py)
+page_timer = PageTimer("emplois_vars_cat")
+
 # ==========================
 # Chargement des variables d'environnement
 # ==========================
@@ -31,6 +31,11 @@ load_dotenv()
 stack_users_data_path = os.environ.get(
     "stack_users_data_path", "data/StackOverflowSurvey.csv"
 )
+# Jeu Parquet partitionné par année s'il est configuré, extrait CSV 2022 sinon
+survey_source = os.environ.get("survey_dataset_path", stack_users_data_path)
+countries_lang_data_path = os.environ.get(
+    "countries_lang_data_path", "data/CountryLanguageStats.xls"
+)
 logger.debug(f"Chemin du fichier StackOverflow récupéré : {stack_users_data_path}")
 
 # ==========================
@@ -48,6 +53,13 @@ with st.sidebar:
     st.subheader("Amina MANSEUR")
     st.subheader("Lila MEKKI")
 
+    # Année de l'enquête : la plus récente par défaut (une seule pour l'extrait CSV)
+    available_years = survey_years(survey_source)
+    survey_year = st.selectbox(
+        "Année de l'enquête", available_years, index=len(available_years) - 1
+    )
+logger.info(f"Année de l'enquête sélectionnée : {survey_year}")
+
 st.markdown(
     """
     ## Emploi et variables catégorielles
@@ -62,39 +74,33 @@ st.markdown(
 # Chargement et prétraitement des données
 # ==========================
 
+# Chargement du cube d'agrégation (construit une seule fois par version des données)
 try:
-    stack_users_df = pd.read_csv(stack_users_data_path, index_col="Unnamed: 0")
-    logger.success(f"Fichier chargé avec succès : {stack_users_data_path}")
+    employment_cube = load_employment_cube(
+        survey_source, countries_lang_data_path, years=[survey_year]
+    )
+    logger.success("Cube d'agrégation de l'emploi chargé avec succès.")
 except Exception as e:
     logger.error(f"Erreur lors du chargement du fichier : {e}")
     st.error(
         "Impossible de charger les données. Veuillez vérifier le chemin ou le format du fichier."
     )
     st.stop()
-
-# Traduction des labels
-try:
-    stack_users_df_fr = labels_translation(stack_users_df)
-    logger.info("Traduction des labels effectuée avec succès")
-except Exception as e:
-    logger.error(f"Erreur lors de la traduction des labels : {e}")
-    st.error("Erreur lors du traitement des données.")
-    st.stop()
+page_timer.lap("load")
 
 
 # Calcul des pourcentages pour les différentes colonnes
 try:
-    age_df = group_percentage_by(stack_users_df_fr, ["Age", "EmployedCat"])
-    gender_df = group_percentage_by(stack_users_df_fr, ["Gender", "EmployedCat"])
-    edLevel_df = group_percentage_by(stack_users_df_fr, ["EdLevel", "EmployedCat"])
-    workbranch_df = group_percentage_by(
-        stack_users_df_fr, ["MainBranch", "EmployedCat"]
-    )
+    age_df = employment_cube.group_percentage("Age")
+    gender_df = employment_cube.group_percentage("Gender")
+    edLevel_df = employment_cube.group_percentage("EdLevel")
+    workbranch_df = employment_cube.group_percentage("MainBranch")
     logger.info("Génération des données agrégées effectuée avec succès")
 except Exception as e:
     logger.error(f"Erreur lors de l'agrégation' : {e}")
     st.error("Erreur lors du traitement des données.")
     st.stop()
+page_timer.lap("preprocess")
 
 # ==========================
 # Génération des graphiques
@@ -103,27 +109,32 @@ except Exception as e:
 logger.info("Début de la génération des graphiques")
 
 # 1. Graphe Age
-fig_age = plot_bar_orders(
+fig_age = cached_figure(
+    plot_bar_orders,
     age_df,
     "Age",
     "EmployedCat",
     "Distribution du statut d'emploi selon l'âge",
     {"Age": ["Moins de 35 ans", "Plus de 35 ans"]},
     x_col="percentage",
+    version=employment_cube.version,
 )
 
 # 2. Graphe Genre
-fig_gender = plot_bar_orders(
+fig_gender = cached_figure(
+    plot_bar_orders,
     gender_df,
     "Gender",
     "EmployedCat",
     "Distribution du statut d'emploi selon le genre",
     {"Gender": ["Homme", "Femme", "Non-Binaire"]},
     x_col="percentage",
+    version=employment_cube.version,
 )
 
 # 3. Graphe Niveau d'éducation
-fig_edLevel = plot_bar_orders(
+fig_edLevel = cached_figure(
+    plot_bar_orders,
     edLevel_df,
     "EdLevel",
     "EmployedCat",
@@ -138,17 +149,21 @@ fig_edLevel = plot_bar_orders(
         ]
     },
     x_col="percentage",
+    version=employment_cube.version,
 )
 
 # 4. Graphe Branche pro
-fig_workbranch = plot_bar_orders(
+fig_workbranch = cached_figure(
+    plot_bar_orders,
     workbranch_df,
     "MainBranch",
     "EmployedCat",
     "Distribution du statut d'emploi selon la branche professionnelle",
     {"MainBranch": ["Développement", "Autre"]},
     x_col="percentage",
+    version=employment_cube.version,
 )
+page_timer.lap("plot")
 
 # ==========================
 # Choix du graphe à afficher sur Streamlit
@@ -166,6 +181,7 @@ with tab_ed:
     st.plotly_chart(fig_edLevel)
 with tab_branch:
     st.plotly_chart(fig_workbranch)
+page_timer.lap("render")
 
 # ==========================
 # Création et affichage des commentaires automatisés des graphiques
@@ -201,4 +217,5 @@ st.markdown(
     """
 )
 
+page_timer.finish()
 logger.info("Fin de l'exécution de la page Emplois et variables catégorielles")
@@ -5,23 +5,32 @@ import os
 import streamlit as st
 import pandas as pd
 from dotenv import load_dotenv
-from loguru import logger
 
 from src.data_preprocessing import (
+    EMPLOYMENT_LABELS,
     compute_top_languages_count,
     categorize_employment_status,
 )
-from src.plot_utils import plot_box, make_wordcloud
+from src.data_loading import dataset_version
+from src.figure_cache import cached_figure
+from src.plot_utils import (
+    LazyFigure,
+    plot_box,
+    plot_box_from_stats,
+    make_wordcloud,
+    prefetch_figures,
+)
+from src.quantile_sketch import load_quantile_sketches
+from src.logging_setup import get_page_logger
+from src.metrics import PageTimer
 
 # Initialisation du logger
-logger.add(
-    "logs/emplois_vars_num.log",
-    rotation="1 MB",
-    retention="10 days",
-    level="DEBUG",
-)
+logger = get_page_logger("emplois_vars_num")
 logger.info("Début de la page Streamlit : Emplois et variables numériques")
 
+# Chronométrage des étapes de la page (métriques exportées, voir src/metrics.py)
+page_timer = PageTimer("emplois_vars_num")
+
 # Chargement des variables d'environnement
 load_dotenv()
 stack_users_data_path = os.environ.get(
@@ -49,12 +58,26 @@ st.markdown(
     """
 )
 
+
+
+# Données chargées une seule fois par processus : les statistiques des box plots, calculées par
+# DataFrame, sont ainsi réutilisées d'une exécution à l'autre
+@st.cache_resource
+def load_stack_users(path):
+    stack_users_df = pd.read_csv(path, index_col="Unnamed: 0")
+    return categorize_employment_status(stack_users_df)  # pour binariser les colonnes d'emploi
+
+
+@st.cache_resource
+def load_top_languages_count(path, top_languages_list):
+    return compute_top_languages_count(
+        load_stack_users(path), "HaveWorkedWith", list(top_languages_list)
+    )
+
+
 # Chargement des données depuis le répertoire sspcloud
 try:
-    stack_users_df = pd.read_csv(stack_users_data_path, index_col="Unnamed: 0")
-    stack_users_df = categorize_employment_status(
-        stack_users_df
-    )  # pour binariser les colonnes d'emploi
+    stack_users_df = load_stack_users(stack_users_data_path)
     logger.success(f"Fichier chargé avec succès : {stack_users_data_path}")
 except Exception as e:
     logger.error(f"Erreur lors du chargement du fichier : {e}")
@@ -62,6 +85,18 @@ except Exception as e:
         "Impossible de charger les données. Veuillez vérifier le chemin ou le format du fichier."
     )
     st.stop()
+page_timer.lap("load")
+
+# Sketches des quantiles des variables numériques, par statut d'emploi (construits par morceaux,
+# une seule fois par version des données)
+try:
+    quantile_sketches = load_quantile_sketches(stack_users_data_path)
+    logger.success("Sketches des quantiles chargés avec succès")
+except Exception as e:
+    logger.error(f"Erreur lors du calcul des sketches des quantiles : {e}")
+    st.error("Erreur lors du traitement des données.")
+    st.stop()
+page_timer.lap("sketches")
 
 # Dataframe réduit des 10 langages les plus maîtrisés parmi les 20 plus utilisés
 try:
@@ -70,8 +105,8 @@ try:
         lang_count.most_common(10), columns=["Langage", "Nombre d'occurences"], index=range(1, 11)
     )
     print(top_languages)
-    top_lang_alter = compute_top_languages_count(
-        stack_users_df, "HaveWorkedWith", top_languages["Langage"].tolist()
+    top_lang_alter = load_top_languages_count(
+        stack_users_data_path, tuple(top_languages["Langage"].tolist())
     )
     logger.info(
         "Dataframe des 10 langages mieux maîtrisés parmi les 20 plus fréquents calculé avec succès"
@@ -80,96 +115,129 @@ except Exception as e:
     logger.error(f"Erreur lors de la création du Dataframe : {e}")
     st.error("Erreur lors du traitement des données.")
     st.stop()
+page_timer.lap("preprocess")
 
 
-# Génération des graphiques
-logger.info("Début de la génération des box plots")
+# Préparation des graphiques : mis en cache par version des données, ils ne sont construits
+# qu'à l'affichage de l'onglet correspondant. Les quatre variables de l'enquête sont résumées par
+# les sketches (quartiles approchés) ; la mesure alternative, calculée sur la page, est exacte.
+logger.info("Préparation des box plots")
+figures_version = dataset_version(stack_users_data_path)
 
-# 1. Années de code vs. statut d'emploi
-fig_code = plot_box(
-    data=stack_users_df,
-    x_col="EmployedCat",
-    y_col="YearsCode",
-    color_col="EmployedCat",
-    title="Distribution des années de code selon le statut d'emploi",
-    xaxis_title="Statut d'emploi",
-    yaxis_title="Années de code"
-)
 
-# 2. Années de code pro vs. statut d'emploi
-fig_codepro = plot_box(
-    data=stack_users_df,
-    x_col="EmployedCat",
-    y_col="YearsCodePro",
-    color_col="EmployedCat",
-    title="Distribution des années de code professionnel selon le statut d'emploi",
-    xaxis_title="Statut d'emploi",
-    yaxis_title="Années de code professionnel",
-)
+# Figures paresseuses conservées d'une exécution à l'autre et partagées entre les sessions : une
+# figure déjà construite n'est ni reconstruite ni relue du cache des figures, et la préparation
+# en arrière-plan n'a plus rien à faire une fois tous les onglets construits
+@st.cache_resource(max_entries=4)
+def numeric_figures(_quantile_sketches, _top_lang_alter, version):
+    def sketch_box(col, title, yaxis_title):
+        # Statistiques des boîtes calculées à la construction de la figure, et non pour tous
+        # les onglets à la préparation des figures
+        def build():
+            return cached_figure(
+                plot_box_from_stats,
+                stats=_quantile_sketches.box_statistics(col, "EmployedCat"),
+                x_col="EmployedCat",
+                color_col="EmployedCat",
+                title=title,
+                xaxis_title="Statut d'emploi",
+                yaxis_title=yaxis_title,
+                version=version,
+            )
 
-# 3. Salaire précédent vs. statut d'emploi
-fig_salaire = plot_box(
-    data=stack_users_df,
-    x_col="EmployedCat",
-    y_col="PreviousSalary",
-    color_col="EmployedCat",
-    title="Distribution du salaire précédent selon le statut d'emploi",
-    xaxis_title="Statut d'emploi",
-    yaxis_title="Salaire précédent",
-)
-
-# 4. Compétences en informatique vs. statut d'emploi
-fig_comp_info = plot_box(
-    data=stack_users_df,
-    x_col="EmployedCat",
-    y_col="ComputerSkills",
-    color_col="EmployedCat",
-    title=(
-        "Distribution des compétences en informatique "
-        "(nombre de langages maîtrisés) selon le statut d'emploi"
-    ),
-    xaxis_title="Statut d'emploi",
-    yaxis_title="Nombre de langages maîtrisés",
-)
-
-# 5. Compétences en informatique - mesure alternative vs. statut d'emploi
-fig_comp_info_alter = plot_box(
-    data=top_lang_alter,
-    x_col="EmployedCat",
-    y_col="TopLanguagesCount",
-    color_col="EmployedCat",
-    title=(
-        "Distribution des compétences en informatique"
-        "(mesure alternative) selon le statut d'emploi"
-    ),
-    xaxis_title="Statut d'emploi",
-    yaxis_title="Nombre de langages maîtrisés parmi les 10 langages les plus présents",
-)
+        return LazyFigure(build)
 
-# Choix du graphe
-tab_code, tab_codepro, tab_salaire, tab_info, tab_info2 = st.tabs(
-    [
+    # 1. Années de code vs. statut d'emploi
+    fig_code = sketch_box(
+        "YearsCode",
+        "Distribution des années de code selon le statut d'emploi",
         "Années de code",
+    )
+
+    # 2. Années de code pro vs. statut d'emploi
+    fig_codepro = sketch_box(
+        "YearsCodePro",
+        "Distribution des années de code professionnel selon le statut d'emploi",
         "Années de code professionnel",
+    )
+
+    # 3. Salaire précédent vs. statut d'emploi
+    fig_salaire = sketch_box(
+        "PreviousSalary",
+        "Distribution du salaire précédent selon le statut d'emploi",
         "Salaire précédent",
-        "Compétences en informatique",
-        "Compétences en informatique - mesure alternative",
-    ]
+    )
+
+    # 4. Compétences en informatique vs. statut d'emploi
+    fig_comp_info = sketch_box(
+        "ComputerSkills",
+        (
+            "Distribution des compétences en informatique "
+            "(nombre de langages maîtrisés) selon le statut d'emploi"
+        ),
+        "Nombre de langages maîtrisés",
+    )
+
+    # 5. Compétences en informatique - mesure alternative vs. statut d'emploi
+    fig_comp_info_alter = LazyFigure(
+        cached_figure,
+        plot_box,
+        data=_top_lang_alter,
+        x_col="EmployedCat",
+        y_col="TopLanguagesCount",
+        color_col="EmployedCat",
+        title=(
+            "Distribution des compétences en informatique"
+            "(mesure alternative) selon le statut d'emploi"
+        ),
+        xaxis_title="Statut d'emploi",
+        yaxis_title="Nombre de langages maîtrisés parmi les 10 langages les plus présents",
+        version=version,
+    )
+
+    return {
+        "Années de code": fig_code,
+        "Années de code professionnel": fig_codepro,
+        "Salaire précédent": fig_salaire,
+        "Compétences en informatique": fig_comp_info,
+        "Compétences en informatique - mesure alternative": fig_comp_info_alter,
+    }
+
+
+figures = numeric_figures(quantile_sketches, top_lang_alter, figures_version)
+
+# Choix du graphe
+selected_tab = st.radio(
+    "Graphique",
+    list(figures),
+    horizontal=True,
+    key="numeric_tab_radio",
+    label_visibility="collapsed",
 )
 
-with tab_code:
-    st.plotly_chart(fig_code)
-with tab_codepro:
-    st.plotly_chart(fig_codepro)
-with tab_salaire:
-    st.plotly_chart(fig_salaire)
-with tab_info:
-    st.plotly_chart(fig_comp_info)
-with tab_info2:
-    st.plotly_chart(fig_comp_info_alter)
+try:
+    fig = figures[selected_tab].get()
+    page_timer.lap("plot")
+    st.plotly_chart(fig)
+    page_timer.lap("render")
+    logger.success(f"Box plot affiché avec succès : {selected_tab}")
+except Exception as e:
+    logger.error(f"Erreur lors de la génération du box plot {selected_tab} : {e}")
+    st.error("Erreur lors de la génération du graphique.")
+    st.stop()
+
+# Préparation des autres onglets en arrière-plan
+prefetch_figures(figures.values())
+
+# Quartiles des compétences en informatique selon le statut d'emploi
+skills_quartiles = quantile_sketches.quantiles("ComputerSkills", "EmployedCat").set_index(
+    "EmployedCat"
+)
+skills_q3_unemployed = skills_quartiles.loc[EMPLOYMENT_LABELS[0], 0.75]
+skills_q1_employed = skills_quartiles.loc[EMPLOYMENT_LABELS[1], 0.25]
 
 st.markdown(
-    """
+    f"""
     Le nombre d'années de codage, dans le cadre professionnel ou non,
     et le salaire précédent semblent peu varier selon le statut d'emploi.
     Ces variables semblent donc peu pertinentes pour expliquer
@@ -178,13 +246,14 @@ st.markdown(
     (qu'elles soient mesurées par le nombre total de langages
     maîtrisés ou parmi les 10 langages les plus fréquents) semblent
     plus importantes chez les répondants en emploi. Ainsi, les 3 quarts
-    des répondants sans emploi maîtrisent moins de 12 langages, alors que
-    les 3 quarts des répondants en emploi maîtrisent plus de 13 langages.
-    Ce résultat est néanmoins à relier avec la branche professionnelle
+    des répondants sans emploi maîtrisent moins de {skills_q3_unemployed:.0f} langages, alors
+    que les 3 quarts des répondants en emploi maîtrisent plus de {skills_q1_employed:.0f}
+    langages. Ce résultat est néanmoins à relier avec la branche professionnelle
     principale : ainsi, les répondants ne travaillant pas dans le développement,
     même s'ils sont peu dans la base, maîtrisent moins de langages, et sont
     aussi significativement moins employés.
     """
 )
 
+page_timer.finish()
 logger.info("Fin de l'exécution de la page Emplois et variables numériques")
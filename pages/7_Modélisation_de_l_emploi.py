@@ -3,21 +3,20 @@ Ce module génère la page Modélisation de l'emploi de l'application de visuali
 """
 
 import streamlit as st
-from loguru import logger
 from src.models_visualisation_utils import (
     get_data_log_regression,
     get_model_performance,
 )
+from src.logging_setup import get_page_logger
+from src.metrics import PageTimer
 
 # Initialisation du logger
-logger.add(
-    "logs/modelisation_emploi.log",
-    rotation="1 MB",
-    retention="10 days",
-    level="DEBUG",
-)
+logger = get_page_logger("modelisation_emploi")
 logger.info("Début de la page Streamlit : Modélisation de l'emploi")
 
+# Chronométrage des étapes de la page (métriques exportées, voir src/metrics.py)
+page_timer = PageTimer("modelisation_emploi")
+
 # Configuration de la page
 st.set_page_config(
     page_title="Modélisation de l'emploi",
@@ -60,12 +59,14 @@ logger.debug(f"Variables sélectionnées : {list_col}")
 
 # Obtenir les données et les résultats de la régression logistique
 result_df, score, X, delta_prob = get_data_log_regression(parameters=list_col)
+page_timer.lap("logistic_regression")
 
 # Log de la performance du modèle
 logger.info(f"Modèle de régression logistique : R2 = {round(score * 100, 2)}%")
 
 tab_logistic_regression.subheader(f"Le R2 du modèle est : {round(score * 100, 2)}%")
 tab_logistic_regression.table(result_df)
+page_timer.lap("render")
 
 # ==========================
 # Models performance
@@ -85,5 +86,7 @@ tab_models_performance.subheader("Gradient Boosting performance")
 result_df_exp4 = get_model_performance("Gradient Boosting")
 logger.info("Affichage des résultats de performance pour le modèle Gradient Boosting.")
 tab_models_performance.table(result_df_exp4)
+page_timer.lap("models_performance")
 
+page_timer.finish()
 logger.info("Fin de l'exécution de la page Modélisation de l'emploi")
@@ -2,22 +2,27 @@
 Ce module génère la page Etude de l'équité de l'application de visualisation Streamlit.
 """
 
+import threading
+
 import streamlit as st
-from loguru import logger
 from src.models_visualisation_utils import (
     get_fairness_check,
     get_fairness_check_after_mitigation,
+    get_fairness_check_after_threshold_adjustment,
+    get_fairness_confidence_intervals,
+    models_version,
 )
+from src.plot_utils import LazyFigure, plot_fairness_intervals, prefetch_figures
+from src.logging_setup import get_page_logger
+from src.metrics import PageTimer
 
 # Initialisation du logger
-logger.add(
-    "logs/etude_equite.log",
-    rotation="1 MB",
-    retention="10 days",
-    level="DEBUG",
-)
+logger = get_page_logger("etude_equite")
 logger.info("Début de la page Streamlit : Etude de l'équité")
 
+# Chronométrage des étapes de la page (métriques exportées, voir src/metrics.py)
+page_timer = PageTimer("etude_equite")
+
 # Configuration de la page
 st.set_page_config(
     page_title="Etude de l'équité",
@@ -36,6 +41,57 @@ st.markdown(
     """
 )
 
+# Graphiques dalex disponibles pour un test d'équité
+FAIRNESS_PLOTS = {
+    "Fairness Check": "fairness_check",
+    "Metric Scores": "metric_scores",
+    "Cumulated parity loss": "stacked",
+    "Radar": "radar",
+    "Performance And Fairness": "performance_and_fairness",
+    "Heatmap": "heatmap",
+}
+
+
+@st.cache_resource(max_entries=16)
+def fairness_figures(_get_fairness_check, check_name, version, *args):
+    """
+    Graphiques d'un test d'équité, construits à la première demande puis conservés.
+
+    `version` (empreintes des fichiers des modèles) renouvelle le cache quand un modèle est
+    remplacé.
+
+    Les objets dalex n'étant pas prévus pour être utilisés par plusieurs threads, les
+    graphiques d'un même test sont construits l'un après l'autre.
+    """
+    plot = _get_fairness_check(*args)
+    lock = threading.Lock()
+
+    def build(plot_type):
+        with lock:
+            return plot(plot_type)
+
+    return {label: LazyFigure(build, plot_type) for label, plot_type in FAIRNESS_PLOTS.items()}
+
+
+def show_fairness_figures(container, figures, key):
+    """
+    Affiche le graphique choisi, puis prépare les autres en arrière-plan.
+    """
+    selected = container.radio(
+        "Graphique", list(figures), horizontal=True, key=key, label_visibility="collapsed"
+    )
+    container.plotly_chart(figures[selected].get(), theme=None, use_container_width=True)
+    prefetch_figures(figures.values())
+
+
+# Vérification des modèles (manifeste) et version des caches des graphiques
+try:
+    version = models_version()
+except Exception as e:
+    logger.error(f"Erreur lors de la vérification des modèles : {e}")
+    st.error("Les fichiers des modèles ne correspondent pas au manifeste des modèles.")
+    st.stop()
+
 (tab_fairness_test, tab_bias_mitigation) = st.tabs(
     ["Test d'équité selon le genre", "Modèles intégrant une mitigation des biais"]
 )
@@ -102,41 +158,39 @@ criteria_selector_3 = tab_fairness_test.selectbox(
 # Log de la catégorie sélectionnée
 logger.info(f"Sélection de la catégorie 'privileged' : {criteria_selector_3}")
 
-# Obtenir les résultats de l'équité
-plot = get_fairness_check("Gender", criteria_selector_3)
-
-(
-    t5_fairness_check,
-    t5_metric_scores,
-    t5_stacked,
-    t5_radar,
-    t5_performance_and_fairness,
-    t5_heatmap,
-) = tab_fairness_test.tabs(
-    [
-        "Fairness Check",
-        "Metric Scores",
-        "Cumulated parity loss",
-        "Radar",
-        "Performance And Fairness",
-        "Heatmap",
-    ]
-)
-
-# Affichage des graphiques
+# Obtenir les résultats de l'équité et afficher les graphiques
 logger.info("Affichage des graphiques d'équité.")
-t5_fairness_check.plotly_chart(
-    plot("fairness_check"), theme=None, use_container_width=True
+show_fairness_figures(
+    tab_fairness_test,
+    fairness_figures(
+        get_fairness_check, "baseline", version, "Gender", criteria_selector_3
+    ),
+    key="bias5_plot_radio",
 )
-t5_metric_scores.plotly_chart(
-    plot("metric_scores"), theme=None, use_container_width=True
+page_timer.lap("fairness_check")
+
+# Intervalles de confiance bootstrap des ratios d'équité
+tab_fairness_test.markdown(
+    """
+    #### Incertitude sur les ratios d'équité
+
+    Les femmes et les personnes non-binaires étant peu nombreuses dans la base, les ratios
+    ci-dessus sont estimés avec une précision limitée. Les intervalles de confiance à 95%
+    ci-dessous sont obtenus par bootstrap (2000 ré-échantillons). Un ratio dont l'intervalle
+    déborde de la zone verte [0.8 ; 1.25] ne permet pas de conclure avec certitude.
+    """
 )
-t5_stacked.plotly_chart(plot("stacked"), theme=None, use_container_width=True)
-t5_radar.plotly_chart(plot("radar"), theme=None, use_container_width=True)
-t5_performance_and_fairness.plotly_chart(
-    plot("performance_and_fairness"), theme=None, use_container_width=True
+fairness_ci_df = get_fairness_confidence_intervals("Gender", criteria_selector_3)
+logger.info("Calcul des intervalles de confiance bootstrap des ratios d'équité.")
+tab_fairness_test.plotly_chart(
+    plot_fairness_intervals(
+        fairness_ci_df, "Ratios d'équité et intervalles de confiance à 95%"
+    ),
+    theme=None,
+    use_container_width=True,
 )
-t5_heatmap.plotly_chart(plot("heatmap"), theme=None, use_container_width=True)
+tab_fairness_test.dataframe(fairness_ci_df.round(3), hide_index=True)
+page_timer.lap("confidence_intervals")
 
 # ==========================
 # Bias mitigation
@@ -175,9 +229,22 @@ tab_bias_mitigation.markdown(
     attribués aux différents échantillons de l'ensemble de données d'entraînement, accordant
     davantage d'importance aux groupes sous-représentés. Cela contribue à réduire les biais en
     veillant à ce que le modèle accorde plus d'attention à ces groupes pendant l'entraînement.
+
+    On propose également une mitigation après le traitement, sans ré-entraînement : l'ajustement
+    des seuils de décision par groupe. À partir des probabilités prédites par le modèle baseline,
+    on choisit pour chaque genre le seuil qui aligne son taux de vrais positifs (égalité des
+    chances) ou son taux de positifs (parité statistique) sur celui du groupe privilégié.
     """
 )
 
+# Sélection de la méthode de mitigation
+mitigation_selector = tab_bias_mitigation.radio(
+    "Quelle méthode de mitigation appliquer ?",
+    ["Ré-échantillonnage et repondération", "Ajustement des seuils de décision"],
+    key="bias6_method_radio",
+)
+logger.info(f"Sélection de la méthode de mitigation : {mitigation_selector}")
+
 # Sélection du modèle à traiter
 model_selector = tab_bias_mitigation.selectbox(
     "Quel modèle devrait avoir ses biais mitigés ?",
@@ -201,41 +268,40 @@ logger.info(
 )
 
 # Obtenir les résultats de l'équité après mitigation
-plot = get_fairness_check_after_mitigation(
-    "Gender", criteria_selector_4, model_selector
-)
-
-(
-    t6_fairness_check,
-    t6_metric_scores,
-    t6_stacked,
-    t6_radar,
-    t6_performance_and_fairness,
-    t6_heatmap,
-) = tab_bias_mitigation.tabs(
-    [
-        "Fairness Check",
-        "Metric Scores",
-        "Cumulated parity loss",
-        "Radar",
-        "Performance And Fairness",
-        "Heatmap",
-    ]
-)
+if mitigation_selector == "Ajustement des seuils de décision":
+    threshold_criteria = {
+        "Égalité des chances": "equal_opportunity",
+        "Parité statistique": "demographic_parity",
+    }
+    criterion_selector = tab_bias_mitigation.selectbox(
+        "Quel critère d'équité viser lors de l'ajustement des seuils ?",
+        list(threshold_criteria),
+        key="bias6_criterion_selectbox",
+    )
+    logger.info(f"Sélection du critère d'ajustement des seuils : {criterion_selector}")
+    figures = fairness_figures(
+        get_fairness_check_after_threshold_adjustment,
+        "threshold_adjustment",
+        version,
+        "Gender",
+        criteria_selector_4,
+        model_selector,
+        threshold_criteria[criterion_selector],
+    )
+else:
+    figures = fairness_figures(
+        get_fairness_check_after_mitigation,
+        "mitigation",
+        version,
+        "Gender",
+        criteria_selector_4,
+        model_selector,
+    )
 
 # Affichage des graphiques après mitigation des biais
 logger.info("Affichage des graphiques après mitigation des biais.")
-t6_fairness_check.plotly_chart(
-    plot("fairness_check"), theme=None, use_container_width=True
-)
-t6_metric_scores.plotly_chart(
-    plot("metric_scores"), theme=None, use_container_width=True
-)
-t6_stacked.plotly_chart(plot("stacked"), theme=None, use_container_width=True)
-t6_radar.plotly_chart(plot("radar"), theme=None, use_container_width=True)
-t6_performance_and_fairness.plotly_chart(
-    plot("performance_and_fairness"), theme=None, use_container_width=True
-)
-t6_heatmap.plotly_chart(plot("heatmap"), theme=None, use_container_width=True)
+show_fairness_figures(tab_bias_mitigation, figures, key="bias6_plot_radio")
+page_timer.lap("bias_mitigation")
 
+page_timer.finish()
 logger.info("Fin de l'exécution de la page Etude de l'équité")
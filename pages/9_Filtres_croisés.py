@@ -0,0 +1,174 @@
+"""Ce module génère la page de filtres croisés sur le taux d'emploi."""
+
+import os
+import time
+import streamlit as st
+from dotenv import load_dotenv
+
+from src.bitmap_index import LANGUAGES_DIM, load_bitmap_index
+from src.data_loading import survey_years
+from src.plot_utils import plot_bar_orders
+from src.logging_setup import get_page_logger
+from src.metrics import PageTimer
+
+# ==========================
+# Initialisation du logger
+# ==========================
+
+logger = get_page_logger("filtres_croises")
+logger.info("Début de la page Streamlit : Filtres croisés")
+
+# Chronométrage des étapes de la page (métriques exportées, voir src/metrics.py)
+page_timer = PageTimer("filtres_croises")
+
+# ==========================
+# Chargement des variables d'environnement
+# ==========================
+
+load_dotenv()
+stack_users_data_path = os.environ.get(
+    "stack_users_data_path", "data/StackOverflowSurvey.csv"
+)
+# Jeu Parquet partitionné par année s'il est configuré, extrait CSV 2022 sinon
+survey_source = os.environ.get("survey_dataset_path", stack_users_data_path)
+countries_lang_data_path = os.environ.get(
+    "countries_lang_data_path", "data/CountryLanguageStats.xls"
+)
+logger.debug(f"Chemin du fichier StackOverflow récupéré : {stack_users_data_path}")
+
+# Nombre de langages proposés dans les filtres
+N_TOP_LANGUAGES = 20
+
+# Dimensions proposées dans les filtres, avec leur libellé
+FILTER_DIMS = {
+    "Age": "Âge",
+    "Gender": "Genre",
+    "EdLevel": "Niveau d'éducation",
+    "MainBranch": "Branche professionnelle",
+    "Continent": "Continent",
+    LANGUAGES_DIM: "Langages maîtrisés",
+}
+
+# ==========================
+# Configuration de la page Streamlit
+# ==========================
+
+st.set_page_config(
+    page_title="Filtres croisés", page_icon=":chart_with_upwards_trend:"
+)
+
+with st.sidebar:
+    st.title("Projet Mise en production pour la data-science")
+    st.subheader("Louise LIGONNIERE")
+    st.subheader("Amina MANSEUR")
+    st.subheader("Lila MEKKI")
+
+    # Année de l'enquête : la plus récente par défaut (une seule pour l'extrait CSV)
+    available_years = survey_years(survey_source)
+    survey_year = st.selectbox(
+        "Année de l'enquête", available_years, index=len(available_years) - 1
+    )
+logger.info(f"Année de l'enquête sélectionnée : {survey_year}")
+
+st.markdown(
+    """
+    ## Taux d'emploi par filtres croisés
+
+    Sélectionnez une ou plusieurs modalités pour chaque variable : le taux d'emploi est calculé
+    sur les répondants qui vérifient tous les filtres. Au sein d'une variable, une modalité
+    suffit (« Licence ou Master ») ; pour les langages, les répondants doivent maîtriser tous
+    les langages sélectionnés.
+    """
+)
+
+# ==========================
+# Chargement de l'index bitmap
+# ==========================
+
+# Index construit une seule fois par version des données
+try:
+    bitmap_index = load_bitmap_index(
+        survey_source, countries_lang_data_path, years=[survey_year]
+    )
+    logger.success("Index bitmap chargé avec succès.")
+except Exception as e:
+    logger.error(f"Erreur lors du chargement des données : {e}")
+    st.error(
+        "Impossible de charger les données. Veuillez vérifier le chemin ou le format du fichier."
+    )
+    st.stop()
+page_timer.lap("load")
+
+# ==========================
+# Choix des filtres
+# ==========================
+
+filters = {}
+filter_cols = st.columns(2)
+for i, (dim, label) in enumerate(FILTER_DIMS.items()):
+    if dim == LANGUAGES_DIM:
+        options = bitmap_index.top_values(dim, N_TOP_LANGUAGES)
+    else:
+        options = bitmap_index.values(dim)
+    filters[dim] = filter_cols[i % 2].multiselect(label, options, key=f"cross_filter_{dim}")
+
+breakdown_dim = st.selectbox(
+    "Ventiler le taux d'emploi selon",
+    [dim for dim in FILTER_DIMS if dim != LANGUAGES_DIM],
+    format_func=FILTER_DIMS.get,
+    key="cross_filter_breakdown",
+)
+
+# ==========================
+# Calcul des taux d'emploi
+# ==========================
+
+try:
+    start = time.perf_counter()
+    n_selected, employment_rate = bitmap_index.employment_rate(filters)
+    breakdown_df = bitmap_index.employment_rate_by(breakdown_dim, filters)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    logger.info(f"Filtres croisés calculés en {elapsed_ms:.2f} ms : {filters}")
+except Exception as e:
+    logger.error(f"Erreur lors du calcul des filtres croisés : {e}")
+    st.error("Erreur lors du traitement des données.")
+    st.stop()
+page_timer.lap("filter")
+
+# ==========================
+# Affichage des résultats
+# ==========================
+
+_, overall_rate = bitmap_index.employment_rate()
+
+col_n, col_rate, col_gap = st.columns(3)
+col_n.metric("Répondants sélectionnés", f"{n_selected:,}".replace(",", " "))
+if n_selected:
+    col_rate.metric("Taux d'emploi", f"{100 * employment_rate:.1f}%")
+    col_gap.metric(
+        "Écart à l'ensemble",
+        f"{100 * (employment_rate - overall_rate):+.1f} pts",
+    )
+else:
+    st.warning("Aucun répondant ne vérifie l'ensemble des filtres sélectionnés.")
+    st.stop()
+
+label = FILTER_DIMS[breakdown_dim]
+breakdown_df = breakdown_df.assign(mean=(100 * breakdown_df["mean"]).round(1)).rename(
+    columns={breakdown_dim: label, "count": "Nombre de répondants", "mean": "Taux d'emploi"}
+)
+fig_breakdown = plot_bar_orders(
+    breakdown_df,
+    label,
+    label,
+    f"Taux d'emploi selon : {label.lower()}",
+    {label: breakdown_df[label].tolist()},
+    x_col="Taux d'emploi",
+)
+st.plotly_chart(fig_breakdown)
+st.dataframe(breakdown_df, hide_index=True)
+st.caption(f"Résultats calculés en {elapsed_ms:.1f} ms.")
+page_timer.lap("render")
+
+page_timer.finish()
+logger.info("Fin de l'exécution de la page Filtres croisés")
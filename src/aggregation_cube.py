@@ -0,0 +1,302 @@
+"""
+Ce module définit un cube d'agrégation de l'emploi, calculé une seule fois par version du jeu de
+données.
+
+Le cube stocke, pour chaque combinaison observée des dimensions `Age`, `Gender`, `EdLevel`,
+`MainBranch`, `Country` et `Continent`, le nombre de répondants et le nombre de répondants en
+emploi. Les dimensions sont stockées sous forme catégorielle (codes entiers) et les effectifs en
+entiers 32 bits. Tous les tableaux des pages descriptives (taux d'emploi global, répartition
+géographique, emploi selon les variables catégorielles) s'obtiennent ensuite en sommant des
+cellules du cube, sans reparcourir les lignes du jeu de données.
+"""
+
+from functools import lru_cache
+
+import pandas as pd
+
+from src.chunked_aggregation import DEFAULT_CHUNKSIZE, PartialCounts
+from src.data_loading import dataset_version, iter_survey_batches
+from src.data_preprocessing import EMPLOYMENT_LABELS, add_continent_info, labels_translation
+from src.metrics import timed_function
+
+CUBE_DIMS = ["Age", "Gender", "EdLevel", "MainBranch", "Country", "Continent"]
+
+
+class EmploymentCube:
+    """
+    Cube des effectifs de répondants et de répondants en emploi.
+
+    Parameters
+    ----------
+    cells : pandas.DataFrame
+        Une ligne par combinaison observée des dimensions, avec les colonnes 'count' et
+        'employed'.
+    dims : list of str
+        Dimensions du cube.
+    dtypes : dict
+        Types d'origine des dimensions, restaurés dans les tableaux renvoyés.
+    version : str, optional
+        Version des données à partir desquelles le cube a été construit.
+    """
+
+    def __init__(self, cells, dims, dtypes, version=None):
+        self.cells = cells
+        self.dims = list(dims)
+        self.dtypes = dtypes
+        self.version = version
+        self._marginals = {}
+
+    @classmethod
+    def from_counts(cls, counts_df, dims=CUBE_DIMS, count_col="count", employed_col="employed"):
+        """
+        Construit le cube à partir d'effectifs déjà agrégés (par exemple par morceaux).
+
+        Parameters
+        ----------
+        counts_df : pandas.DataFrame
+            Une ligne par groupe, avec les dimensions, l'effectif et l'effectif en emploi.
+        dims : list of str, optional
+            Dimensions du cube (par défaut `CUBE_DIMS`).
+        count_col : str, optional
+            Colonne des effectifs.
+        employed_col : str, optional
+            Colonne des effectifs en emploi.
+
+        Returns
+        -------
+        EmploymentCube
+            Le cube d'agrégation.
+        """
+        dims = list(dims)
+        frame = counts_df[dims].astype("category")
+        frame["count"] = counts_df[count_col]
+        frame["employed"] = counts_df[employed_col]
+
+        cells = (
+            frame.groupby(dims, observed=True, dropna=False)[["count", "employed"]]
+            .sum()
+            .reset_index()
+            .astype({"count": "int32", "employed": "int32"})
+        )
+
+        return cls(cells, dims, counts_df[dims].dtypes.to_dict())
+
+    @classmethod
+    def from_frame(cls, df, dims=CUBE_DIMS, target_col="Employed"):
+        """
+        Construit le cube à partir du DataFrame des répondants.
+
+        Parameters
+        ----------
+        df : pandas.DataFrame
+            Données des répondants, contenant les dimensions et la colonne cible binaire.
+        dims : list of str, optional
+            Dimensions du cube (par défaut `CUBE_DIMS`).
+        target_col : str, optional
+            Colonne binaire indiquant si le répondant est en emploi (par défaut "Employed").
+
+        Returns
+        -------
+        EmploymentCube
+            Le cube d'agrégation.
+        """
+        counts_df = df[list(dims)].assign(count=1, employed=df[target_col])
+
+        return cls.from_counts(counts_df, dims)
+
+    @property
+    def n_respondents(self):
+        """Nombre total de répondants."""
+        return int(self.cells["count"].sum())
+
+    @property
+    def n_employed(self):
+        """Nombre total de répondants en emploi."""
+        return int(self.cells["employed"].sum())
+
+    def counts(self, group_cols):
+        """
+        Effectifs et effectifs en emploi pour chaque combinaison de `group_cols`.
+
+        Les marges sont calculées à la première demande en sommant les cellules du cube, puis
+        conservées. Comme `DataFrame.groupby`, les valeurs manquantes sont exclues et le
+        résultat est trié selon les colonnes de regroupement.
+
+        Parameters
+        ----------
+        group_cols : list of str
+            Dimensions du cube selon lesquelles agréger.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Les colonnes de regroupement, 'count' et 'employed'.
+        """
+        key = tuple(group_cols)
+        if key not in self._marginals:
+            marginal = (
+                self.cells.groupby(list(key), observed=True)[["count", "employed"]]
+                .sum()
+                .reset_index()
+            )
+            for col in key:
+                marginal[col] = marginal[col].astype(self.dtypes[col])
+            self._marginals[key] = marginal
+
+        return self._marginals[key].copy()
+
+    def employment_rate(self, group_cols):
+        """
+        Équivalent de `df.groupby(group_cols)["Employed"].agg(["count", "mean"])`.
+
+        Parameters
+        ----------
+        group_cols : list of str
+            Dimensions du cube selon lesquelles agréger.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Les colonnes de regroupement, 'count' et 'mean' (taux d'emploi entre 0 et 1).
+        """
+        result = self.counts(group_cols)
+        result["mean"] = result["employed"] / result["count"]
+
+        return result.drop(columns="employed")
+
+    def status_counts(self, employed_col="EmployedCat", labels=EMPLOYMENT_LABELS):
+        """
+        Effectifs par statut d'emploi sur l'ensemble des répondants.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Les colonnes `employed_col` et 'count'.
+        """
+        return pd.DataFrame(
+            {
+                employed_col: pd.Categorical(labels, categories=labels, ordered=True),
+                "count": [self.n_respondents - self.n_employed, self.n_employed],
+            }
+        )
+
+    def group_percentage(
+        self,
+        group_col,
+        employed_col="EmployedCat",
+        labels=EMPLOYMENT_LABELS,
+        count_col_name="count",
+        percent_col_name="percentage",
+    ):
+        """
+        Équivalent de `group_percentage_by(df, [group_col, employed_col])` calculé sur le cube.
+
+        Parameters
+        ----------
+        group_col : str
+            Dimension du cube selon laquelle calculer les pourcentages.
+        employed_col : str, optional
+            Nom de la colonne de statut d'emploi dans le résultat.
+        labels : list of str, optional
+            Libellés des statuts [sans emploi, en emploi].
+        count_col_name : str, optional
+            Nom de la colonne des effectifs.
+        percent_col_name : str, optional
+            Nom de la colonne des pourcentages.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Les colonnes `group_col`, `employed_col`, effectifs et pourcentages.
+        """
+        totals = self.counts([group_col])
+        status_counts = [totals["count"] - totals["employed"], totals["employed"]]
+
+        long_df = pd.concat(
+            [
+                pd.DataFrame(
+                    {
+                        group_col: totals[group_col],
+                        employed_col: label,
+                        count_col_name: counts,
+                        "total": totals["count"],
+                    }
+                )
+                for label, counts in zip(labels, status_counts)
+            ],
+            ignore_index=True,
+        )
+        long_df[employed_col] = pd.Categorical(
+            long_df[employed_col], categories=labels, ordered=True
+        )
+
+        # Comme avec observed=True, les combinaisons sans répondant sont exclues
+        long_df = long_df[long_df[count_col_name] > 0].assign(
+            **{percent_col_name: lambda d: (d[count_col_name] / d["total"] * 100).round(1)}
+        )
+
+        return (
+            long_df.sort_values([group_col, employed_col], kind="stable")[
+                [group_col, employed_col, count_col_name, percent_col_name]
+            ]
+            .astype({count_col_name: "int64"})
+            .reset_index(drop=True)
+        )
+
+
+@lru_cache(maxsize=4)
+def _build_employment_cube(
+    survey_source, countries_lang_data_path, chunksize, years, *versions
+):
+    """
+    Construit le cube par morceaux, une seule fois par version des fichiers sources.
+
+    Le continent ne dépendant que du pays, il est ajouté aux cellules agrégées et non aux lignes.
+    """
+    row_dims = [dim for dim in CUBE_DIMS if dim != "Continent"]
+    partial_counts = PartialCounts(row_dims, value_col="Employed", dropna=False)
+
+    for chunk in iter_survey_batches(
+        survey_source,
+        years=years,
+        columns=row_dims + ["Employed"],
+        batch_size=chunksize,
+    ):
+        partial_counts.update(labels_translation(chunk))
+
+    counts_df = add_continent_info(partial_counts.to_frame(), countries_lang_data_path)
+
+    cube = EmploymentCube.from_counts(counts_df, count_col="size", employed_col="sum")
+    cube.version = "-".join([str(years), *versions])
+
+    return cube
+
+
+@timed_function
+def load_employment_cube(
+    survey_source, countries_lang_data_path, chunksize=DEFAULT_CHUNKSIZE, years=None
+):
+    """
+    Renvoie le cube d'emploi associé à la version courante des fichiers de données.
+
+    Le cube est construit au premier appel puis conservé en mémoire pour toute la durée du
+    processus, tant que les fichiers sources ne changent pas.
+
+    Args:
+        survey_source (str): Chemin ou URL du CSV StackOverflow, ou répertoire du jeu
+            Parquet partitionné par année.
+        countries_lang_data_path (str): Chemin ou URL du fichier Excel des pays.
+        chunksize (int): Nombre de lignes lues à la fois, pour borner la mémoire utilisée.
+        years (list of int, optional): Années de l'enquête à agréger. Par défaut, toutes.
+
+    Returns:
+        EmploymentCube: Le cube d'agrégation.
+    """
+    return _build_employment_cube(
+        survey_source,
+        countries_lang_data_path,
+        chunksize,
+        None if years is None else tuple(sorted(years)),
+        dataset_version(survey_source),
+        dataset_version(countries_lang_data_path),
+    )
@@ -0,0 +1,346 @@
+"""
+Ce module définit un index bitmap des répondants pour les filtres croisés sur l'emploi.
+
+Pour chaque modalité des dimensions `Age`, `Gender`, `EdLevel`, `MainBranch`, `Country`,
+`Continent` et pour chaque langage cité, l'index conserve un tableau de bits compacté
+(`numpy.packbits`, un bit par répondant) indiquant les répondants concernés. Deux tableaux de
+même format repèrent les répondants dont le statut d'emploi est connu et ceux qui sont en emploi.
+
+Une conjonction quelconque de filtres se calcule alors par des OU (modalités d'une même
+dimension) et des ET (entre dimensions) bit à bit, et les effectifs par un décompte des bits à 1
+(`numpy.bitwise_count`) : le coût ne dépend que du nombre de répondants divisé par 8, et non du
+nombre de lignes à reparcourir. L'index est construit par morceaux, une seule fois par version du
+jeu de données.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from src.chunked_aggregation import DEFAULT_CHUNKSIZE
+from src.data_loading import dataset_version, iter_survey_batches
+from src.data_preprocessing import add_continent_info, labels_translation
+from src.metrics import timed_function
+
+INDEX_DIMS = ["Age", "Gender", "EdLevel", "MainBranch", "Country"]
+LANGUAGES_COL = "HaveWorkedWith"
+# Pseudo-dimension des langages : un répondant peut en citer plusieurs
+LANGUAGES_DIM = "Language"
+
+
+class _BitmapBuilder:
+    """
+    Construction incrémentale de tableaux de bits compactés de même longueur.
+
+    Les morceaux de données n'ont pas forcément une taille multiple de 8 : les derniers bits
+    d'un morceau sont conservés jusqu'au morceau suivant avant d'être compactés.
+    """
+
+    def __init__(self):
+        self.n_rows = 0
+        self._packed = {}
+        self._tails = {}
+
+    def append(self, key_bits, n_rows):
+        """
+        Ajoute `n_rows` répondants : `key_bits` associe à chaque clé un tableau booléen de
+        longueur `n_rows`. Les clés absentes reçoivent des bits à 0.
+        """
+        tail_len = self.n_rows % 8
+        n_bytes = self.n_rows // 8
+        full = (tail_len + n_rows) // 8 * 8
+
+        for key in key_bits.keys() - self._packed.keys():
+            # Nouvelle clé : aucun des répondants précédents n'est concerné
+            self._packed[key] = [np.zeros(n_bytes, dtype=np.uint8)]
+            self._tails[key] = np.zeros(tail_len, dtype=bool)
+
+        for key in self._packed:
+            bits = key_bits.get(key)
+            if bits is None:
+                bits = np.zeros(n_rows, dtype=bool)
+            bits = np.concatenate([self._tails[key], bits])
+            self._packed[key].append(np.packbits(bits[:full]))
+            self._tails[key] = bits[full:]
+
+        self.n_rows += n_rows
+
+    def to_dict(self):
+        """
+        Renvoie les tableaux de bits compactés (le dernier octet est complété par des 0).
+        """
+        return {
+            key: np.concatenate(chunks + [np.packbits(self._tails[key])])
+            for key, chunks in self._packed.items()
+        }
+
+
+class BitmapIndex:
+    """
+    Index bitmap des répondants et de leur statut d'emploi.
+
+    Parameters
+    ----------
+    bitmaps : dict
+        {(dimension, modalité): tableau de bits compacté}.
+    employed : numpy.ndarray
+        Tableau de bits des répondants en emploi.
+    known : numpy.ndarray
+        Tableau de bits des répondants dont le statut d'emploi est renseigné.
+    n_rows : int
+        Nombre de répondants indexés.
+    version : str, optional
+        Version des données à partir desquelles l'index a été construit.
+    """
+
+    def __init__(self, bitmaps, employed, known, n_rows, version=None):
+        self.bitmaps = bitmaps
+        self.employed = employed
+        self.known = known
+        self.n_rows = n_rows
+        self.version = version
+
+    @classmethod
+    def from_chunks(
+        cls, chunks, dims=INDEX_DIMS, languages_col=LANGUAGES_COL, target_col="Employed"
+    ):
+        """
+        Construit l'index à partir de morceaux de données (libellés traduits).
+
+        Parameters
+        ----------
+        chunks : iterable of pandas.DataFrame
+            Morceaux de données, par exemple produits par `iter_survey_batches`.
+        dims : list of str, optional
+            Dimensions catégorielles à indexer (par défaut `INDEX_DIMS`).
+        languages_col : str, optional
+            Colonne des langages, séparés par des ';'. Si None, les langages ne sont pas indexés.
+        target_col : str, optional
+            Colonne binaire indiquant si le répondant est en emploi.
+
+        Returns
+        -------
+        BitmapIndex
+            L'index bitmap.
+        """
+        builder = _BitmapBuilder()
+
+        for chunk in chunks:
+            key_bits = {}
+            for dim in dims:
+                values = chunk[dim].astype("category")
+                codes = values.cat.codes.to_numpy()
+                for code, value in enumerate(values.cat.categories):
+                    bits = codes == code
+                    if bits.any():
+                        key_bits[(dim, value)] = bits
+
+            if languages_col is not None:
+                dummies = (
+                    chunk[languages_col]
+                    .str.replace(r"\s*;\s*", ";", regex=True)
+                    .str.strip()
+                    .str.get_dummies(";")
+                )
+                for lang in dummies.columns:
+                    key_bits[(LANGUAGES_DIM, lang)] = dummies[lang].to_numpy(dtype=bool)
+
+            target = chunk[target_col]
+            key_bits[("", "known")] = target.notna().to_numpy()
+            key_bits[("", "employed")] = (target == 1).to_numpy()
+
+            builder.append(key_bits, len(chunk))
+
+        bitmaps = builder.to_dict()
+        empty = np.zeros((builder.n_rows + 7) // 8, dtype=np.uint8)
+        known = bitmaps.pop(("", "known"), empty)
+        employed = bitmaps.pop(("", "employed"), empty)
+
+        return cls(bitmaps, employed, known, builder.n_rows)
+
+    def add_grouped_dim(self, dim, source_dim, mapping):
+        """
+        Ajoute une dimension obtenue en regroupant les modalités d'une dimension existante
+        (par exemple les continents à partir des pays) : chaque tableau de bits est le OU des
+        tableaux des modalités regroupées.
+
+        Parameters
+        ----------
+        dim : str
+            Nom de la nouvelle dimension.
+        source_dim : str
+            Dimension existante.
+        mapping : dict
+            {modalité de `source_dim`: modalité de `dim`}. Les modalités absentes ou associées
+            à une valeur manquante sont ignorées.
+        """
+        for value in self.values(source_dim):
+            group = mapping.get(value)
+            if group is None or pd.isna(group):
+                continue
+            key = (dim, group)
+            bits = self.bitmaps[(source_dim, value)]
+            self.bitmaps[key] = bits | self.bitmaps[key] if key in self.bitmaps else bits.copy()
+
+    @property
+    def dims(self):
+        """Dimensions indexées."""
+        return list(dict.fromkeys(dim for dim, _ in self.bitmaps))
+
+    def values(self, dim):
+        """Modalités indexées d'une dimension, triées."""
+        return sorted(value for key_dim, value in self.bitmaps if key_dim == dim)
+
+    def count(self, bits):
+        """Nombre de bits à 1 d'un tableau de bits compacté."""
+        return int(np.bitwise_count(bits).sum(dtype=np.int64))
+
+    def mask(self, filters=None, all_of=(LANGUAGES_DIM,)):
+        """
+        Tableau de bits des répondants vérifiant tous les filtres.
+
+        Parameters
+        ----------
+        filters : dict, optional
+            {dimension: modalités retenues}. Une dimension absente ou sans modalité n'est pas
+            filtrée.
+        all_of : tuple of str, optional
+            Dimensions pour lesquelles les répondants doivent présenter toutes les modalités
+            retenues (par défaut, les langages : « connaît Python et SQL »). Pour les autres,
+            une modalité suffit.
+
+        Returns
+        -------
+        numpy.ndarray
+            Le tableau de bits compacté.
+        """
+        result = self.known.copy()
+        empty = np.zeros_like(result)
+
+        for dim, values in (filters or {}).items():
+            values = list(values)
+            if not values:
+                continue
+            bitmaps = [self.bitmaps.get((dim, value), empty) for value in values]
+            if dim in all_of:
+                for bits in bitmaps:
+                    np.bitwise_and(result, bits, out=result)
+            else:
+                np.bitwise_and(result, np.bitwise_or.reduce(bitmaps), out=result)
+
+        return result
+
+    def employment_rate(self, filters=None):
+        """
+        Effectif et taux d'emploi des répondants vérifiant les filtres.
+
+        Returns
+        -------
+        int
+            Nombre de répondants (statut d'emploi renseigné).
+        float
+            Taux d'emploi entre 0 et 1 (NaN si aucun répondant).
+        """
+        mask = self.mask(filters)
+        count = self.count(mask)
+        employed = self.count(mask & self.employed)
+
+        return count, employed / count if count else float("nan")
+
+    def employment_rate_by(self, dim, filters=None, values=None):
+        """
+        Effectif et taux d'emploi par modalité de `dim`, parmi les répondants vérifiant les
+        filtres : équivalent de `df[filtre].groupby(dim)["Employed"].agg(["count", "mean"])`.
+
+        Parameters
+        ----------
+        dim : str
+            Dimension de ventilation.
+        filters : dict, optional
+            Filtres, comme pour `mask`.
+        values : list, optional
+            Modalités de `dim` à calculer. Par défaut, toutes.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Les colonnes `dim`, 'count' et 'mean' (modalités sans répondant exclues).
+        """
+        mask = self.mask(filters)
+        employed_mask = mask & self.employed
+        rows = []
+        for value in self.values(dim) if values is None else values:
+            bits = self.bitmaps[(dim, value)]
+            count = self.count(mask & bits)
+            if count:
+                rows.append((value, count, self.count(employed_mask & bits) / count))
+
+        return pd.DataFrame(rows, columns=[dim, "count", "mean"])
+
+    def top_values(self, dim, n=None):
+        """
+        Modalités de `dim` les plus fréquentes (par exemple les langages les plus cités).
+        """
+        counts = {value: self.count(self.bitmaps[(dim, value)]) for value in self.values(dim)}
+        return sorted(counts, key=counts.get, reverse=True)[:n]
+
+
+@lru_cache(maxsize=4)
+def _build_bitmap_index(survey_source, countries_lang_data_path, chunksize, years, *versions):
+    """
+    Construit l'index par morceaux, une seule fois par version des fichiers sources.
+
+    Le continent ne dépendant que du pays, ses tableaux de bits sont obtenus en regroupant ceux
+    des pays, sans jointure sur les lignes.
+    """
+    chunks = (
+        labels_translation(chunk)
+        for chunk in iter_survey_batches(
+            survey_source,
+            years=years,
+            columns=INDEX_DIMS + [LANGUAGES_COL, "Employed"],
+            batch_size=chunksize,
+        )
+    )
+    index = BitmapIndex.from_chunks(chunks)
+
+    countries = add_continent_info(
+        pd.DataFrame({"Country": index.values("Country")}), countries_lang_data_path
+    )
+    index.add_grouped_dim(
+        "Continent", "Country", dict(zip(countries["Country"], countries["Continent"]))
+    )
+    index.version = "-".join([str(years), *versions])
+
+    return index
+
+
+@timed_function
+def load_bitmap_index(
+    survey_source, countries_lang_data_path, chunksize=DEFAULT_CHUNKSIZE, years=None
+):
+    """
+    Renvoie l'index bitmap associé à la version courante des fichiers de données.
+
+    L'index est construit au premier appel puis conservé en mémoire pour toute la durée du
+    processus, tant que les fichiers sources ne changent pas.
+
+    Args:
+        survey_source (str): Chemin ou URL du CSV StackOverflow, ou répertoire du jeu
+            Parquet partitionné par année.
+        countries_lang_data_path (str): Chemin ou URL du fichier Excel des pays.
+        chunksize (int): Nombre de lignes lues à la fois, pour borner la mémoire utilisée.
+        years (list of int, optional): Années de l'enquête à indexer. Par défaut, toutes.
+
+    Returns:
+        BitmapIndex: L'index bitmap.
+    """
+    return _build_bitmap_index(
+        survey_source,
+        countries_lang_data_path,
+        chunksize,
+        None if years is None else tuple(sorted(years)),
+        dataset_version(survey_source),
+        dataset_version(countries_lang_data_path),
+    )
@@ -0,0 +1,218 @@
+"""
+Ce module propose des variantes « hors mémoire » des agrégations de l'application.
+
+Les données sont lues par morceaux (`read_csv(chunksize=...)` ou groupes de lignes Parquet) et
+chaque morceau est résumé par des comptes partiels, fusionnables entre eux. La mémoire utilisée
+dépend du nombre de groupes et de la taille d'un morceau, et non de la taille du fichier. Les
+résultats sont identiques à ceux des fonctions en mémoire (`group_percentage_by`, agrégations
+par pays et par continent de la page de répartition géographique).
+"""
+
+import pandas as pd
+
+DEFAULT_CHUNKSIZE = 100_000
+
+
+def iter_survey_chunks(path, chunksize=DEFAULT_CHUNKSIZE, columns=None, transform=None):
+    """
+    Lit un fichier de l'enquête par morceaux.
+
+    Args:
+        path (str): Chemin ou URL d'un fichier CSV (au format de l'enquête StackOverflow)
+            ou d'un fichier Parquet.
+        chunksize (int): Nombre de lignes par morceau pour les CSV. Les fichiers Parquet sont
+            lus groupe de lignes par groupe de lignes.
+        columns (list of str, optional): Colonnes à lire. Par défaut, toutes les colonnes.
+        transform (callable, optional): Fonction appliquée à chaque morceau (par exemple
+            `labels_translation`).
+
+    Yields:
+        pd.DataFrame: Un morceau du fichier.
+    """
+    if str(path).endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        chunks = (
+            parquet_file.read_row_group(i, columns=columns).to_pandas()
+            for i in range(parquet_file.num_row_groups)
+        )
+    else:
+        usecols = None if columns is None else ["Unnamed: 0"] + list(columns)
+        chunks = pd.read_csv(
+            path,
+            index_col="Unnamed: 0",
+            usecols=usecols,
+            chunksize=chunksize,
+        )
+
+    for chunk in chunks:
+        yield transform(chunk) if transform is not None else chunk
+
+
+class PartialCounts:
+    """
+    Comptes partiels par groupe, alimentés morceau par morceau et fusionnables.
+
+    Pour chaque groupe, on conserve le nombre de lignes ('size') et, si `value_col` est
+    renseignée, le nombre de valeurs non manquantes ('count') et leur somme ('sum').
+
+    Parameters
+    ----------
+    group_cols : list of str
+        Colonnes de regroupement.
+    value_col : str, optional
+        Colonne numérique dont on cumule le nombre de valeurs et la somme.
+    dropna : bool, optional
+        Si False, les valeurs manquantes des colonnes de regroupement forment un groupe
+        (comme `groupby(dropna=False)`).
+    """
+
+    def __init__(self, group_cols, value_col=None, dropna=True):
+        self.group_cols = list(group_cols)
+        self.value_col = value_col
+        self.dropna = dropna
+        self.stats = ["size"] if value_col is None else ["size", "count", "sum"]
+        self.totals = {}
+        self.dtypes = {}
+
+    def _update_dtypes(self, dtypes):
+        for col in self.group_cols:
+            dtype, known = dtypes[col], self.dtypes.get(col)
+            if (
+                isinstance(dtype, pd.CategoricalDtype)
+                and isinstance(known, pd.CategoricalDtype)
+                and not known.ordered
+            ):
+                # Catégories non ordonnées : on conserve l'union des modalités rencontrées
+                self.dtypes[col] = pd.CategoricalDtype(
+                    known.categories.union(dtype.categories)
+                )
+            else:
+                self.dtypes.setdefault(col, dtype)
+
+    def _add(self, key, values):
+        current = self.totals.get(key)
+        self.totals[key] = values if current is None else [
+            a + b for a, b in zip(current, values)
+        ]
+
+    def update(self, chunk):
+        """
+        Ajoute les comptes d'un morceau de données.
+        """
+        self._update_dtypes(chunk.dtypes)
+        grouped = chunk.groupby(self.group_cols, observed=True, dropna=self.dropna)
+
+        if self.value_col is None:
+            partial = grouped.size().to_frame("size")
+        else:
+            partial = grouped[self.value_col].agg(["size", "count", "sum"])
+
+        for key, values in zip(partial.index.to_flat_index(), partial.to_numpy().tolist()):
+            key = key if isinstance(key, tuple) else (key,)
+            # Les valeurs manquantes sont normalisées pour être fusionnées entre morceaux
+            self._add(tuple(None if pd.isna(v) else v for v in key), values)
+
+        return self
+
+    def merge(self, other):
+        """
+        Fusionne les comptes d'un autre objet `PartialCounts` (autre morceau, autre partition).
+        """
+        self._update_dtypes(other.dtypes)
+        for key, values in other.totals.items():
+            self._add(key, values)
+
+        return self
+
+    def to_frame(self):
+        """
+        Renvoie les comptes cumulés, triés comme le ferait `groupby`.
+
+        Returns:
+            pd.DataFrame: Les colonnes de regroupement suivies des statistiques cumulées.
+        """
+        keys = list(self.totals)
+        result = pd.DataFrame(keys, columns=self.group_cols)
+        for col in self.group_cols:
+            if col in self.dtypes:
+                result[col] = result[col].astype(self.dtypes[col])
+
+        stats = pd.DataFrame([self.totals[key] for key in keys], columns=self.stats)
+        stats = stats.astype({"size": "int64"})
+        if self.value_col is not None:
+            stats = stats.astype({"count": "int64", "sum": "float64"})
+        result = pd.concat([result, stats], axis=1)
+
+        return result.sort_values(self.group_cols, kind="stable").reset_index(drop=True)
+
+
+def chunked_group_percentage_by(
+    chunks, group_cols, count_col_name="count", percent_col_name="percentage"
+):
+    """
+    Variante par morceaux de `group_percentage_by`.
+
+    Parameters
+    ----------
+    chunks : iterable of pandas.DataFrame
+        Morceaux de données, par exemple produits par `iter_survey_chunks`.
+    group_cols : list of str
+        Colonnes de regroupement. La première sert au calcul des pourcentages.
+    count_col_name : str, optional
+        Nom de la colonne des effectifs (par défaut "count").
+    percent_col_name : str, optional
+        Nom de la colonne des pourcentages (par défaut "percentage").
+
+    Returns
+    -------
+    pandas.DataFrame
+        Le même tableau que `group_percentage_by` appliqué aux données complètes.
+    """
+    subgroup_counts = PartialCounts(group_cols)
+    first_level_counts = PartialCounts(group_cols[:1])
+
+    for chunk in chunks:
+        subgroup_counts.update(chunk)
+        first_level_counts.update(chunk)
+
+    grouped_df = subgroup_counts.to_frame().rename(columns={"size": count_col_name})
+    total_counts = first_level_counts.to_frame().set_index(group_cols[0])["size"]
+
+    # Modalités converties en objets : `map` sur une colonne catégorielle (libellés traduits)
+    # renverrait une catégorielle, qui ne se divise pas
+    totals = grouped_df[group_cols[0]].astype(object).map(total_counts).astype("int64")
+    grouped_df[percent_col_name] = (grouped_df[count_col_name] / totals * 100).round(1)
+
+    return grouped_df
+
+
+def chunked_employment_rate(chunks, group_cols, value_col="Employed"):
+    """
+    Variante par morceaux de `df.groupby(group_cols)[value_col].agg(["count", "mean"])`.
+
+    C'est l'agrégation utilisée pour les tableaux par pays et par continent.
+
+    Parameters
+    ----------
+    chunks : iterable of pandas.DataFrame
+        Morceaux de données, par exemple produits par `iter_survey_chunks`.
+    group_cols : list of str
+        Colonnes de regroupement (par exemple ["Country", "ISO"] ou ["Continent"]).
+    value_col : str, optional
+        Colonne binaire dont on calcule la moyenne (par défaut "Employed").
+
+    Returns
+    -------
+    pandas.DataFrame
+        Les colonnes de regroupement, 'count' et 'mean'.
+    """
+    partial_counts = PartialCounts(group_cols, value_col=value_col)
+    for chunk in chunks:
+        partial_counts.update(chunk)
+
+    result = partial_counts.to_frame()
+    result["mean"] = result["sum"] / result["count"]
+
+    return result.drop(columns=["size", "sum"])
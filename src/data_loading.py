@@ -0,0 +1,343 @@
+"""
+Ce module regroupe les fonctions utilitaires de chargement des données de l'application.
+
+Les données de l'enquête peuvent provenir :
+- d'un fichier CSV unique (l'extrait 2022 référencé par `stack_users_data_path`) ;
+- d'un fichier Parquet unique (`*.parquet`, par exemple produit par `src.synthetic_data`),
+  considéré comme l'année 2022 s'il n'a pas de colonne `year` ;
+- d'un jeu de données Parquet partitionné par année (`survey_dataset_path`), organisé en
+  `<racine>/year=2022/part-0.parquet`, `<racine>/year=2023/part-0.parquet`, etc.
+
+Pour le jeu partitionné, les filtres sur l'année et la sélection des colonnes sont transmis à
+pyarrow : seuls les fichiers des années demandées et les colonnes utiles sont lus, et les
+statistiques des groupes de lignes permettent d'en ignorer certains lors du filtrage.
+"""
+
+import argparse
+import hashlib
+import os
+import threading
+
+from cachetools import TTLCache
+import pandas as pd
+
+from src.metrics import timed_function
+
+YEAR_COL = "year"
+DEFAULT_SURVEY_YEAR = 2022
+# Durée (s) pendant laquelle l'en-tête d'une URL est réutilisé sans interroger le serveur
+URL_TAG_TTL = 60
+
+# En-têtes des URL : récents (TTL) et dernier connu, conservé si le serveur ne répond plus
+_url_tags = TTLCache(maxsize=32, ttl=URL_TAG_TTL)
+_last_url_tags = {}
+_url_tags_lock = threading.Lock()
+
+
+def is_partitioned_dataset(source):
+    """
+    Indique si la source est un répertoire de jeu de données partitionné (et non un fichier).
+    """
+    return os.path.isdir(str(source))
+
+
+def is_parquet_file(source):
+    """
+    Indique si la source est un fichier Parquet unique.
+    """
+    return str(source).endswith(".parquet") and not is_partitioned_dataset(source)
+
+
+def _url_tag(url):
+    """
+    En-tête `ETag` ou `Last-Modified` d'une URL, demandé au plus une fois par `URL_TAG_TTL`
+    secondes. Si le serveur ne répond pas, le dernier en-tête obtenu est conservé.
+    """
+    with _url_tags_lock:
+        if url in _url_tags:
+            return _url_tags[url]
+
+    import requests
+
+    try:
+        response = requests.head(url, allow_redirects=True, timeout=5)
+        tag = response.headers.get("ETag") or response.headers.get("Last-Modified", "")
+    except requests.RequestException:
+        tag = None
+
+    with _url_tags_lock:
+        if tag is None:
+            tag = _last_url_tags.get(url, "")
+        else:
+            _last_url_tags[url] = tag
+        _url_tags[url] = tag
+    return tag
+
+
+def dataset_version(path):
+    """
+    Calcule un identifiant de version pour un fichier de données local ou distant.
+
+    Pour un fichier local, l'identifiant dépend de sa taille et de sa date de modification ; pour
+    un répertoire partitionné, de celles de tous ses fichiers. Pour une URL (MinIO, site web), il
+    dépend des en-têtes `ETag` ou `Last-Modified` renvoyés par le serveur, redemandés au plus
+    une fois par minute. Si le serveur ne répond pas, le dernier en-tête connu est conservé (à
+    défaut, seul le chemin est utilisé).
+
+    Args:
+        path (str): Chemin local, répertoire partitionné ou URL.
+
+    Returns:
+        str: Identifiant court, qui change lorsque le contenu des données change.
+    """
+    path = str(path)
+    if path.startswith(("http://", "https://")):
+        tag = _url_tag(path)
+    elif is_partitioned_dataset(path):
+        files = sorted(
+            os.path.join(root, name) for root, _, names in os.walk(path) for name in names
+        )
+        tag = ";".join(
+            f"{os.path.relpath(f, path)}:{os.stat(f).st_size}-{os.stat(f).st_mtime_ns}"
+            for f in files
+        )
+    elif os.path.exists(path):
+        stat = os.stat(path)
+        tag = f"{stat.st_size}-{stat.st_mtime_ns}"
+    else:
+        tag = ""
+
+    return hashlib.sha1(f"{path}|{tag}".encode()).hexdigest()[:16]
+
+
+def frame_version(df):
+    """
+    Calcule un identifiant de version à partir du contenu d'un DataFrame (valeurs, index et
+    colonnes), pour les petites tables chargées en mémoire (par exemple les codes ISO).
+
+    Args:
+        df (pd.DataFrame): Table dont dépendent des résultats mis en cache.
+
+    Returns:
+        str: Identifiant court, qui change lorsque le contenu de la table change.
+    """
+    digest = hashlib.sha1(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    digest.update("|".join(map(str, df.columns)).encode())
+    return digest.hexdigest()[:16]
+
+
+def _survey_dataset(dataset_root):
+    import pyarrow.dataset as ds
+
+    if is_parquet_file(dataset_root):
+        return ds.dataset(dataset_root, format="parquet")
+    return ds.dataset(dataset_root, format="parquet", partitioning="hive")
+
+
+def _scan_arguments(source, years=None, columns=None, filters=None):
+    """
+    Jeu pyarrow, colonnes et filtre à utiliser pour lire la source, et année à ajouter aux
+    lignes lorsque le fichier n'a pas de colonne `year` (None sinon).
+    """
+    import pyarrow.dataset as ds
+
+    dataset = _survey_dataset(source)
+    if YEAR_COL in dataset.schema.names:
+        if columns is not None and YEAR_COL not in columns:
+            columns = list(columns) + [YEAR_COL]
+        return dataset, columns, _survey_filter(years, filters), None
+
+    if columns is not None:
+        columns = [col for col in columns if col != YEAR_COL]
+    if years is not None and DEFAULT_SURVEY_YEAR not in years:
+        return dataset, columns, ds.scalar(False), DEFAULT_SURVEY_YEAR
+    return dataset, columns, _survey_filter(None, filters), DEFAULT_SURVEY_YEAR
+
+
+def _survey_filter(years=None, filters=None):
+    """
+    Construit l'expression pyarrow combinant le filtre sur les années et les filtres
+    supplémentaires (dictionnaire {colonne: valeur ou liste de valeurs}).
+    """
+    import pyarrow.dataset as ds
+
+    conditions = {}
+    if years is not None:
+        conditions[YEAR_COL] = [int(year) for year in years]
+    conditions.update(filters or {})
+
+    expression = None
+    for col, values in conditions.items():
+        values = values if isinstance(values, (list, tuple, set)) else [values]
+        condition = ds.field(col).isin(list(values))
+        expression = condition if expression is None else expression & condition
+
+    return expression
+
+
+def _with_year(df, year):
+    """
+    Ajoute la colonne `year` aux lignes lues d'un fichier qui n'en a pas (si `year` n'est pas
+    None).
+    """
+    if year is not None:
+        df[YEAR_COL] = year
+    return df
+
+
+def _filter_frame(df, filters=None):
+    """
+    Applique en pandas les filtres d'égalité {colonne: valeur(s)} (cas du CSV unique).
+    """
+    for col, values in (filters or {}).items():
+        values = values if isinstance(values, (list, tuple, set)) else [values]
+        df = df[df[col].isin(list(values))]
+
+    return df
+
+
+def survey_years(source):
+    """
+    Liste les années disponibles dans une source de données.
+
+    Args:
+        source (str): Répertoire partitionné par année, fichier Parquet, ou fichier CSV
+            (année 2022).
+
+    Returns:
+        list of int: Années disponibles, triées.
+    """
+    if is_parquet_file(source):
+        import pyarrow.parquet as pq
+
+        if YEAR_COL not in pq.read_schema(source).names:
+            return [DEFAULT_SURVEY_YEAR]
+        years = pq.read_table(source, columns=[YEAR_COL]).column(YEAR_COL).unique()
+        return sorted(int(year) for year in years.to_pylist() if year is not None)
+
+    if not is_partitioned_dataset(source):
+        return [DEFAULT_SURVEY_YEAR]
+
+    prefix = f"{YEAR_COL}="
+    return sorted(
+        int(name[len(prefix):]) for name in os.listdir(source) if name.startswith(prefix)
+    )
+
+
+@timed_function
+def load_survey(source, years=None, columns=None, filters=None):
+    """
+    Charge les données de l'enquête pour les années et colonnes demandées.
+
+    Args:
+        source (str): Répertoire partitionné par année, fichier Parquet, ou chemin/URL du
+            CSV 2022.
+        years (list of int, optional): Années à charger. Par défaut, toutes.
+        columns (list of str, optional): Colonnes à charger. Par défaut, toutes.
+        filters (dict, optional): Filtres d'égalité supplémentaires, {colonne: valeur(s)}.
+
+    Returns:
+        pd.DataFrame: Les données demandées, avec une colonne `year`.
+    """
+    if not is_partitioned_dataset(source) and not is_parquet_file(source):
+        usecols = None if columns is None else ["Unnamed: 0"] + [
+            col for col in columns if col != YEAR_COL
+        ]
+        df = pd.read_csv(source, index_col="Unnamed: 0", usecols=usecols)
+        df[YEAR_COL] = DEFAULT_SURVEY_YEAR
+        if years is not None and DEFAULT_SURVEY_YEAR not in years:
+            df = df.iloc[0:0]
+        return _filter_frame(df, filters)
+
+    dataset, columns, expression, year = _scan_arguments(source, years, columns, filters)
+    table = dataset.to_table(columns=columns, filter=expression)
+    return _with_year(table.to_pandas(), year)
+
+
+def iter_survey_batches(source, years=None, columns=None, filters=None, batch_size=100_000):
+    """
+    Parcourt les données de l'enquête par lots, sans tout charger en mémoire.
+
+    Les filtres sont appliqués comme dans `load_survey`. Les lots produits peuvent être passés
+    directement aux agrégations de `src.chunked_aggregation`.
+
+    Yields:
+        pd.DataFrame: Un lot de lignes.
+    """
+    if not is_partitioned_dataset(source) and not is_parquet_file(source):
+        from src.chunked_aggregation import iter_survey_chunks
+
+        if years is not None and DEFAULT_SURVEY_YEAR not in years:
+            return
+        read_cols = None if columns is None else [col for col in columns if col != YEAR_COL]
+        for chunk in iter_survey_chunks(source, chunksize=batch_size, columns=read_cols):
+            chunk[YEAR_COL] = DEFAULT_SURVEY_YEAR
+            yield _filter_frame(chunk, filters)
+        return
+
+    dataset, columns, expression, year = _scan_arguments(source, years, columns, filters)
+    scanner = dataset.scanner(columns=columns, filter=expression, batch_size=batch_size)
+    for batch in scanner.to_batches():
+        if batch.num_rows:
+            yield _with_year(batch.to_pandas(), year)
+
+
+def reset_survey_partition(dataset_root, year):
+    """
+    Prépare le répertoire d'une année du jeu partitionné : il est créé s'il n'existe pas, et
+    ses fichiers Parquet sont supprimés s'il existe.
+
+    Args:
+        dataset_root (str): Racine du jeu de données partitionné.
+        year (int): Année de l'enquête.
+
+    Returns:
+        str: Répertoire de l'année.
+    """
+    partition_dir = os.path.join(dataset_root, f"{YEAR_COL}={int(year)}")
+    os.makedirs(partition_dir, exist_ok=True)
+    for name in os.listdir(partition_dir):
+        if name.endswith(".parquet"):
+            os.remove(os.path.join(partition_dir, name))
+
+    return partition_dir
+
+
+def write_survey_year(df, dataset_root, year, row_group_size=50_000):
+    """
+    Écrit les données d'une année dans le jeu partitionné (remplace l'année si elle existe).
+
+    Args:
+        df (pd.DataFrame): Données de l'enquête pour cette année.
+        dataset_root (str): Racine du jeu de données partitionné.
+        year (int): Année de l'enquête.
+        row_group_size (int): Nombre de lignes par groupe de lignes Parquet.
+
+    Returns:
+        str: Chemin du fichier écrit.
+    """
+    # Tous les fichiers de l'année sont remplacés, et non le seul `part-0.parquet`
+    path = os.path.join(reset_survey_partition(dataset_root, year), "part-0.parquet")
+
+    df.drop(columns=YEAR_COL, errors="ignore").reset_index(drop=True).to_parquet(
+        path, index=False, row_group_size=row_group_size
+    )
+    return path
+
+
+if __name__ == "__main__":
+    # Ajout d'une année au jeu partitionné à partir d'un extrait CSV de l'enquête
+    parser = argparse.ArgumentParser(
+        description="Ajoute une année de l'enquête StackOverflow au jeu Parquet partitionné."
+    )
+    parser.add_argument("csv_path", help="Chemin ou URL de l'extrait CSV de l'enquête")
+    parser.add_argument("year", type=int, help="Année de l'enquête")
+    parser.add_argument(
+        "--dataset", default="data/survey", help="Racine du jeu partitionné (data/survey)"
+    )
+    args = parser.parse_args()
+
+    written = write_survey_year(
+        pd.read_csv(args.csv_path, index_col="Unnamed: 0"), args.dataset, args.year
+    )
+    print(f"Année {args.year} écrite dans {written}")
@@ -1,16 +1,212 @@
 """
 Ce module définit des fonctions utiles pour le prétraitement des données
+
+Les fonctions de prétraitement sont écrites avec narwhals : elles acceptent indifféremment un
+DataFrame pandas ou Polars et renvoient un DataFrame du même type. On peut ainsi utiliser le
+moteur multi-threadé de Polars pour les traitements, et pandas pour l'affichage Streamlit.
 """
 
+from functools import lru_cache
+import threading
+import weakref
+
+import narwhals as nw
+from narwhals.dependencies import is_pandas_dataframe, is_polars_dataframe
+import numpy as np
 import pandas as pd
 
-from bs4 import BeautifulSoup
-import requests
+from src.metrics import timed_function
+
+
+# Libellés du statut d'emploi et dictionnaires de traduction, par langue
+DEFAULT_LOCALE = "fr"
+
+LOCALE_EMPLOYMENT_LABELS = {
+    "fr": ["Sans emploi", "En emploi"],
+    "en": ["Unemployed", "Employed"],
+}
+
+LOCALE_TRANSLATIONS = {
+    "fr": {
+        "Age": {"<35": "Moins de 35 ans", ">35": "Plus de 35 ans"},
+        "Accessibility": {"No": "Non", "Yes": "Oui"},
+        "EdLevel": {
+            "NoHigherEd": "Pas d'éducation supérieure",
+            "Undergraduate": "Licence",
+            "Master": "Master",
+            "PhD": "Doctorat",
+            "Other": "Autre",
+        },
+        "Gender": {"Man": "Homme", "Woman": "Femme", "NonBinary": "Non-Binaire"},
+        "MentalHealth": {"No": "Non", "Yes": "Oui"},
+        "MainBranch": {"Dev": "Développement", "NotDev": "Autre"},
+    },
+    "en": {
+        "Age": {"<35": "Under 35", ">35": "35 and over"},
+        "Accessibility": {"No": "No", "Yes": "Yes"},
+        "EdLevel": {
+            "NoHigherEd": "No higher education",
+            "Undergraduate": "Undergraduate",
+            "Master": "Master",
+            "PhD": "PhD",
+            "Other": "Other",
+        },
+        "Gender": {"Man": "Man", "Woman": "Woman", "NonBinary": "Non-binary"},
+        "MentalHealth": {"No": "No", "Yes": "Yes"},
+        "MainBranch": {"Dev": "Developer", "NotDev": "Other"},
+    },
+}
+
+EMPLOYMENT_LABELS = LOCALE_EMPLOYMENT_LABELS[DEFAULT_LOCALE]
+LABELS_TRANSLATIONS = LOCALE_TRANSLATIONS[DEFAULT_LOCALE]
+
+# Vues traduites déjà calculées, par DataFrame source (id) puis par langue. Le verrou global
+# protège la création des entrées, celui de chaque entrée le calcul de ses vues (les sessions
+# Streamlit appellent `labels_translation` depuis plusieurs threads)
+_translation_cache = {}
+_translation_cache_lock = threading.Lock()
+
+
+def _as_ordered_categorical(frame, col, categories):
+    """
+    Convertit une colonne en catégorielle ordonnée (Enum Polars ou Categorical pandas).
+
+    narwhals 1.34 ne sait pas créer de catégorielle ordonnée : la conversion est faite avec la
+    bibliothèque d'origine du DataFrame.
+    """
+    native = frame.to_native()
+    if is_polars_dataframe(native):
+        import polars as pl
+
+        native = native.with_columns(pl.col(col).cast(pl.Enum(categories)))
+    else:
+        native = native.assign(
+            **{col: pd.Categorical(native[col], categories=categories, ordered=True)}
+        )
+
+    return nw.from_native(native, eager_only=True)
+
+
+def _employment_status(column, labels):
+    """
+    Expression associant les labels [label_pour_0, label_pour_1] à une colonne binaire,
+    sur les intervalles ]-1, 0] et ]0, 1] (comme `pd.cut(bins=[-1, 0, 1])`).
+    """
+    col = nw.col(column)
+    return (
+        nw.when((col > -1) & (col <= 0))
+        .then(nw.lit(labels[0]))
+        .otherwise(nw.when((col > 0) & (col <= 1)).then(nw.lit(labels[1])))
+    )
+
+
+def _mapped(column, mapping, return_dtype=None):
+    """
+    Expression équivalente à `Series.map(mapping)` : les valeurs absentes du dictionnaire, ou
+    associées à une valeur manquante, deviennent nulles.
+    """
+    mapping = {
+        key: value for key, value in mapping.items() if not pd.isna(key) and not pd.isna(value)
+    }
+    col = nw.col(column)
+    return (
+        nw.when(col.is_in(list(mapping)))
+        .then(col)
+        .replace_strict(list(mapping), list(mapping.values()), return_dtype=return_dtype)
+    )
+
+
+def _translated(column, mapping):
+    """
+    Expression équivalente à `Series.replace(mapping)` : les valeurs absentes du dictionnaire
+    sont conservées.
+    """
+    col = nw.col(column)
+    return nw.when(col.is_in(list(mapping))).then(_mapped(column, mapping)).otherwise(col)
 
 
-def labels_translation(df):
+def _translated_frame(df, locale):
+    """
+    Traduction générique (narwhals) : utilisée pour les DataFrames autres que pandas.
     """
-    Translates and categorizes specific columns in a DataFrame from English to French.
+    labels = LOCALE_EMPLOYMENT_LABELS[locale]
+    frame = nw.from_native(df, eager_only=True)
+
+    # Nouvelle variable catégorisée pour Employed
+    frame = frame.with_columns(_employment_status("Employed", labels).alias("EmployedCat"))
+    frame = _as_ordered_categorical(frame, "EmployedCat", labels)
+
+    # Application des remplacements
+    frame = frame.with_columns(
+        *[
+            _translated(col, mapping).alias(col)
+            for col, mapping in LOCALE_TRANSLATIONS[locale].items()
+            if col in frame.columns
+        ]
+    )
+
+    return frame.to_native()
+
+
+def _categorical_base(df):
+    """
+    Codes catégoriels des colonnes à traduire et du statut d'emploi d'un DataFrame pandas.
+
+    C'est la seule étape qui parcourt les lignes : elle est faite une fois par DataFrame source,
+    quelle que soit la langue demandée. Les modalités suivent l'ordre des dictionnaires de
+    traduction (les modalités inconnues sont ajoutées à la fin), un ordre identique dans toutes
+    les langues.
+    """
+    columns = {}
+    for col, mapping in LOCALE_TRANSLATIONS[DEFAULT_LOCALE].items():
+        if col not in df.columns:
+            continue
+        observed = set(df[col].dropna().unique())
+        categories = [cat for cat in mapping if cat in observed] + sorted(
+            observed.difference(mapping), key=str
+        )
+        columns[col] = pd.Categorical(df[col], categories=categories)
+
+    # Codes du statut d'emploi sur les intervalles ]-1, 0] et ]0, 1]
+    employed = df["Employed"].to_numpy(dtype=float, na_value=np.nan)
+    employed_codes = np.select(
+        [(employed > -1) & (employed <= 0), (employed > 0) & (employed <= 1)], [0, 1], -1
+    ).astype(np.int8)
+
+    return columns, employed_codes
+
+
+def _translated_view(df, base, locale):
+    """
+    Vue traduite d'un DataFrame pandas : seules les modalités des colonnes catégorielles sont
+    renommées, les autres colonnes sont partagées avec le DataFrame source.
+    """
+    columns, employed_codes = base
+    view = df.copy(deep=False)
+
+    view["EmployedCat"] = pd.Categorical.from_codes(
+        employed_codes,
+        categories=LOCALE_EMPLOYMENT_LABELS[locale],
+        ordered=True,
+        validate=False,
+    )
+    for col, categorical in columns.items():
+        mapping = LOCALE_TRANSLATIONS[locale][col]
+        view[col] = pd.Categorical.from_codes(
+            categorical.codes,
+            categories=[mapping.get(cat, cat) for cat in categorical.categories],
+            ordered=categorical.ordered,
+            validate=False,
+        )
+
+    return view
+
+
+@timed_function
+def labels_translation(df, locale=DEFAULT_LOCALE):
+    """
+    Translates and categorizes specific columns in a DataFrame from English to French (or
+    to English display labels).
 
     This function performs the following operations:
     1. Creates a new categorical variable 'EmployedCat' from the 'Employed' column:
@@ -25,55 +221,74 @@ def labels_translation(df):
        - "MentalHealth": "No" → "Non", "Yes" → "Oui"
        - "MainBranch": "Dev" → "Développement", "NotDev" → "Autre"
 
+    The input DataFrame is never modified. For pandas, the translated columns are categorical:
+    they are encoded once per source DataFrame, then each locale only renames the categories
+    and shares every other column with the source. Results are cached per source DataFrame and
+    per locale, so switching language does not scan the data again. For pandas, each call
+    returns a shallow copy of the cached view: adding or replacing columns does not affect
+    other callers, but the values are shared and must not be modified in place.
+
     Args:
     ----------
-    df : pandas.DataFrame
+    df : pandas.DataFrame or polars.DataFrame
         The input DataFrame containing the columns to be translated.
+    locale : str, optional
+        Language of the labels: "fr" (default) or "en".
 
     Returns:
     -------
-    pandas.DataFrame
-        The DataFrame with translated values and a new 'EmployedCat' column.
+    pandas.DataFrame or polars.DataFrame
+        A DataFrame of the same type, with translated values and a new 'EmployedCat'
+        column (ordered categorical).
     """
-
-    # Nouvelle variable catégorisée pour Employed
-    df["EmployedCat"] = pd.cut(
-        df["Employed"], bins=[-1, 0, 1], labels=["Sans emploi", "En emploi"]
-    )
-
-    # Dictionnaire de traduction
-    translations = {
-        "Age": {"<35": "Moins de 35 ans", ">35": "Plus de 35 ans"},
-        "Accessibility": {"No": "Non", "Yes": "Oui"},
-        "EdLevel": {
-            "NoHigherEd": "Pas d'éducation supérieure",
-            "Undergraduate": "Licence",
-            "Master": "Master",
-            "PhD": "Doctorat",
-            "Other": "Autre",
-        },
-        "Gender": {"Man": "Homme", "Woman": "Femme", "NonBinary": "Non-Binaire"},
-        "MentalHealth": {"No": "Non", "Yes": "Oui"},
-        "MainBranch": {"Dev": "Développement", "NotDev": "Autre"},
-    }
-
-    # Application des remplacements
-    df.replace(translations, inplace=True)
-
-    return df
+    if locale not in LOCALE_TRANSLATIONS:
+        raise ValueError(
+            f"Langue inconnue : {locale!r}. Valeurs possibles : {list(LOCALE_TRANSLATIONS)}"
+        )
+
+    key = id(df)
+    with _translation_cache_lock:
+        entry = _translation_cache.get(key)
+        if entry is None:
+            entry = _translation_cache[key] = {
+                "base": None,
+                "views": {},
+                "lock": threading.Lock(),
+            }
+            # Le cache est vidé dès que le DataFrame source est libéré
+            weakref.finalize(df, _translation_cache.pop, key, None)
+
+    with entry["lock"]:
+        if locale not in entry["views"]:
+            if is_pandas_dataframe(df):
+                if entry["base"] is None:
+                    entry["base"] = _categorical_base(df)
+                entry["views"][locale] = _translated_view(df, entry["base"], locale)
+            else:
+                entry["views"][locale] = _translated_frame(df, locale)
+        view = entry["views"][locale]
+
+    # Les DataFrames Polars sont immuables ; une vue pandas est copiée sans ses données
+    return view.copy(deep=False) if is_pandas_dataframe(view) else view
 
 
 # Enrichissement des données
 
 
+@timed_function
+@lru_cache(maxsize=4)
 def get_iso_country_codes(url):
     """
-    Retrieves ISO country code table from iban.com.
+    Retrieves ISO country code table from iban.com. The table is fetched once per process and
+    URL.
 
     Returns:
         pd.DataFrame: A DataFrame containing the columns 'Country', 'Alpha-2 code',
                       Alpha-3 code', and 'Numeric code'.
     """
+    from bs4 import BeautifulSoup
+    import requests
+
     response = requests.get(url)
     soup = BeautifulSoup(response.text, "html.parser")
 
@@ -85,19 +300,23 @@ def get_iso_country_codes(url):
     return pd.DataFrame(data, columns=headers)
 
 
+@timed_function
 def add_iso_codes(df, iso_df):
     """
     Adds an 'ISO' column to the `df` DataFrame containing ISO alpha-3 country codes.
 
     Args:
-        df (pd.DataFrame): The DataFrame to be enriched.
-        iso_df (pd.DataFrame): The ISO code DataFrame, with 'Country' and
+        df (pd.DataFrame or pl.DataFrame): The DataFrame to be enriched.
+        iso_df (pd.DataFrame or pl.DataFrame): The ISO code DataFrame, with 'Country' and
         and 'Alpha-3 code' columns.
 
     Returns:
-        pd.DataFrame: The DataFrame enriched with an 'ISO' column.
+        pd.DataFrame or pl.DataFrame: The DataFrame enriched with an 'ISO' column.
     """
-    iso_dict = iso_df.set_index("Country")["Alpha-3 code"].to_dict()
+    iso_frame = nw.from_native(iso_df, eager_only=True)
+    iso_dict = dict(
+        zip(iso_frame["Country"].to_list(), iso_frame["Alpha-3 code"].to_list())
+    )
 
     # Ajout manuel de valeurs manquantes
     manual_iso = {
@@ -135,22 +354,23 @@ def add_iso_codes(df, iso_df):
     }
 
     iso_dict.update(manual_iso)
-    df["ISO"] = df["Country"].map(iso_dict)
+    frame = nw.from_native(df, eager_only=True)
 
-    return df
+    return frame.with_columns(_mapped("Country", iso_dict).alias("ISO")).to_native()
 
 
+@timed_function
 def add_continent_info(df, path_to_excel):
     """
     Adds a 'Continent' column to the DataFrame from an Excel file
     file listing countries and continents.
 
     Args:
-        df (pd.DataFrame): The DataFrame to be enriched.
+        df (pd.DataFrame or pl.DataFrame): The DataFrame to be enriched.
         path_to_excel (str): Path to Excel file containing continent table.
 
     Returns:
-        pd.DataFrame: The DataFrame enriched with the 'Continent' column.
+        pd.DataFrame or pl.DataFrame: The DataFrame enriched with the 'Continent' column.
     """
     cont_pays = pd.read_excel(path_to_excel, skiprows=1)
     continents_dict = cont_pays.set_index("Country")["Continental Region"].to_dict()
@@ -189,31 +409,25 @@ def add_continent_info(df, path_to_excel):
     }
 
     continents_dict.update(manual_continents)
-    df["Continent"] = df["Country"].map(continents_dict)
 
     # Regroupement des sous-régions
-    df["Continent"] = df["Continent"].replace(
-        [
-            "Africa",
-            "Asia (East)",
-            "Asia (South)",
-            "Asia (West)",
-            "North,Central America",
-            "South America",
-            "Oceania",
-        ],
-        [
-            "Afrique",
-            "Asie",
-            "Asie",
-            "Asie",
-            "Amérique du Nord et Centrale",
-            "Amérique du Sud",
-            "Océanie",
-        ],
-    )
+    regions = {
+        "Africa": "Afrique",
+        "Asia (East)": "Asie",
+        "Asia (South)": "Asie",
+        "Asia (West)": "Asie",
+        "North,Central America": "Amérique du Nord et Centrale",
+        "South America": "Amérique du Sud",
+        "Oceania": "Océanie",
+    }
+    continents_dict = {
+        country: regions.get(continent, continent)
+        for country, continent in continents_dict.items()
+    }
 
-    return df
+    frame = nw.from_native(df, eager_only=True)
+
+    return frame.with_columns(_mapped("Country", continents_dict).alias("Continent")).to_native()
 
 
 # Ajout de diverses variables mesurant le niveau de développement des pays
@@ -222,11 +436,11 @@ def add_hdi_info(df, path_to_excel):
     Adds the Human Development Index (HDI/HDI) to the DataFrame from an Excel file.
 
     Args:
-        df (pd.DataFrame): The DataFrame containing a 'Country' column.
+        df (pd.DataFrame or pl.DataFrame): The DataFrame containing a 'Country' column.
         path_to_excel (str): Path to Excel file containing HDI data.
 
     Returns:
-        pd.DataFrame: The DataFrame enriched with an 'HDI' column.
+        pd.DataFrame or pl.DataFrame: The DataFrame enriched with an 'HDI' column.
     """
 
     # Lecture des colonnes nécessaires
@@ -275,9 +489,11 @@ def add_hdi_info(df, path_to_excel):
     hdi_dict.update(manual_hdi)
 
     # Mapping
-    df["HDI"] = df["Country"].map(hdi_dict)
+    frame = nw.from_native(df, eager_only=True)
 
-    return df
+    return frame.with_columns(
+        _mapped("Country", hdi_dict, return_dtype=nw.Float64).alias("HDI")
+    ).to_native()
 
 
 def add_life_expectancy(df, path_to_excel):
@@ -285,11 +501,11 @@ def add_life_expectancy(df, path_to_excel):
     Adds life expectancy at birth to the DataFrame from an Excel file.
 
     Args:
-        df (pd.DataFrame): The DataFrame containing a 'Country' column.
+        df (pd.DataFrame or pl.DataFrame): The DataFrame containing a 'Country' column.
         path_to_excel (str): Path to Excel file containing data.
 
     Returns:
-        pd.DataFrame: The DataFrame enriched with a 'LifeExpectancy' column.
+        pd.DataFrame or pl.DataFrame: The DataFrame enriched with a 'LifeExpectancy' column.
     """
 
     # Chargement des données
@@ -337,9 +553,11 @@ def add_life_expectancy(df, path_to_excel):
     le_dict.update(manual_life_exp)
 
     # Mapping
-    df["LifeExpectancy"] = df["Country"].map(le_dict)
+    frame = nw.from_native(df, eager_only=True)
 
-    return df
+    return frame.with_columns(
+        _mapped("Country", le_dict, return_dtype=nw.Float64).alias("LifeExpectancy")
+    ).to_native()
 
 
 def add_expected_schooling(df, path_to_excel):
@@ -347,11 +565,11 @@ def add_expected_schooling(df, path_to_excel):
     Adds the expected years of education to the DataFrame from an Excel file.
 
     Args:
-        df (pd.DataFrame): The DataFrame containing a 'Country' column.
+        df (pd.DataFrame or pl.DataFrame): The DataFrame containing a 'Country' column.
         path_to_excel (str): Path to Excel file containing data.
 
     Returns:
-        pd.DataFrame: The DataFrame enriched with an 'ExpectedSchooling' column.
+        pd.DataFrame or pl.DataFrame: The DataFrame enriched with an 'ExpectedSchooling' column.
     """
     # Chargement des données
     infos_pays = pd.read_excel(
@@ -397,9 +615,11 @@ def add_expected_schooling(df, path_to_excel):
 
     eys_dict.update(manual_schooling)
 
-    df["ExpectedSchooling"] = df["Country"].map(eys_dict)
+    frame = nw.from_native(df, eager_only=True)
 
-    return df
+    return frame.with_columns(
+        _mapped("Country", eys_dict, return_dtype=nw.Float64).alias("ExpectedSchooling")
+    ).to_native()
 
 
 def add_gni_per_capita(df, path_to_excel):
@@ -407,11 +627,11 @@ def add_gni_per_capita(df, path_to_excel):
     Adds gross national income (GNI) per capita to the DataFrame.
 
     Args:
-        df (pd.DataFrame): The DataFrame containing a 'Country' column.
+        df (pd.DataFrame or pl.DataFrame): The DataFrame containing a 'Country' column.
         path_to_excel (str): Path to Excel file containing data.
 
     Returns:
-        pd.DataFrame: The DataFrame enriched with a 'GNIperCapita' column.
+        pd.DataFrame or pl.DataFrame: The DataFrame enriched with a 'GNIperCapita' column.
     """
 
     # Chargement des données
@@ -460,43 +680,55 @@ def add_gni_per_capita(df, path_to_excel):
 
     gnipc_dict.update(manual_gni)
 
-    df["GNIperCapita"] = df["Country"].map(gnipc_dict)
+    frame = nw.from_native(df, eager_only=True)
 
-    return df
+    return frame.with_columns(
+        _mapped("Country", gnipc_dict, return_dtype=nw.Float64).alias("GNIperCapita")
+    ).to_native()
 
 
+@timed_function
 def compute_top_languages_count(df, source_col, top_languages_list, new_col="TopLanguagesCount"):
     """
     Adds a column to the DataFrame (df) that counts how many langages from the top are known.
     
     Parameters :
-        df (DataFrame): le dataframe d'origine
+        df (DataFrame): le dataframe d'origine (pandas ou Polars)
         source_col (str): nom de la colonne contenant les langages séparés par des ';'
         top_languages_list (list): liste des langages à compter
         new_col (str): nom de la nouvelle colonne à créer
 
     Returns:
-        DataFrame: le dataframe avec deux colonnes supplémentaires : une liste et un compte
+        DataFrame: un nouveau dataframe, du même type, avec la colonne de compte supplémentaire
     """
-    df = df.copy()
-    df["LanguagesList"] = df[source_col].apply(
-        lambda x: [] if pd.isna(x) else [lang.strip() for lang in x.split(";")]
-    )
+    frame = nw.from_native(df, eager_only=True)
 
-    df[new_col] = df["LanguagesList"].apply(
-        lambda langlist: sum(lang in top_languages_list for lang in langlist)
+    # Liste normalisée ";lang1;lang2;" (espaces autour des séparateurs supprimés)
+    languages = nw.concat_str(
+        [
+            nw.lit(";"),
+            nw.col(source_col).fill_null("").str.replace_all(r"\s*;\s*", ";").str.strip_chars(),
+            nw.lit(";"),
+        ]
     )
 
-    return df
+    known = [
+        languages.str.contains(f";{lang};", literal=True).cast(nw.Int64)
+        for lang in top_languages_list
+    ]
+    count = nw.sum_horizontal(*known) if known else nw.lit(0)
 
+    return frame.with_columns(count.alias(new_col)).to_native()
 
+
+@timed_function
 def group_percentage_by(df, group_cols, count_col_name="count", percent_col_name="percentage"):
     """
     Computes the count and percentage distribution of observations across subgroups in a DataFrame.
 
     Parameters
     ----------
-    df : pandas.DataFrame
+    df : pandas.DataFrame or polars.DataFrame
         The input DataFrame containing the data to be grouped and analyzed.
 
     group_cols : list of str
@@ -513,38 +745,47 @@ def group_percentage_by(df, group_cols, count_col_name="count", percent_col_name
 
     Returns
     -------
-    pandas.DataFrame
-        A DataFrame with the group columns, counts, and percentage values for each subgroup.
+    pandas.DataFrame or polars.DataFrame
+        A DataFrame of the same type with the group columns, counts, and percentage values for
+        each subgroup, sorted by the group columns.
     """
+    frame = nw.from_native(df, eager_only=True)
+
     # Calcul du nombre d'éléments dans chaque groupe
-    grouped_df = (
-        df.groupby(group_cols, observed=True)
-        .size()
-        .reset_index(name=count_col_name)
+    grouped_df = frame.group_by(group_cols, drop_null_keys=True).agg(
+        nw.len().alias(count_col_name)
     )
 
     # Calcul du total par le premier niveau de regroupement
-    total_counts = df.groupby(group_cols[0]).size()
+    total_counts = frame.group_by(group_cols[0], drop_null_keys=True).agg(
+        nw.len().alias("_total")
+    )
 
-    # Ajout du pourcentage
-    grouped_df[percent_col_name] = (
-        grouped_df[count_col_name] / grouped_df[group_cols[0]].map(total_counts) * 100
-    ).round(1)
+    # Ajout du pourcentage (la jointure à gauche conserve l'ordre des groupes)
+    grouped_df = (
+        grouped_df.sort(group_cols)
+        .join(total_counts, on=group_cols[0], how="left")
+        .with_columns(
+            (nw.col(count_col_name) / nw.col("_total") * 100).round(1).alias(percent_col_name)
+        )
+        .drop("_total")
+    )
 
-    return grouped_df
+    return grouped_df.to_native()
 
 
+@timed_function
 def categorize_employment_status(
     df, column="Employed",
     new_col="EmployedCat",
-    labels=["Sans emploi", "En emploi"]
+    labels=EMPLOYMENT_LABELS
 ):
     """
     Converts a binary employment column into a categorical column with readable labels.
 
     Parameters
     ----------
-    df : pandas.DataFrame
+    df : pandas.DataFrame or polars.DataFrame
         The DataFrame containing the column to transform.
 
     column : str, optional
@@ -558,14 +799,9 @@ def categorize_employment_status(
 
     Returns
     -------
-    pandas.DataFrame
-        A copy of the original DataFrame with the new categorical column added.
+    pandas.DataFrame or polars.DataFrame
+        A copy of the original DataFrame with the new label column added.
     """
-    df_copy = df.copy()
-    df_copy[new_col] = pd.cut(
-        df_copy[column],
-        bins=[-1, 0, 1],
-        labels=labels
-    ).astype("object")
+    frame = nw.from_native(df, eager_only=True)
 
-    return df_copy
+    return frame.with_columns(_employment_status(column, labels).alias(new_col)).to_native()
@@ -0,0 +1,267 @@
+"""
+Ce module calcule les statistiques descriptives des synthèses automatisées des pages.
+
+Toutes les grandeurs commentées (parts des modalités des variables catégorielles, moyennes et
+quantiles des variables numériques, langages les plus cités, répartition par continent) sont
+obtenues en un seul parcours des données, lues par morceaux. Le résumé obtenu est conservé en
+mémoire pour chaque version du jeu de données : les pages mettent en forme leurs commentaires à
+partir de ce résumé, sans reparcourir les lignes.
+"""
+
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from src.chunked_aggregation import DEFAULT_CHUNKSIZE, PartialCounts
+from src.data_loading import dataset_version, iter_survey_batches
+from src.data_preprocessing import add_continent_info, labels_translation
+from src.metrics import timed_function
+
+CATEGORICAL_COLS = ["Age", "Gender", "EdLevel", "MainBranch"]
+NUMERIC_COLS = ["ComputerSkills", "YearsCode", "YearsCodePro", "PreviousSalary"]
+LANGUAGES_COL = "HaveWorkedWith"
+QUANTILES = (0.25, 0.5, 0.75)
+
+# Nombre de langages codés par mot de 64 bits dans les masques de langages
+_WORD_BITS = 64
+
+
+def _weighted_quantile(values, counts, q):
+    """
+    Quantile d'une distribution donnée par ses valeurs triées et leurs effectifs.
+
+    L'interpolation est linéaire, comme `Series.quantile` sur les données complètes.
+    """
+    cumulative = np.cumsum(counts)
+    position = q * (cumulative[-1] - 1)
+    lower = values[np.searchsorted(cumulative, np.floor(position), side="right")]
+    upper = values[np.searchsorted(cumulative, np.ceil(position), side="right")]
+
+    return float(lower + (upper - lower) * (position - np.floor(position)))
+
+
+class SurveySummary:
+    """
+    Résumé descriptif des données de l'enquête, alimenté morceau par morceau.
+
+    Parameters
+    ----------
+    categorical_cols : list of str, optional
+        Variables catégorielles dont on compte les modalités (libellés traduits).
+    numeric_cols : list of str, optional
+        Variables numériques dont on conserve la distribution des valeurs.
+    languages_col : str, optional
+        Colonne des langages, séparés par des ';'.
+    version : str, optional
+        Version des données à partir desquelles le résumé a été construit.
+    """
+
+    def __init__(
+        self,
+        categorical_cols=CATEGORICAL_COLS,
+        numeric_cols=NUMERIC_COLS,
+        languages_col=LANGUAGES_COL,
+        version=None,
+    ):
+        self.categorical_cols = list(categorical_cols)
+        self.numeric_cols = list(numeric_cols)
+        self.languages_col = languages_col
+        self.version = version
+        self.n_respondents = 0
+        self.category_counts = {col: pd.Series(dtype="int64") for col in self.categorical_cols}
+        # Distribution des valeurs (valeur -> effectif) : moyennes et quantiles exacts
+        self.value_counts = {col: pd.Series(dtype="int64") for col in self.numeric_cols}
+        self.language_counts = Counter()
+        # Ensembles de langages des répondants, codés en masques de bits (masque -> effectif)
+        self.language_sets = Counter()
+        self._language_bits = {}
+        self._country_counts = PartialCounts(["Country"], value_col="Employed")
+        self.continents = None
+
+    def update(self, chunk):
+        """
+        Ajoute un morceau de données (libellés traduits) au résumé.
+        """
+        self.n_respondents += len(chunk)
+
+        for col in self.categorical_cols:
+            if col in chunk:
+                counts = chunk[col].value_counts(sort=False).astype("int64")
+                self.category_counts[col] = self.category_counts[col].add(
+                    counts[counts > 0], fill_value=0
+                )
+
+        for col in self.numeric_cols:
+            if col in chunk:
+                values = pd.to_numeric(chunk[col], errors="coerce").value_counts(sort=False)
+                self.value_counts[col] = self.value_counts[col].add(values, fill_value=0)
+
+        if self.languages_col in chunk:
+            self._update_languages(chunk[self.languages_col])
+
+        if {"Country", "Employed"} <= set(chunk.columns):
+            self._country_counts.update(chunk)
+
+        return self
+
+    def _update_languages(self, languages):
+        # Indicatrices des langages, avec la même normalisation que compute_top_languages_count
+        dummies = (
+            languages.str.replace(r"\s*;\s*", ";", regex=True).str.strip().str.get_dummies(";")
+        )
+        for lang, count in dummies.sum().items():
+            self.language_counts[lang] += int(count)
+            self._language_bits.setdefault(lang, len(self._language_bits))
+
+        bits = np.array([self._language_bits[lang] for lang in dummies.columns], dtype=np.int64)
+        indicators = dummies.to_numpy(dtype=np.uint64)
+        n_words = int(bits.max()) // _WORD_BITS + 1 if len(bits) else 1
+        words = np.zeros((len(dummies), n_words), dtype=np.uint64)
+        for word in range(n_words):
+            in_word = bits // _WORD_BITS == word
+            weights = np.left_shift(np.uint64(1), (bits[in_word] % _WORD_BITS).astype(np.uint64))
+            words[:, word] = indicators[:, in_word] @ weights
+
+        unique_words, counts = np.unique(words, axis=0, return_counts=True)
+        for row, count in zip(unique_words.tolist(), counts.tolist()):
+            mask = sum(int(w) << (_WORD_BITS * i) for i, w in enumerate(row))
+            self.language_sets[mask] += count
+
+    def finalize(self, countries_lang_data_path=None):
+        """
+        Termine le résumé : ajoute la répartition par continent si le fichier des pays est fourni.
+        """
+        if countries_lang_data_path is not None and self._country_counts.totals:
+            countries = add_continent_info(
+                self._country_counts.to_frame(), countries_lang_data_path
+            )
+            continents = (
+                countries.groupby("Continent", observed=True)[["count", "sum"]]
+                .sum()
+                .sort_values("count", ascending=False)
+                .reset_index()
+            )
+            self.continents = pd.DataFrame(
+                {
+                    "Continent": continents["Continent"],
+                    "count": continents["count"].astype("int64"),
+                    "share": (100 * continents["count"] / continents["count"].sum()).round(1),
+                    "employment_rate": (100 * continents["sum"] / continents["count"]).round(2),
+                }
+            )
+
+        return self
+
+    def shares(self, col):
+        """
+        Parts (entre 0 et 1) des modalités d'une variable catégorielle, de la plus fréquente à
+        la moins fréquente : équivalent de `value_counts(normalize=True)`.
+        """
+        counts = self.category_counts[col]
+        return (counts / counts.sum()).sort_values(ascending=False, kind="stable")
+
+    def mean(self, col):
+        """Moyenne d'une variable numérique (valeurs manquantes exclues)."""
+        counts = self.value_counts[col]
+        return float((counts.index * counts).sum() / counts.sum())
+
+    def quantiles(self, col, q=QUANTILES):
+        """
+        Quantiles d'une variable numérique.
+
+        Returns
+        -------
+        dict
+            {quantile: valeur}.
+        """
+        counts = self.value_counts[col].sort_index()
+        values, weights = counts.index.to_numpy(dtype=float), counts.to_numpy()
+        return {p: _weighted_quantile(values, weights, p) for p in q}
+
+    def top_languages(self, n=10):
+        """
+        Les `n` langages les plus cités, avec leur nombre d'occurrences.
+
+        Returns
+        -------
+        list of tuple
+            [(langage, nombre d'occurrences), ...], du plus au moins cité.
+        """
+        return self.language_counts.most_common(n)
+
+    def language_share(self, lang):
+        """Part (entre 0 et 1) des répondants ayant cité le langage."""
+        return self.language_counts.get(lang, 0) / self.n_respondents
+
+    def top_languages_competence(self, n=10):
+        """
+        Nombre de langages maîtrisés parmi les `n` plus cités (mesure alternative des
+        compétences, voir `compute_top_languages_count`).
+
+        Returns
+        -------
+        float
+            Nombre moyen de langages maîtrisés parmi les `n` plus cités.
+        float
+            Part (entre 0 et 1) des répondants en maîtrisant au moins un.
+        """
+        top_mask = sum(1 << self._language_bits[lang] for lang, _ in self.top_languages(n))
+        known = at_least_one = 0
+        for mask, count in self.language_sets.items():
+            n_known = (mask & top_mask).bit_count()
+            known += count * n_known
+            at_least_one += count if n_known else 0
+
+        return known / self.n_respondents, at_least_one / self.n_respondents
+
+
+@lru_cache(maxsize=4)
+def _build_survey_summary(survey_source, countries_lang_data_path, chunksize, years, *versions):
+    """
+    Construit le résumé en un seul parcours des données, une fois par version des fichiers.
+    """
+    summary = SurveySummary(version="-".join([str(years), *versions]))
+    columns = CATEGORICAL_COLS + NUMERIC_COLS + [LANGUAGES_COL, "Country", "Employed"]
+
+    for chunk in iter_survey_batches(
+        survey_source, years=years, columns=columns, batch_size=chunksize
+    ):
+        summary.update(labels_translation(chunk))
+
+    return summary.finalize(countries_lang_data_path)
+
+
+@timed_function
+def load_survey_summary(
+    survey_source, countries_lang_data_path=None, chunksize=DEFAULT_CHUNKSIZE, years=None
+):
+    """
+    Renvoie le résumé descriptif associé à la version courante des fichiers de données.
+
+    Le résumé est construit au premier appel puis conservé en mémoire pour toute la durée du
+    processus, tant que les fichiers sources ne changent pas.
+
+    Args:
+        survey_source (str): Chemin ou URL du CSV StackOverflow, ou répertoire du jeu
+            Parquet partitionné par année.
+        countries_lang_data_path (str, optional): Chemin ou URL du fichier Excel des pays,
+            nécessaire pour la répartition par continent.
+        chunksize (int): Nombre de lignes lues à la fois, pour borner la mémoire utilisée.
+        years (list of int, optional): Années de l'enquête à résumer. Par défaut, toutes.
+
+    Returns:
+        SurveySummary: Le résumé descriptif.
+    """
+    versions = [dataset_version(survey_source)]
+    if countries_lang_data_path is not None:
+        versions.append(dataset_version(countries_lang_data_path))
+
+    return _build_survey_summary(
+        survey_source,
+        countries_lang_data_path,
+        chunksize,
+        None if years is None else tuple(sorted(years)),
+        *versions,
+    )
@@ -0,0 +1,206 @@
+"""
+Ce module calcule des intervalles de confiance bootstrap pour les ratios d'équité de dalex.
+
+Plutôt que de ré-échantillonner les lignes, on construit une seule fois la table de contingence
+groupe × label × prédiction, puis chaque ré-échantillon bootstrap est tiré comme un vecteur de
+comptes multinomial sur les cellules de cette table. Tous les ré-échantillons sont traités en une
+seule opération vectorisée NumPy, répartie sur plusieurs threads.
+"""
+
+import os
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Métriques utilisées par le fairness check de dalex
+FAIRNESS_METRICS = ["TPR", "ACC", "PPV", "FPR", "STP"]
+
+# Règle des quatre cinquièmes
+EPSILON = 0.8
+
+
+def contingency_table(y_true, y_pred, protected, cutoff=0.5):
+    """
+    Construit la table de contingence groupe × label × prédiction.
+
+    Paramètres
+    ----------
+    y_true : array-like
+        Labels observés (0 ou 1).
+    y_pred : array-like
+        Probabilités prédites, seuillées à `cutoff` comme dans dalex.
+    protected : array-like
+        Valeurs de la variable protégée.
+    cutoff : float, optional
+        Seuil de décision (0.5 par défaut, comme dans `model_fairness`).
+
+    Retourne
+    --------
+    subgroups : numpy.ndarray
+        Modalités de la variable protégée, triées.
+    counts : numpy.ndarray
+        Comptes de forme (n_groupes, 2, 2) indexés par [groupe, label, prédiction].
+    """
+    y_true = np.asarray(y_true).astype(int)
+    y_hat = (np.asarray(y_pred) >= cutoff).astype(int)
+    subgroups, group_idx = np.unique(np.asarray(protected), return_inverse=True)
+
+    cells = group_idx * 4 + y_true * 2 + y_hat
+    counts = np.bincount(cells, minlength=len(subgroups) * 4)
+
+    return subgroups, counts.reshape(len(subgroups), 2, 2)
+
+
+def metrics_from_counts(counts):
+    """
+    Calcule les métriques de dalex à partir de comptes de confusion, de façon vectorisée.
+
+    Paramètres
+    ----------
+    counts : numpy.ndarray
+        Comptes de forme (..., n_groupes, 2, 2) indexés par [label, prédiction].
+
+    Retourne
+    --------
+    numpy.ndarray
+        Métriques de forme (..., n_groupes, 5), dans l'ordre de `FAIRNESS_METRICS`.
+        Les métriques non définies (dénominateur nul) valent NaN.
+    """
+    counts = counts.astype(float)
+    tn = counts[..., 0, 0]
+    fp = counts[..., 0, 1]
+    fn = counts[..., 1, 0]
+    tp = counts[..., 1, 1]
+    total = tn + fp + fn + tp
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        metrics = np.stack(
+            [
+                tp / (tp + fn),
+                (tp + tn) / total,
+                tp / (tp + fp),
+                fp / (fp + tn),
+                (tp + fp) / total,
+            ],
+            axis=-1,
+        )
+
+    return metrics
+
+
+def metric_ratios(metrics, privileged_index):
+    """
+    Divise les métriques de chaque groupe par celles du groupe privilégié.
+
+    Comme dans dalex, les ratios nuls ou infinis sont remplacés par NaN.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratios = metrics / metrics[..., privileged_index : privileged_index + 1, :]
+    ratios[(ratios == 0) | np.isinf(ratios)] = np.nan
+
+    return ratios
+
+
+def _bootstrap_ratios(probabilities, n_obs, n_resamples, privileged_index, n_groups, seed):
+    """
+    Tire `n_resamples` vecteurs de comptes multinomiaux et calcule les ratios associés.
+    """
+    rng = np.random.default_rng(seed)
+    resampled = rng.multinomial(n_obs, probabilities, size=n_resamples)
+    metrics = metrics_from_counts(resampled.reshape(n_resamples, n_groups, 2, 2))
+
+    return metric_ratios(metrics, privileged_index)
+
+
+def bootstrap_fairness_ratios(
+    y_true,
+    y_pred,
+    protected,
+    privileged,
+    n_resamples=2000,
+    confidence_level=0.95,
+    cutoff=0.5,
+    n_jobs=None,
+    random_state=None,
+):
+    """
+    Estime des intervalles de confiance bootstrap pour les ratios d'équité d'un modèle.
+
+    Paramètres
+    ----------
+    y_true : array-like
+        Labels observés (0 ou 1).
+    y_pred : array-like
+        Probabilités prédites par le modèle.
+    protected : array-like
+        Valeurs de la variable protégée.
+    privileged : str
+        Modalité considérée comme privilégiée.
+    n_resamples : int, optional
+        Nombre de ré-échantillons bootstrap.
+    confidence_level : float, optional
+        Niveau de confiance des intervalles (0.95 par défaut).
+    cutoff : float, optional
+        Seuil de décision appliqué aux probabilités.
+    n_jobs : int, optional
+        Nombre de threads utilisés. Par défaut, le nombre de processeurs disponibles.
+    random_state : int, optional
+        Graine pour la reproductibilité.
+
+    Retourne
+    --------
+    DataFrame
+        Une ligne par couple (groupe non privilégié, métrique) avec le ratio observé, les bornes
+        de l'intervalle et l'indicateur de respect de la règle des 80%.
+    """
+    subgroups, counts = contingency_table(y_true, y_pred, protected, cutoff)
+    if privileged not in subgroups:
+        raise ValueError(f"La modalité privilégiée {privileged!r} est absente des données.")
+
+    privileged_index = int(np.where(subgroups == privileged)[0][0])
+    n_groups = len(subgroups)
+    flat_counts = counts.ravel()
+    n_obs = int(flat_counts.sum())
+
+    # Répartition des ré-échantillons entre threads, chacun avec son propre générateur
+    n_jobs = n_jobs or os.cpu_count() or 1
+    n_jobs = max(1, min(n_jobs, n_resamples))
+    chunk_sizes = np.full(n_jobs, n_resamples // n_jobs)
+    chunk_sizes[: n_resamples % n_jobs] += 1
+    seeds = np.random.SeedSequence(random_state).spawn(n_jobs)
+
+    with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+        chunks = executor.map(
+            lambda args: _bootstrap_ratios(
+                flat_counts / n_obs, n_obs, args[0], privileged_index, n_groups, args[1]
+            ),
+            zip(chunk_sizes, seeds),
+        )
+        boot_ratios = np.concatenate(list(chunks), axis=0)
+
+    alpha = (1 - confidence_level) / 2
+    with warnings.catch_warnings():
+        # Métriques non définies dans certains ré-échantillons (groupes très petits)
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        lower, upper = np.nanquantile(boot_ratios, [alpha, 1 - alpha], axis=0)
+    observed = metric_ratios(metrics_from_counts(counts), privileged_index)
+
+    rows = []
+    for g, subgroup in enumerate(subgroups):
+        if g == privileged_index:
+            continue
+        for m, metric in enumerate(FAIRNESS_METRICS):
+            rows.append(
+                {
+                    "subgroup": subgroup,
+                    "metric": metric,
+                    "ratio": observed[g, m],
+                    "lower": lower[g, m],
+                    "upper": upper[g, m],
+                    "fair": EPSILON < observed[g, m] < 1 / EPSILON,
+                }
+            )
+
+    return pd.DataFrame(rows)
@@ -0,0 +1,265 @@
+"""
+Ce module définit un cache persistant des figures Plotly de l'application.
+
+Les figures ne dépendent que des arguments des fonctions de `src.plot_utils` et de la version
+des données : elles sont donc construites une seule fois, sérialisées en JSON, puis conservées
+en mémoire (avec une limite du nombre d'entrées, les moins récemment utilisées étant retirées
+en premier) et sur disque. Une nouvelle instance de l'application peut ainsi se préchauffer à
+partir des figures déjà écrites sur disque.
+
+Variables d'environnement (optionnelles) :
+- `figure_cache_dir` : répertoire du cache sur disque (par défaut `cache/figures`) ;
+- `figure_cache_size` : nombre maximal de figures conservées (par défaut 256).
+"""
+
+from collections import OrderedDict
+import contextlib
+import hashlib
+import json
+import os
+import threading
+
+import pandas as pd
+import plotly.io as pio
+
+from src.metrics import timed_function
+
+DEFAULT_CACHE_DIR = "cache/figures"
+DEFAULT_MAX_ENTRIES = 256
+
+
+def _dtype_key(dtype):
+    # Les modalités d'une catégorielle (par exemple les libellés traduits) font partie du type
+    if isinstance(dtype, pd.CategoricalDtype):
+        return ["category", [str(c) for c in dtype.categories], bool(dtype.ordered)]
+    return str(dtype)
+
+
+def _index_hash(index):
+    return hashlib.sha1(pd.util.hash_pandas_object(index).to_numpy().tobytes()).hexdigest()
+
+
+def _key_part(value):
+    """
+    Représentation stable d'un argument pour la clé du cache.
+
+    Les valeurs d'un DataFrame ne sont pas hachées (ce serait presque aussi coûteux que de
+    refaire la figure) : elles sont identifiées par la version des données. La clé contient en
+    revanche l'empreinte de son index (un sous-ensemble de lignes donne une autre clé), ses
+    colonnes et leurs types, modalités des catégorielles comprises (une autre traduction donne
+    une autre clé).
+    """
+    if isinstance(value, pd.DataFrame):
+        return [
+            "DataFrame",
+            _index_hash(value.index),
+            [[str(col), _dtype_key(dtype)] for col, dtype in value.dtypes.items()],
+        ]
+    if isinstance(value, pd.Series):
+        return ["Series", _index_hash(value.index), str(value.name), _dtype_key(value.dtype)]
+    if isinstance(value, dict):
+        return {str(k): _key_part(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_key_part(v) for v in value]
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return repr(value)
+
+
+class FigureCache:
+    """
+    Cache des figures Plotly sérialisées, en mémoire et sur disque.
+
+    Parameters
+    ----------
+    cache_dir : str, optional
+        Répertoire du cache sur disque. Si None, le cache est uniquement en mémoire.
+    max_entries : int, optional
+        Nombre maximal de figures conservées en mémoire et sur disque.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_entries=DEFAULT_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        if self.cache_dir is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(func, args=(), kwargs=None, version=None):
+        """
+        Clé du cache : fonction, arguments et version des données.
+        """
+        payload = json.dumps(
+            [
+                f"{func.__module__}.{func.__qualname__}",
+                _key_part(list(args)),
+                _key_part(kwargs or {}),
+                version,
+            ],
+            sort_keys=True,
+        )
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        """
+        Renvoie le JSON de la figure associée à la clé, ou None si elle n'est pas en cache.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        if self.cache_dir is None:
+            return None
+
+        # Une autre instance qui partage le répertoire peut supprimer le fichier à tout moment :
+        # un fichier disparu est un défaut de cache
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                figure_json = f.read()
+            # Date de modification mise à jour pour l'éviction sur disque
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            return None
+        self._remember(key, figure_json)
+
+        return figure_json
+
+    def put(self, key, figure_json):
+        """
+        Enregistre le JSON d'une figure en mémoire et sur disque.
+        """
+        self._remember(key, figure_json)
+
+        if self.cache_dir is not None:
+            # Écriture atomique : plusieurs instances peuvent partager le répertoire
+            tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(figure_json)
+            os.replace(tmp_path, self._path(key))
+            self._evict_disk()
+
+    def _remember(self, key, figure_json):
+        with self._lock:
+            self._entries[key] = figure_json
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _disk_entries(self):
+        """
+        Fichiers du cache sur disque, du moins au plus récemment utilisé.
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            # Fichiers supprimés entre-temps par une autre instance ignorés
+            try:
+                entries.append((os.path.getmtime(path), path))
+            except FileNotFoundError:
+                continue
+
+        return [path for _, path in sorted(entries)]
+
+    def _evict_disk(self):
+        paths = self._disk_entries()
+        for path in paths[: max(len(paths) - self.max_entries, 0)]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def warm(self):
+        """
+        Charge en mémoire les figures enregistrées sur disque (les plus récentes en priorité).
+
+        Returns
+        -------
+        int
+            Nombre de figures chargées.
+        """
+        if self.cache_dir is None:
+            return 0
+
+        loaded = 0
+        for path in self._disk_entries()[-self.max_entries:]:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self._remember(os.path.basename(path)[: -len(".json")], f.read())
+            except FileNotFoundError:
+                continue
+            loaded += 1
+
+        return loaded
+
+    def clear(self):
+        """
+        Vide le cache en mémoire et sur disque.
+        """
+        with self._lock:
+            self._entries.clear()
+        if self.cache_dir is not None:
+            for path in self._disk_entries():
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(path)
+
+    def get_or_build(self, func, *args, version=None, **kwargs):
+        """
+        Renvoie la figure `func(*args, **kwargs)`, construite seulement si elle n'est pas en cache.
+
+        Parameters
+        ----------
+        func : callable
+            Fonction de construction de la figure (par exemple `plot_hist`).
+        *args, **kwargs
+            Arguments de la fonction.
+        version : str, optional
+            Version des données dont dépend la figure (voir `dataset_version`). Elle doit
+            identifier les valeurs de tous les DataFrames passés en argument (leur index et
+            leurs types entrent déjà dans la clé).
+
+        Returns
+        -------
+        plotly.graph_objects.Figure
+            La figure.
+        """
+        key = self.make_key(func, args, kwargs, version)
+        figure_json = self.get(key)
+        if figure_json is None:
+            figure_json = func(*args, **kwargs).to_json()
+            self.put(key, figure_json)
+
+        return pio.from_json(figure_json)
+
+
+_figure_cache = None
+
+
+def get_figure_cache():
+    """
+    Renvoie le cache de figures du processus, configuré par les variables d'environnement.
+    """
+    global _figure_cache
+    if _figure_cache is None:
+        _figure_cache = FigureCache(
+            os.environ.get("figure_cache_dir", DEFAULT_CACHE_DIR),
+            int(os.environ.get("figure_cache_size", DEFAULT_MAX_ENTRIES)),
+        )
+
+    return _figure_cache
+
+
+@timed_function
+def cached_figure(func, *args, version=None, **kwargs):
+    """
+    Raccourci pour `get_figure_cache().get_or_build(func, *args, version=version, **kwargs)`.
+    """
+    return get_figure_cache().get_or_build(func, *args, version=version, **kwargs)
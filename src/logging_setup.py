@@ -0,0 +1,105 @@
+"""
+Ce module configure la journalisation (loguru) de l'application, une seule fois par processus.
+
+Streamlit réexécute le script d'une page à chaque interaction : un `logger.add(...)` placé dans
+la page ajouterait un nouveau fichier de sortie à chaque exécution, et chaque ligne serait écrite
+autant de fois. Ici, le fichier de sortie est installé au premier appel seulement, et les pages
+obtiennent un logger lié à leur nom et à la session Streamlit (`get_page_logger`), sans ajouter
+de sortie.
+
+Les lignes sont écrites au format JSON (une par ligne, avec `page` et `session_id` dans
+`record.extra`) par un fil d'exécution dédié, alimenté par une file (`enqueue=True`) : l'écriture
+sur disque ne ralentit pas l'affichage des pages. La sortie par défaut de loguru (stderr,
+synchrone) est remplacée par une sortie console elle aussi alimentée par la file.
+
+Variables d'environnement (optionnelles) :
+- `log_path` : chemin du fichier de journalisation (par défaut `logs/app.log`) ;
+- `log_level` : niveau minimal des messages écrits dans ce fichier (par défaut `DEBUG`) ;
+- `log_console_level` : niveau minimal des messages écrits sur la console (par défaut `INFO`,
+  chaîne vide pour ne rien écrire sur la console).
+"""
+
+import os
+import sys
+import threading
+
+from loguru import logger
+
+DEFAULT_LOG_PATH = "logs/app.log"
+DEFAULT_LOG_LEVEL = "DEBUG"
+DEFAULT_CONSOLE_LEVEL = "INFO"
+
+_sink_id = None
+_setup_lock = threading.Lock()
+
+
+def setup_logging(path=None, level=None):
+    """
+    Installe le fichier de journalisation JSON, s'il ne l'est pas déjà dans ce processus.
+
+    Parameters
+    ----------
+    path : str, optional
+        Chemin du fichier. Par défaut, la variable d'environnement `log_path` ou `logs/app.log`.
+    level : str, optional
+        Niveau minimal. Par défaut, la variable d'environnement `log_level` ou `DEBUG`.
+
+    Returns
+    -------
+    int
+        L'identifiant loguru du fichier de journalisation.
+    """
+    global _sink_id
+    with _setup_lock:
+        if _sink_id is None:
+            logger.configure(extra={"page": "", "session_id": ""})
+            # Sortie par défaut (stderr, écrite dans le fil de la page) remplacée
+            logger.remove()
+            console_level = os.environ.get("log_console_level", DEFAULT_CONSOLE_LEVEL)
+            if console_level:
+                logger.add(sys.stderr, level=console_level, enqueue=True)
+            _sink_id = logger.add(
+                path or os.environ.get("log_path", DEFAULT_LOG_PATH),
+                level=level or os.environ.get("log_level", DEFAULT_LOG_LEVEL),
+                rotation="1 MB",
+                retention="10 days",
+                serialize=True,
+                enqueue=True,
+            )
+
+    return _sink_id
+
+
+def current_session_id():
+    """
+    Identifiant de la session Streamlit en cours, ou chaîne vide hors d'une session (scripts,
+    fils d'exécution non rattachés à une session).
+    """
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return ""
+
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx is not None else ""
+
+
+def get_page_logger(page):
+    """
+    Renvoie le logger d'une page, lié à son nom et à la session Streamlit en cours.
+
+    La journalisation est configurée au premier appel ; les appels suivants n'ajoutent aucune
+    sortie.
+
+    Parameters
+    ----------
+    page : str
+        Nom de la page (par exemple `taux_emploi`).
+
+    Returns
+    -------
+    loguru.Logger
+        Le logger lié.
+    """
+    setup_logging()
+    return logger.bind(page=page, session_id=current_session_id())
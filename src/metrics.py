@@ -0,0 +1,390 @@
+"""
+Ce module mesure la durée des étapes des pages de l'application et l'exporte sous forme de
+métriques.
+
+Chaque durée est rangée dans un histogramme par page et par étape (chargement, prétraitement,
+graphiques, affichage, fonctions de `src`). Les histogrammes sont cumulés pour toute la durée du
+processus et exportés :
+- dans un fichier JSON (`logs/metrics.json` par défaut) et dans un fichier au format texte de
+  Prometheus (même nom, extension `.prom`), réécrits périodiquement par un fil d'exécution en
+  arrière-plan (jamais pendant l'exécution d'une page), s'il y a de nouvelles mesures ;
+- sur un point d'accès HTTP local (`/metrics` au format Prometheus, `/metrics.json`), si la
+  variable d'environnement `metrics_port` est renseignée.
+
+Variables d'environnement (optionnelles) :
+- `metrics_path` : chemin du fichier JSON exporté ;
+- `metrics_export_interval` : intervalle entre deux exports des fichiers, en secondes (par
+  défaut 15) ;
+- `metrics_port` : port du point d'accès HTTP ;
+- `metrics_host` : adresse d'écoute du point d'accès HTTP (par défaut `127.0.0.1`).
+"""
+
+import atexit
+import contextlib
+import contextvars
+import functools
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import threading
+import time
+
+from loguru import logger
+
+from src.profiling import start_page_profiling
+
+# Bornes supérieures (en secondes) des classes des histogrammes
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DEFAULT_METRICS_PATH = "logs/metrics.json"
+DEFAULT_EXPORT_INTERVAL = 15
+METRIC_NAME = "app_stage_duration_seconds"
+
+# Page en cours d'exécution dans le fil d'exécution courant (une session Streamlit par fil)
+_current_page = contextvars.ContextVar("current_page", default="")
+
+
+class StageHistogram:
+    """
+    Histogramme cumulé des durées d'une étape.
+
+    Parameters
+    ----------
+    buckets : tuple of float, optional
+        Bornes supérieures des classes, en secondes.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        """Ajoute une durée à l'histogramme."""
+        index = next(
+            (i for i, bound in enumerate(self.buckets) if seconds <= bound), len(self.buckets)
+        )
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def to_dict(self):
+        """Représentation sérialisable (effectifs cumulés par borne, comme Prometheus)."""
+        cumulative, total = {}, 0
+        for bound, count in zip([*map(str, self.buckets), "+Inf"], self.counts):
+            total += count
+            cumulative[bound] = total
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else None,
+            "max": round(self.max, 6),
+            "buckets": cumulative,
+        }
+
+
+class MetricsRegistry:
+    """
+    Histogrammes des durées, par (page, étape). Partagé par toutes les sessions du processus.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._histograms = {}
+        self._lock = threading.Lock()
+        # Nombre de mesures enregistrées : l'export périodique est sauté s'il n'a pas changé
+        self.generation = 0
+
+    def observe(self, page, stage, seconds):
+        """Enregistre la durée d'une étape."""
+        with self._lock:
+            key = (page, stage)
+            if key not in self._histograms:
+                self._histograms[key] = StageHistogram(self.buckets)
+            self._histograms[key].observe(seconds)
+            self.generation += 1
+
+    def snapshot(self):
+        """
+        Copie des histogrammes : liste de {"page", "stage", "count", "sum", ...}.
+        """
+        with self._lock:
+            return [
+                {"page": page, "stage": stage, **histogram.to_dict()}
+                for (page, stage), histogram in sorted(self._histograms.items())
+            ]
+
+    def to_json(self):
+        """Export JSON des histogrammes."""
+        return json.dumps(
+            {"generated_at": time.time(), "metric": METRIC_NAME, "stages": self.snapshot()},
+            ensure_ascii=False,
+            indent=2,
+        )
+
+    def to_prometheus(self):
+        """Export des histogrammes au format texte de Prometheus."""
+        lines = [
+            f"# HELP {METRIC_NAME} Durée des étapes des pages de l'application.",
+            f"# TYPE {METRIC_NAME} histogram",
+        ]
+        for entry in self.snapshot():
+            labels = f'page="{_escape(entry["page"])}",stage="{_escape(entry["stage"])}"'
+            for bound, count in entry["buckets"].items():
+                lines.append(f'{METRIC_NAME}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f"{METRIC_NAME}_sum{{{labels}}} {entry['sum']}")
+            lines.append(f"{METRIC_NAME}_count{{{labels}}} {entry['count']}")
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Supprime tous les histogrammes."""
+        with self._lock:
+            self._histograms.clear()
+            self.generation += 1
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = MetricsRegistry()
+
+
+class timed(contextlib.ContextDecorator):
+    """
+    Mesure la durée d'un bloc (`with timed("load"):`) ou d'une fonction (`@timed("load")`).
+
+    La durée est enregistrée, même en cas d'exception, pour la page en cours d'exécution (voir
+    `PageTimer`).
+
+    Parameters
+    ----------
+    stage : str
+        Nom de l'étape.
+    """
+
+    def __init__(self, stage):
+        self.stage = stage
+        self._starts = threading.local()
+
+    def __enter__(self):
+        self._starts.__dict__.setdefault("stack", []).append(time.perf_counter())
+        return self
+
+    def __exit__(self, *exc):
+        start = self._starts.stack.pop()
+        registry.observe(_current_page.get(), self.stage, time.perf_counter() - start)
+        return False
+
+
+def timed_function(func):
+    """
+    Décorateur mesurant la durée d'une fonction de `src`, sous le nom `module.fonction`.
+
+    Le nom et le module de la fonction sont conservés (`functools.wraps`) : les clés du cache
+    des figures, qui en dépendent, sont inchangées.
+    """
+    stage = f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with timed(stage):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+class PageTimer:
+    """
+    Chronomètre des étapes d'une exécution de page.
+
+    Chaque appel à `lap(stage)` enregistre le temps écoulé depuis l'appel précédent (ou depuis
+    la création du chronomètre) sous le nom de l'étape ; `finish()` enregistre la durée totale.
+    Les fichiers des métriques sont écrits en arrière-plan (voir `start_metrics_exporter`). Si
+    elle est demandée (voir `src.profiling`), une capture cProfile et tracemalloc de l'exécution
+    est faite entre la création du chronomètre et `finish()`.
+
+    Parameters
+    ----------
+    page : str
+        Nom de la page.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        _current_page.set(page)
+        self._start = self._last = time.perf_counter()
+        start_metrics_server()
+        start_metrics_exporter()
+        self._profiler = start_page_profiling(page)
+
+    def lap(self, stage):
+        """Enregistre la durée de l'étape qui vient de se terminer."""
+        now = time.perf_counter()
+        registry.observe(self.page, stage, now - self._last)
+        self._last = now
+
+    def finish(self):
+        """Enregistre la durée totale de l'exécution."""
+        now = time.perf_counter()
+        registry.observe(self.page, "total", now - self._start)
+        self._last = now
+        if self._profiler is not None:
+            self._profiler.stop()
+            self._profiler = None
+
+
+def export_metrics(path=None):
+    """
+    Écrit les métriques dans un fichier JSON et dans un fichier texte Prometheus (`.prom`).
+
+    Les fichiers sont remplacés de façon atomique, pour être lus à tout moment par un outil de
+    supervision.
+
+    Parameters
+    ----------
+    path : str, optional
+        Chemin du fichier JSON. Par défaut, la variable d'environnement `metrics_path` ou
+        `logs/metrics.json`.
+    """
+    path = path or os.environ.get("metrics_path", DEFAULT_METRICS_PATH)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    prometheus_path = f"{os.path.splitext(path)[0]}.prom"
+    exports = [(path, registry.to_json()), (prometheus_path, registry.to_prometheus())]
+    for target, content in exports:
+        tmp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, target)
+
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def _export_periodically(interval):
+    exported = None
+    while True:
+        time.sleep(interval)
+        generation = registry.generation
+        if generation == exported:
+            continue
+        # Une erreur est journalisée sans arrêter l'export : nouvel essai à l'intervalle suivant
+        try:
+            export_metrics()
+            exported = generation
+        except Exception as e:
+            logger.warning(f"Échec de l'export des métriques : {e}")
+
+
+def start_metrics_exporter(interval=None):
+    """
+    Démarre (une seule fois par processus) l'export périodique des fichiers des métriques.
+
+    Les fichiers sont réécrits par un fil d'exécution en arrière-plan, au plus une fois par
+    intervalle et seulement après de nouvelles mesures, et une dernière fois à l'arrêt du
+    processus : les exécutions des pages n'écrivent jamais sur le disque.
+
+    Parameters
+    ----------
+    interval : float, optional
+        Intervalle entre deux exports, en secondes. Par défaut, la variable d'environnement
+        `metrics_export_interval` ou 15 s.
+
+    Returns
+    -------
+    threading.Thread
+        Le fil d'exécution de l'export.
+    """
+    global _exporter
+    with _exporter_lock:
+        if _exporter is None:
+            interval = float(
+                interval or os.environ.get("metrics_export_interval", DEFAULT_EXPORT_INTERVAL)
+            )
+            _exporter = threading.Thread(
+                target=_export_periodically,
+                args=(interval,),
+                name="metrics-export",
+                daemon=True,
+            )
+            _exporter.start()
+            atexit.register(export_metrics)
+
+    return _exporter
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/metrics":
+            body, content_type = registry.to_prometheus(), "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            body, content_type = registry.to_json(), "application/json"
+        else:
+            self.send_error(404)
+            return
+
+        payload = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        # Pas de journalisation de chaque requête de collecte
+        pass
+
+
+_server = None
+_server_failed = False
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=None, host=None):
+    """
+    Démarre (une seule fois par processus) le point d'accès HTTP des métriques.
+
+    Si le port est déjà utilisé (par exemple par une autre réplique de l'application sur le
+    même hôte), l'échec est journalisé une seule fois et le démarrage n'est plus retenté :
+    les pages s'exécutent sans point d'accès, les métriques restant exportées dans les
+    fichiers.
+
+    Parameters
+    ----------
+    port : int, optional
+        Port d'écoute. Par défaut, la variable d'environnement `metrics_port` ; si elle n'est
+        pas renseignée, aucun serveur n'est démarré.
+    host : str, optional
+        Adresse d'écoute. Par défaut, la variable `metrics_host` ou `127.0.0.1`.
+
+    Returns
+    -------
+    http.server.ThreadingHTTPServer or None
+        Le serveur, ou None s'il n'est pas configuré ou n'a pas pu démarrer.
+    """
+    global _server, _server_failed
+    port = port or os.environ.get("metrics_port")
+    if not port:
+        return None
+
+    with _server_lock:
+        if _server is None and not _server_failed:
+            host = host or os.environ.get("metrics_host", "127.0.0.1")
+            try:
+                _server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+            except OSError as e:
+                _server_failed = True
+                logger.warning(
+                    f"Point d'accès des métriques non démarré sur {host}:{port} : {e}"
+                )
+                return None
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+
+    return _server
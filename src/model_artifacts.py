@@ -0,0 +1,270 @@
+"""
+Ce module enregistre les forêts aléatoires entraînées dans un format lisible par projection en
+mémoire (memory mapping), pour que plusieurs processus d'un même nœud partagent les mêmes pages
+physiques au lieu d'en avoir chacun une copie privée.
+
+`joblib.load` reconstruit chaque arbre scikit-learn dans la mémoire privée du processus. Ici, les
+nœuds de tous les arbres d'une forêt sont concaténés dans quelques tableaux NumPy enregistrés en
+`.npy`, lus avec `numpy.load(mmap_mode="r")` : les pages du fichier sont partagées par le cache
+du système. Le pipeline (prétraitement et paramètres du classifieur, sans les arbres) reste un
+petit fichier joblib, et le classifieur `MemmapForestClassifier` parcourt les arbres avec NumPy.
+
+Un modèle `output/models/<nom>.joblib` est exporté dans le répertoire `output/models/<nom>/` :
+    python -m src.model_artifacts output/models
+
+`load_model` utilise l'export s'il existe, et le fichier joblib sinon. Les autres modèles
+(régression logistique, XGBoost) sont petits ou gardent leurs données hors de Python : ils ne
+sont pas exportés.
+"""
+
+import argparse
+import glob
+import os
+
+import numpy as np
+
+from src.model_manifest import file_sha256
+
+PIPELINE_FILE = "pipeline.joblib"
+FOREST_ARRAYS = ["roots", "children", "feature", "threshold", "missing_go_to_left", "value"]
+# Valeur de `children_left` pour une feuille dans scikit-learn
+TREE_LEAF = -1
+# Nombre de lignes parcourues à la fois dans les arbres
+PREDICT_CHUNK_ROWS = 1024
+
+
+class MemmapForestClassifier:
+    """
+    Forêt aléatoire de classification dont les nœuds sont lus dans des tableaux NumPy.
+
+    Les probabilités prédites sont celles de `RandomForestClassifier.predict_proba` : moyenne
+    des proportions de chaque classe dans la feuille atteinte par chaque arbre. Comme dans
+    scikit-learn, une valeur manquante (NaN) mène au fils indiqué par `missing_go_to_left`.
+
+    Parameters
+    ----------
+    classes : array-like
+        Classes du modèle, dans l'ordre des colonnes des probabilités.
+    n_features_in : int
+        Nombre de variables attendues.
+    max_depth : int
+        Profondeur maximale des arbres.
+    source_sha256 : str, optional
+        Empreinte du fichier joblib d'origine : un export dont l'empreinte ne correspond plus
+        au modèle est ignoré par `load_model`.
+    """
+
+    def __init__(self, classes, n_features_in, max_depth, source_sha256=None):
+        self.classes_ = np.asarray(classes)
+        self.n_features_in_ = n_features_in
+        self.max_depth = max_depth
+        self.source_sha256 = source_sha256
+        self._arrays = None
+
+    @classmethod
+    def from_forest(cls, forest):
+        """
+        Convertit une `RandomForestClassifier` entraînée.
+
+        Returns
+        -------
+        tuple
+            Le classifieur (sans tableaux attachés) et le dictionnaire des tableaux à
+            enregistrer : 'roots' (premier nœud de chaque arbre), 'children' (fils gauche et
+            droit de chaque nœud, numérotés dans la forêt), 'feature', 'threshold',
+            'missing_go_to_left' (côté des valeurs manquantes) et 'value' (proportions des
+            classes).
+        """
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        offsets = np.cumsum([0] + [tree.node_count for tree in trees[:-1]])
+
+        children, features = [], []
+        for tree, offset in zip(trees, offsets):
+            nodes = np.arange(tree.node_count) + offset
+            is_leaf = tree.children_left == TREE_LEAF
+            # Une feuille est son propre fils : tous les arbres se parcourent en `max_depth`
+            # étapes, sans distinguer les feuilles
+            children.append(
+                np.column_stack(
+                    [
+                        np.where(is_leaf, nodes, tree.children_left + offset),
+                        np.where(is_leaf, nodes, tree.children_right + offset),
+                    ]
+                )
+            )
+            features.append(np.where(is_leaf, 0, tree.feature))
+
+        value = np.concatenate([tree.value[:, 0, :] for tree in trees])
+        arrays = {
+            # Indices au type natif de NumPy : l'indexation est bien plus rapide qu'en int32
+            "roots": offsets.astype(np.intp),
+            "children": np.concatenate(children).astype(np.intp),
+            "feature": np.concatenate(features).astype(np.intp),
+            "threshold": np.concatenate([tree.threshold for tree in trees]),
+            "missing_go_to_left": np.concatenate(
+                [tree.missing_go_to_left for tree in trees]
+            ).astype(bool),
+            "value": value / value.sum(axis=1, keepdims=True),
+        }
+        max_depth = max(tree.max_depth for tree in trees)
+        return cls(forest.classes_, forest.n_features_in_, max_depth), arrays
+
+    def attach(self, directory, mmap_mode="r"):
+        """
+        Associe au classifieur les tableaux enregistrés dans `directory`, projetés en mémoire.
+        """
+        # Vues ndarray des projections : l'indexation d'un `np.memmap` est plus lente
+        self._arrays = {
+            name: np.asarray(np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode))
+            for name in FOREST_ARRAYS
+        }
+        return self
+
+    def __getstate__(self):
+        # Les tableaux ne sont jamais copiés dans le pickle
+        state = self.__dict__.copy()
+        state["_arrays"] = None
+        return state
+
+    def __sklearn_is_fitted__(self):
+        return self._arrays is not None
+
+    def fit(self, X, y=None):
+        raise NotImplementedError("Modèle exporté : entraîner la RandomForestClassifier d'origine.")
+
+    def predict_proba(self, X):
+        """
+        Probabilités de chaque classe, de forme (n_lignes, n_classes).
+        """
+        if self._arrays is None:
+            raise RuntimeError("Aucun tableau attaché : appeler `attach` ou `load_model`.")
+        if hasattr(X, "toarray"):
+            X = X.toarray()
+        # Même comparaison que scikit-learn : variables en float32, seuils en float64
+        X = np.asarray(X, dtype=np.float32)
+
+        roots = self._arrays["roots"]
+        # Fils gauche du nœud i en 2 * i, fils droit en 2 * i + 1
+        children = self._arrays["children"].reshape(-1)
+        feature = self._arrays["feature"]
+        threshold = self._arrays["threshold"]
+        missing_go_to_left = self._arrays["missing_go_to_left"]
+        value = self._arrays["value"]
+
+        proba = np.empty((len(X), len(self.classes_)))
+        for start in range(0, len(X), PREDICT_CHUNK_ROWS):
+            chunk = X[start:start + PREDICT_CHUNK_ROWS]
+            n_rows = len(chunk)
+            # Variables rangées par colonne : la valeur de la variable j de la ligne r est en
+            # j * n_rows + r
+            columns = np.ascontiguousarray(chunk.T).reshape(-1)
+            rows = np.arange(n_rows)
+            has_missing = np.isnan(columns).any()
+            # Nœud courant dans chaque arbre (lignes du tableau) pour chaque ligne (colonnes)
+            nodes = np.repeat(np.asarray(roots)[:, None], n_rows, axis=1)
+            for _ in range(self.max_depth):
+                values = columns[feature[nodes] * n_rows + rows]
+                go_right = values > threshold[nodes]
+                if has_missing:
+                    missing = np.isnan(values)
+                    go_right[missing] = ~missing_go_to_left[nodes[missing]]
+                nodes = children[2 * nodes + go_right]
+            proba[start:start + n_rows] = value[nodes].mean(axis=0)
+
+        return proba
+
+    def predict(self, X):
+        """Classe la plus probable de chaque ligne."""
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+def export_model(path, directory=None):
+    """
+    Exporte un pipeline dont le dernier étage est une `RandomForestClassifier`.
+
+    Parameters
+    ----------
+    path : str
+        Fichier joblib du pipeline.
+    directory : str, optional
+        Répertoire de l'export. Par défaut, le chemin du fichier sans son extension.
+
+    Returns
+    -------
+    str or None
+        Le répertoire de l'export, ou None si le modèle n'est pas une forêt aléatoire.
+    """
+    import joblib
+    from sklearn.ensemble import RandomForestClassifier
+
+    pipeline = joblib.load(path)
+    name, forest = pipeline.steps[-1]
+    if not isinstance(forest, RandomForestClassifier):
+        return None
+
+    directory = directory or os.path.splitext(path)[0]
+    os.makedirs(directory, exist_ok=True)
+    classifier, arrays = MemmapForestClassifier.from_forest(forest)
+    classifier.source_sha256 = file_sha256(path)
+    for array_name, array in arrays.items():
+        np.save(os.path.join(directory, f"{array_name}.npy"), np.ascontiguousarray(array))
+
+    pipeline.steps[-1] = (name, classifier)
+    joblib.dump(pipeline, os.path.join(directory, PIPELINE_FILE))
+    return directory
+
+
+def load_model(path, mmap_mode="r", sha256=None):
+    """
+    Charge un modèle : depuis son export projeté en mémoire s'il existe (voir `export_model`),
+    sinon depuis le fichier joblib.
+
+    Parameters
+    ----------
+    path : str
+        Fichier joblib du modèle.
+    mmap_mode : str, optional
+        Mode de projection des tableaux de l'export.
+    sha256 : str, optional
+        Empreinte attendue du fichier joblib (voir `src.model_manifest`) : un export fait à
+        partir d'une autre version du modèle est ignoré.
+    """
+    import joblib
+
+    directory = os.path.splitext(path)[0]
+    # Export absent, ou incomplet (fait avant l'ajout d'un tableau) : modèle d'origine
+    if not all(
+        os.path.isfile(os.path.join(directory, file_name))
+        for file_name in [PIPELINE_FILE] + [f"{name}.npy" for name in FOREST_ARRAYS]
+    ):
+        return joblib.load(path)
+
+    pipeline = joblib.load(os.path.join(directory, PIPELINE_FILE))
+    classifier = pipeline.steps[-1][1]
+    if sha256 is not None and classifier.source_sha256 != sha256:
+        return joblib.load(path)
+
+    classifier.attach(directory, mmap_mode)
+    return pipeline
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Exporte les forêts aléatoires d'un répertoire de modèles joblib."
+    )
+    parser.add_argument("models_dir", nargs="?", default="output/models")
+    args = parser.parse_args()
+
+    for path in sorted(glob.glob(os.path.join(args.models_dir, "*.joblib"))):
+        directory = export_model(path)
+        if directory is None:
+            print(f"{path} : pas une forêt aléatoire, ignoré")
+        else:
+            print(f"{path} : exporté dans {directory}")
+
+
+if __name__ == "__main__":
+    # Les pipelines exportés doivent référencer `src.model_artifacts`, et non `__main__`
+    from src.model_artifacts import main as export_main
+
+    export_main()
@@ -0,0 +1,308 @@
+"""
+Ce module tient le manifeste des modèles entraînés (`output/models/manifest.json`).
+
+Pour chaque modèle, le manifeste enregistre au moment de l'entraînement :
+- l'empreinte SHA-256 et la taille du fichier joblib ;
+- l'estimateur, les variables explicatives et la variable cible ;
+- l'empreinte des données d'entraînement (chemin, dimensions, SHA-256 du contenu) ;
+- les versions de Python et des bibliothèques (scikit-learn, XGBoost...).
+
+Au chargement, `verify_artifact` compare le fichier au manifeste. L'empreinte d'un fichier
+n'est recalculée que si sa taille ou sa date de modification changent : la vérification est
+quasi gratuite après la première, et l'empreinte sert de version aux caches des modèles (voir
+`src.models_visualisation_utils`).
+
+Enregistrer dans le manifeste des modèles déjà entraînés : leurs entrées sont marquées
+`"backfilled": true`, sans empreinte des données ni versions des bibliothèques (inconnues,
+l'environnement d'entraînement n'étant pas celui qui les enregistre) :
+    python -m src.model_manifest output/models --update
+Vérifier les modèles :
+    python -m src.model_manifest output/models
+"""
+
+import argparse
+from functools import lru_cache
+import hashlib
+from importlib import metadata
+import json
+import os
+import platform
+import time
+
+DEFAULT_MODELS_DIR = "output/models"
+MANIFEST_FILE = "manifest.json"
+LIBRARIES = ["scikit-learn", "xgboost", "numpy", "pandas", "joblib"]
+# Variable cible des modèles de l'application (voir `src.models_baseline_train_save`)
+DEFAULT_TARGET = "Employed"
+_HASH_CHUNK_SIZE = 1 << 20
+
+
+def file_sha256(path):
+    """Empreinte SHA-256 du contenu d'un fichier."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=64)
+def _cached_sha256(path, size, mtime_ns):
+    # La taille et la date de modification font partie de la clé : un fichier remplacé est
+    # relu, un fichier inchangé ne l'est jamais deux fois
+    return file_sha256(path)
+
+
+@lru_cache(maxsize=8)
+def _cached_manifest(path, mtime_ns):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def library_versions(known=True):
+    """
+    Versions de Python et des bibliothèques des modèles (None si absente, ou pour toutes si
+    `known` est faux : versions de l'entraînement inconnues).
+    """
+    if not known:
+        return {name: None for name in ["python"] + LIBRARIES}
+
+    versions = {"python": platform.python_version()}
+    for library in LIBRARIES:
+        try:
+            versions[library] = metadata.version(library)
+        except metadata.PackageNotFoundError:
+            versions[library] = None
+
+    return versions
+
+
+def dataset_fingerprint(X, y=None, path=None):
+    """
+    Empreinte des données d'entraînement.
+
+    Returns
+    -------
+    dict
+        'path' (source des données), 'rows', 'columns' et 'sha256' (empreinte du contenu,
+        index compris, indépendante du format du fichier source).
+    """
+    import pandas as pd
+
+    data = X if y is None else pd.concat([X, y], axis=1)
+    row_hashes = pd.util.hash_pandas_object(data, index=True).to_numpy()
+    digest = hashlib.sha256(row_hashes.tobytes())
+    digest.update(json.dumps([str(c) for c in data.columns]).encode("utf-8"))
+
+    return {
+        "path": path,
+        "rows": len(data),
+        "columns": [str(c) for c in data.columns],
+        "sha256": digest.hexdigest(),
+    }
+
+
+def manifest_path(models_dir=DEFAULT_MODELS_DIR):
+    return os.path.join(models_dir, MANIFEST_FILE)
+
+
+def read_manifest(models_dir=DEFAULT_MODELS_DIR):
+    """
+    Lit le manifeste d'un répertoire de modèles ({"models": {}} s'il n'existe pas).
+    """
+    path = manifest_path(models_dir)
+    if not os.path.isfile(path):
+        return {"models": {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_manifest(manifest, models_dir=DEFAULT_MODELS_DIR):
+    """Écrit le manifeste, en remplaçant le fichier de façon atomique."""
+    path = manifest_path(models_dir)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+
+def describe_model(model):
+    """
+    Estimateur (dernier étage d'un pipeline) et variables explicatives d'un modèle.
+    """
+    estimator = model.steps[-1][1] if hasattr(model, "steps") else model
+    features = getattr(model, "feature_names_in_", None)
+    return {
+        "estimator": type(estimator).__name__,
+        "features": None if features is None else [str(f) for f in features],
+    }
+
+
+def record_artifact(path, model, training_data=None, target=None, backfilled=False):
+    """
+    Enregistre (ou remplace) l'entrée d'un fichier de modèle dans le manifeste de son
+    répertoire.
+
+    Parameters
+    ----------
+    path : str
+        Fichier joblib du modèle.
+    model : object
+        Le modèle enregistré dans ce fichier.
+    training_data : dict, optional
+        Empreinte des données d'entraînement (voir `dataset_fingerprint`).
+    target : str, optional
+        Nom de la variable cible.
+    backfilled : bool, optional
+        Modèle enregistré après son entraînement, dans un autre environnement : les versions
+        des bibliothèques sont laissées inconnues (None).
+
+    Returns
+    -------
+    dict
+        L'entrée du manifeste.
+    """
+    models_dir, file_name = os.path.split(path)
+    entry = {
+        "file": file_name,
+        "sha256": file_sha256(path),
+        "size": os.path.getsize(path),
+        **describe_model(model),
+        "target": target,
+        "training_data": training_data,
+        "library_versions": library_versions(known=not backfilled),
+        "backfilled": backfilled,
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+    manifest = read_manifest(models_dir)
+    manifest["models"][os.path.splitext(file_name)[0]] = entry
+    write_manifest(manifest, models_dir)
+    return entry
+
+
+def save_model(model, name, X, y, dataset_path=None, models_dir=DEFAULT_MODELS_DIR):
+    """
+    Enregistre un modèle entraîné (`<models_dir>/<name>.joblib`) et son entrée du manifeste.
+
+    Parameters
+    ----------
+    model : object
+        Le modèle entraîné.
+    name : str
+        Nom du modèle, sans extension.
+    X, y : pandas.DataFrame, pandas.Series
+        Données d'entraînement, dont l'empreinte est enregistrée.
+    dataset_path : str, optional
+        Source des données d'entraînement.
+
+    Returns
+    -------
+    str
+        Chemin du fichier écrit.
+    """
+    from joblib import dump
+
+    os.makedirs(models_dir, exist_ok=True)
+    path = os.path.join(models_dir, f"{name}.joblib")
+    dump(model, path)
+    record_artifact(path, model, dataset_fingerprint(X, y, dataset_path), target=y.name)
+    return path
+
+
+def verify_artifact(path):
+    """
+    Vérifie qu'un fichier de modèle correspond à son entrée du manifeste.
+
+    Sans manifeste ni entrée pour ce fichier (modèles antérieurs au manifeste), le fichier
+    n'est pas vérifié.
+
+    Returns
+    -------
+    str
+        Empreinte SHA-256 du fichier, utilisable comme version dans les caches.
+
+    Raises
+    ------
+    ValueError
+        Si la taille ou l'empreinte du fichier diffèrent du manifeste.
+    """
+    stat = os.stat(path)
+    models_dir, file_name = os.path.split(path)
+    entry = None
+    manifest_file = manifest_path(models_dir)
+    if os.path.isfile(manifest_file):
+        manifest = _cached_manifest(manifest_file, os.stat(manifest_file).st_mtime_ns)
+        entry = manifest["models"].get(os.path.splitext(file_name)[0])
+
+    if entry is not None and entry["size"] != stat.st_size:
+        raise ValueError(
+            f"Le modèle {path} ne correspond pas au manifeste : {stat.st_size} octets au lieu "
+            f"de {entry['size']}."
+        )
+    sha256 = _cached_sha256(os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if entry is not None and entry["sha256"] != sha256:
+        raise ValueError(f"Le modèle {path} ne correspond pas au manifeste : empreinte modifiée.")
+
+    return sha256
+
+
+def verify_models(models_dir=DEFAULT_MODELS_DIR):
+    """
+    Vérifie tous les modèles du manifeste.
+
+    Returns
+    -------
+    dict
+        Empreinte de chaque modèle, par nom.
+    """
+    return {
+        name: verify_artifact(os.path.join(models_dir, entry["file"]))
+        for name, entry in read_manifest(models_dir)["models"].items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vérifie ou met à jour le manifeste des modèles.")
+    parser.add_argument("models_dir", nargs="?", default=DEFAULT_MODELS_DIR)
+    parser.add_argument(
+        "--update",
+        action="store_true",
+        help="Enregistre les fichiers joblib présents (sans empreinte des données)",
+    )
+    parser.add_argument(
+        "--target",
+        default=DEFAULT_TARGET,
+        help="Variable cible des modèles enregistrés avec --update",
+    )
+    args = parser.parse_args()
+
+    if args.update:
+        import joblib
+
+        manifest = read_manifest(args.models_dir)
+        for file_name in sorted(os.listdir(args.models_dir)):
+            if not file_name.endswith(".joblib"):
+                continue
+            # Une entrée à jour est conservée telle quelle (versions de l'entraînement comprises)
+            previous = manifest["models"].get(os.path.splitext(file_name)[0], {})
+            path = os.path.join(args.models_dir, file_name)
+            if previous.get("sha256") == file_sha256(path):
+                continue
+            record_artifact(
+                path,
+                joblib.load(path),
+                previous.get("training_data"),
+                previous.get("target") or args.target,
+                backfilled=True,
+            )
+            print(f"{path} : enregistré")
+
+    for name, sha256 in verify_models(args.models_dir).items():
+        print(f"{name} : {sha256[:12]} ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,6 @@ dans 7_Modeles.py.
 """
 
 import os
-from joblib import dump
 import pandas as pd
 from sklearn.preprocessing import StandardScaler, OneHotEncoder
 from sklearn.compose import make_column_transformer
@@ -16,6 +15,8 @@ import xgboost as xgb
 import dalex as dx
 from dotenv import load_dotenv
 
+from src.model_manifest import save_model
+
 # Chargement des variables d'environnement
 load_dotenv()
 stack_users_data_path = os.environ.get(
@@ -60,7 +61,13 @@ cv_logreg = make_pipeline(preprocess, LogisticRegression(penalty="l2"))
 cv_logreg.fit(X1_train, y1_train)
 
 # Sauvegarde du modèle
-dump(cv_logreg, "modeles/logistic_regression_baseline.joblib")
+save_model(
+    cv_logreg,
+    "logistic_regression_baseline",
+    X1_train,
+    y1_train,
+    dataset_path=stack_users_data_path,
+)
 
 # Créer un Explainer pour le Pipeline
 exp_logreg = dx.Explainer(
@@ -81,7 +88,13 @@ cv_forest = make_pipeline(
 cv_forest.fit(X1_train, y1_train)
 
 # Sauvegarde du modèle
-dump(cv_forest, "modeles/random_forest_baseline.joblib")
+save_model(
+    cv_forest,
+    "random_forest_baseline",
+    X1_train,
+    y1_train,
+    dataset_path=stack_users_data_path,
+)
 
 # Créer un Explainer pour le Pipeline
 exp_forest = dx.Explainer(cv_forest, X1_test, y1_test, verbose=False)
@@ -105,7 +118,13 @@ cv_xgb = make_pipeline(
 cv_xgb.fit(X1_train, y1_train)
 
 # Sauvegarde du modèle
-dump(cv_xgb, "modeles/xgboost_baseline.joblib")
+save_model(
+    cv_xgb,
+    "xgboost_baseline",
+    X1_train,
+    y1_train,
+    dataset_path=stack_users_data_path,
+)
 
 # Créer un Explainer pour le Pipeline
 exp_xgb = dx.Explainer(cv_xgb, X1_test, y1_test, verbose=False)
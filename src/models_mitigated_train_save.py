@@ -5,7 +5,6 @@ dans 7_Modeles.py.
 
 import os
 from copy import copy
-from joblib import dump
 import pandas as pd
 from sklearn.utils import resample
 from sklearn.preprocessing import StandardScaler, OneHotEncoder
@@ -19,6 +18,8 @@ import dalex as dx
 from dalex.fairness import reweight
 from dotenv import load_dotenv
 
+from src.model_manifest import save_model
+
 # Chargement des variables d'environnement
 load_dotenv()
 stack_users_data_path = os.environ.get(
@@ -90,7 +91,13 @@ cv_logreg_preprocess = make_pipeline(preprocess, LogisticRegression(penalty="l2"
 cv_logreg_preprocess.fit(X2_preprocess_train, y2_preprocess_train)
 
 # Sauvegarde du modèle
-dump(cv_logreg_preprocess, "modeles/logistic_regression_preprocess.joblib")
+save_model(
+    cv_logreg_preprocess,
+    "logistic_regression_preprocess",
+    X2_preprocess_train,
+    y2_preprocess_train,
+    dataset_path=stack_users_data_path,
+)
 
 # Créer un Explainer pour le Pipeline
 exp_logreg_preprocess = dx.Explainer(
@@ -118,7 +125,13 @@ cv_forest_preprocess = make_pipeline(
 cv_forest_preprocess.fit(X2_preprocess_train, y2_preprocess_train)
 
 # Sauvegarde du modèle
-dump(cv_forest_preprocess, "modeles/random_forest_preprocess.joblib")
+save_model(
+    cv_forest_preprocess,
+    "random_forest_preprocess",
+    X2_preprocess_train,
+    y2_preprocess_train,
+    dataset_path=stack_users_data_path,
+)
 
 # Créer un Explainer pour le Pipeline
 exp_forest_preprocess = dx.Explainer(
@@ -147,7 +160,13 @@ cv_xgb_preprocess = make_pipeline(
 cv_xgb_preprocess.fit(X2_preprocess_train, y2_preprocess_train)
 
 # Sauvegarde du modèle
-dump(cv_xgb_preprocess, "modeles/xgboost_preprocess.joblib")
+save_model(
+    cv_xgb_preprocess,
+    "xgboost_preprocess",
+    X2_preprocess_train,
+    y2_preprocess_train,
+    dataset_path=stack_users_data_path,
+)
 
 # Créer un Explainer pour le Pipeline
 exp_xgb_preprocess = dx.Explainer(
@@ -175,7 +194,13 @@ kwargs = {cv_logreg_weighted.steps[-1][0] + "__sample_weight": weights}
 cv_logreg_weighted.fit(X2_preprocess_test, y2_preprocess_test, **kwargs)
 
 # Enregistrement du modèle
-dump(cv_logreg_weighted, "modeles/logistic_regressing_weighted.joblib")
+save_model(
+    cv_logreg_weighted,
+    "logistic_regression_weighted",
+    X2_preprocess_test,
+    y2_preprocess_test,
+    dataset_path=stack_users_data_path,
+)
 
 # Test d'équité sur le genre
 exp_logreg_weighted = dx.Explainer(
@@ -196,7 +221,13 @@ kwargs = {cv_forest_weighted.steps[-1][0] + "__sample_weight": weights}
 cv_forest_weighted.fit(X2_preprocess_test, y2_preprocess_test, **kwargs)
 
 # Enregistrement du modèle
-dump(cv_forest_weighted, "modeles/random_forest_weighted.joblib")
+save_model(
+    cv_forest_weighted,
+    "random_forest_weighted",
+    X2_preprocess_test,
+    y2_preprocess_test,
+    dataset_path=stack_users_data_path,
+)
 
 # Test d'équité sur le genre
 exp_forest_weighted = dx.Explainer(
@@ -215,7 +246,13 @@ kwargs = {cv_xgb_weighted.steps[-1][0] + "__sample_weight": weights}
 cv_xgb_weighted.fit(X2_preprocess_test, y2_preprocess_test, **kwargs)
 
 # Enregistrement du modèle
-dump(cv_xgb_weighted, "modeles/xgboost_weighted.joblib")
+save_model(
+    cv_xgb_weighted,
+    "xgboost_weighted",
+    X2_preprocess_test,
+    y2_preprocess_test,
+    dataset_path=stack_users_data_path,
+)
 
 # Test d'équité sur le genre
 exp_xgb_weighted = dx.Explainer(
@@ -3,11 +3,20 @@ Ce module contient les fonctions nécessaires à la présentation des modèles.
 """
 
 import os
-import dalex as dx
-import joblib
+from functools import lru_cache
+import threading
+
 import pandas as pd
 from dotenv import load_dotenv
-from sklearn.linear_model import LogisticRegression
+
+from src.fairness_bootstrap import bootstrap_fairness_ratios
+from src.metrics import timed_function
+from src.model_artifacts import load_model
+from src.model_manifest import DEFAULT_MODELS_DIR, verify_artifact
+from src.threshold_optimizer import GroupThresholdClassifier
+
+# dalex, joblib et scikit-learn ne sont importés qu'au premier usage d'un modèle : les pages
+# qui n'affichent pas de modèle ne paient pas leur import, ni la lecture des données
 
 # ==========================
 # Set up data
@@ -19,49 +28,117 @@ stack_users_data_path = os.environ.get(
     "stack_users_data_path", "data/StackOverflowSurvey.csv"
 )
 
-# Chargement des données depuis le répertoire sspcloud
-stack_users_df = pd.read_csv(stack_users_data_path, index_col="Unnamed: 0")
-
 VAR_NUM = ["PreviousSalary", "YearsCode", "YearsCodePro", "ComputerSkills"]
 VAR_CAT = ["Age", "EdLevel", "Gender", "MentalHealth", "MainBranch"]
 
+MODEL_FEATURES = [
+    "Age",
+    "Accessibility",
+    "EdLevel",
+    "Gender",
+    "MentalHealth",
+    "MainBranch",
+    "YearsCode",
+    "YearsCodePro",
+    "PreviousSalary",
+    "ComputerSkills",
+]
+
+# Les figures de la page d'équité sont construites en parallèle : le verrou évite de lire les
+# données ou de construire un même Explainer plusieurs fois
+_load_lock = threading.RLock()
+
+
+@lru_cache(maxsize=1)
+def _read_stack_users_df():
+    return pd.read_csv(stack_users_data_path, index_col="Unnamed: 0")
+
+
+def get_stack_users_df():
+    """
+    Charge (une seule fois par processus) les données utilisées par les modèles, depuis le
+    répertoire sspcloud.
+    """
+    with _load_lock:
+        return _read_stack_users_df()
+
+
 # ==========================
 # Set up models (baseline + mitigated) from dumps
 # ==========================
 
-X_model = stack_users_df[
-    [
-        "Age",
-        "Accessibility",
-        "EdLevel",
-        "Gender",
-        "MentalHealth",
-        "MainBranch",
-        "YearsCode",
-        "YearsCodePro",
-        "PreviousSalary",
-        "ComputerSkills",
-    ]
-]
+MODELS_DIR = DEFAULT_MODELS_DIR
 
-y_model = stack_users_df["Employed"]
+# Fichiers des modèles baseline et atténué, par modèle
+MODEL_FILES = {
+    "Random Forest": ("random_forest_baseline.joblib", "random_forest_weighted.joblib"),
+    "Logistic Regression": (
+        "logistic_regression_baseline.joblib",
+        "logistic_regression_weighted.joblib",
+    ),
+    "Gradient Boosting": ("xgboost_baseline.joblib", "xgboost_weighted.joblib"),
+}
+
+
+def model_version(model, mitigated=False):
+    """
+    Empreinte SHA-256 du fichier d'un modèle, vérifiée par rapport au manifeste des modèles
+    (voir `src.model_manifest`). Elle sert de version aux caches des Explainers et des
+    graphiques.
+    """
+    return verify_artifact(os.path.join(MODELS_DIR, MODEL_FILES[model][int(mitigated)]))
+
+
+def models_version():
+    """Version de l'ensemble des modèles affichés (empreintes de tous les fichiers)."""
+    return "-".join(
+        model_version(model, mitigated)[:16]
+        for model in MODEL_FILES
+        for mitigated in (False, True)
+    )
+
+
+@lru_cache(maxsize=12)
+def _build_explainer(model, mitigated, version):
+    import dalex as dx
+
+    stack_users_df = get_stack_users_df()
+    # Forêts aléatoires projetées en mémoire si elles ont été exportées (src.model_artifacts)
+    path = os.path.join(MODELS_DIR, MODEL_FILES[model][int(mitigated)])
+    return dx.Explainer(
+        load_model(path, sha256=version),
+        stack_users_df[MODEL_FEATURES],
+        stack_users_df["Employed"],
+    )
+
+
+def get_explainer(model, mitigated=False):
+    """
+    Construit (une seule fois par processus) l'Explainer dalex d'un modèle sauvegardé.
+
+    Paramètres
+    ----------
+    model : str
+        Nom du modèle ("Random Forest", "Gradient Boosting", "Logistic Regression").
+    mitigated : bool, optional
+        Si True, le modèle atténué (pondéré) plutôt que le modèle baseline.
+
+    Retourne
+    --------
+    dalex.Explainer
+        Explainer du modèle sur les données de l'enquête.
+    """
+    version = model_version(model, mitigated)
+    with _load_lock:
+        return _build_explainer(model, mitigated, version)
 
-exp2 = dx.Explainer(joblib.load("output/models/random_forest_baseline.joblib"), X_model, y_model)
-exp2_m = dx.Explainer(joblib.load("output/models/random_forest_weighted.joblib"), X_model, y_model)
-exp3 = dx.Explainer(
-    joblib.load("output/models/logistic_regression_baseline.joblib"), X_model, y_model
-)
-exp3_m = dx.Explainer(
-    joblib.load("output/models/logistic_regression_weighted.joblib"), X_model, y_model
-)
-exp4 = dx.Explainer(joblib.load("output/models/xgboost_baseline.joblib"), X_model, y_model)
-exp4_m = dx.Explainer(joblib.load("output/models/xgboost_weighted.joblib"), X_model, y_model)
 
 # ==========================
 # Utils function
 # ==========================
 
 
+@timed_function
 def get_data_log_regression(parameters):
     """
     Entraîne une régression logistique sur les variables données et mesure leur effet marginal
@@ -84,6 +161,9 @@ def get_data_log_regression(parameters):
         Effets marginaux bruts des variables.
     """
 
+    from sklearn.linear_model import LogisticRegression
+
+    stack_users_df = get_stack_users_df()
     val_cols = list(set(VAR_NUM).intersection(parameters))
     to_dummies = list(set(VAR_CAT).intersection(parameters))
 
@@ -120,6 +200,7 @@ def get_data_log_regression(parameters):
     return results, reg.score(df_to_regress, stack_users_df["Employed"]), df_to_regress, delta_p
 
 
+@timed_function
 def get_model_performance(model):
     """
     Retourne les résultats de performance du modèle spécifié.
@@ -135,14 +216,10 @@ def get_model_performance(model):
         Résultat de la méthode `model_performance().result` associée au modèle.
     """
 
-    lookup = {
-        "Random Forest": [exp2],
-        "Logistic Regression": [exp3],
-        "Gradient Boosting": [exp4],
-    }
-    return lookup[model][0].model_performance().result
+    return get_explainer(model).model_performance().result
 
 
+@timed_function
 def get_fairness_check(criteria, privileged):
     """
     Prépare une fonction de visualisation de la fairness selon un critère et un groupe privilégié.
@@ -161,19 +238,20 @@ def get_fairness_check(criteria, privileged):
         modèles.
     """
 
-    protected = stack_users_df[criteria]
-    f_object_rf = exp2.model_fairness(
+    protected = get_stack_users_df()[criteria]
+    f_object_rf = get_explainer("Random Forest").model_fairness(
         protected=protected, privileged=privileged, label="Random Forest"
     )
-    f_object_lr = exp3.model_fairness(
+    f_object_lr = get_explainer("Logistic Regression").model_fairness(
         protected=protected, privileged=privileged, label="Logistic Regression"
     )
-    f_object_gb = exp4.model_fairness(
+    f_object_gb = get_explainer("Gradient Boosting").model_fairness(
         protected=protected, privileged=privileged, label="Gradient Boosting"
     )
     return lambda t: f_object_rf.plot([f_object_lr, f_object_gb], type=t, show=False)
 
 
+@timed_function
 def get_fairness_check_after_mitigation(criteria, privileged, model):
     """
     Prépare une fonction de visualisation de la fairness avant/après mitigation pour un modèle
@@ -194,17 +272,142 @@ def get_fairness_check_after_mitigation(criteria, privileged, model):
         Fonction prenant un type de plot (`t`) et affichant la fairness avant/après mitigation.
     """
 
-    protected = stack_users_df[criteria]
-    lookup = {
-        "Random Forest": [exp2, exp2_m],
-        "Gradient Boosting": [exp4, exp4_m],
-        "Logistic Regression": [exp3, exp3_m],
-    }
-
-    f_object = lookup[model][0].model_fairness(
+    protected = get_stack_users_df()[criteria]
+    f_object = get_explainer(model).model_fairness(
         protected=protected, privileged=privileged, label=model
     )
-    f_object_mitigated = lookup[model][1].model_fairness(
+    f_object_mitigated = get_explainer(model, mitigated=True).model_fairness(
         protected=protected, privileged=privileged, label=(model + " (Mitigated)")
     )
     return lambda t: f_object.plot([f_object_mitigated], type=t, show=False)
+
+
+# Borné comme `_build_explainer` : une entrée par combinaison affichée (modèle, critère,
+# catégorie privilégiée), les versions remplacées étant évincées
+@lru_cache(maxsize=24)
+def _build_threshold_adjusted_explainer(criteria, privileged, model, criterion, version):
+    import dalex as dx
+
+    stack_users_df = get_stack_users_df()
+    explainer = get_explainer(model)
+
+    adjusted_model = GroupThresholdClassifier.from_predictions(
+        explainer.model,
+        explainer.y,
+        explainer.y_hat,
+        stack_users_df[criteria],
+        privileged,
+        protected_col=criteria,
+        criterion=criterion,
+    )
+    return dx.Explainer(
+        adjusted_model,
+        stack_users_df[MODEL_FEATURES],
+        stack_users_df["Employed"],
+        verbose=False,
+    )
+
+
+def get_threshold_adjusted_explainer(criteria, privileged, model, criterion):
+    """
+    Construit l'Explainer d'un modèle baseline auquel on applique des seuils de décision par
+    groupe (mitigation en post-traitement).
+
+    Les seuils sont optimisés à partir des probabilités déjà stockées dans l'Explainer baseline,
+    sans ré-entraîner le modèle.
+
+    Paramètres
+    ----------
+    criteria : str
+        Colonne protégée du DataFrame.
+    privileged : str or int
+        Valeur privilégiée pour cette variable.
+    model : str
+        Nom du modèle ("Random Forest", "Gradient Boosting", "Logistic Regression").
+    criterion : str
+        Critère d'équité visé ("equal_opportunity" ou "demographic_parity").
+
+    Retourne
+    --------
+    dalex.Explainer
+        Explainer du modèle enveloppé dans un `GroupThresholdClassifier`.
+    """
+    return _build_threshold_adjusted_explainer(
+        criteria, privileged, model, criterion, model_version(model)
+    )
+
+
+@timed_function
+def get_fairness_check_after_threshold_adjustment(criteria, privileged, model, criterion):
+    """
+    Prépare une fonction de visualisation de la fairness avant/après ajustement des seuils de
+    décision par groupe pour un modèle donné.
+
+    Paramètres
+    ----------
+    criteria : str
+        Colonne protégée du DataFrame.
+    privileged : str or int
+        Valeur privilégiée pour cette variable.
+    model : str
+        Nom du modèle ("Random Forest", "Gradient Boosting", "Logistic Regression").
+    criterion : str
+        Critère d'équité visé ("equal_opportunity" ou "demographic_parity").
+
+    Retourne
+    --------
+    function
+        Fonction prenant un type de plot (`t`) et affichant la fairness avant/après ajustement.
+    """
+
+    protected = get_stack_users_df()[criteria]
+    f_object = get_explainer(model).model_fairness(
+        protected=protected, privileged=privileged, label=model
+    )
+    f_object_adjusted = get_threshold_adjusted_explainer(
+        criteria, privileged, model, criterion
+    ).model_fairness(
+        protected=protected, privileged=privileged, label=(model + " (Seuils ajustés)")
+    )
+    return lambda t: f_object.plot([f_object_adjusted], type=t, show=False)
+
+
+@timed_function
+def get_fairness_confidence_intervals(criteria, privileged, n_resamples=2000, random_state=123):
+    """
+    Calcule des intervalles de confiance bootstrap pour les ratios d'équité des trois modèles.
+
+    Paramètres
+    ----------
+    criteria : str
+        Colonne du DataFrame utilisée comme variable protégée.
+    privileged : str or int
+        Valeur considérée comme privilégiée pour cette variable.
+    n_resamples : int, optional
+        Nombre de ré-échantillons bootstrap.
+    random_state : int, optional
+        Graine pour la reproductibilité.
+
+    Retourne
+    --------
+    DataFrame
+        Ratio observé et intervalle de confiance à 95% par modèle, groupe et métrique.
+    """
+
+    protected = get_stack_users_df()[criteria].to_numpy()
+
+    results = []
+    for label in ["Random Forest", "Logistic Regression", "Gradient Boosting"]:
+        explainer = get_explainer(label)
+        result = bootstrap_fairness_ratios(
+            explainer.y,
+            explainer.y_hat,
+            protected,
+            privileged,
+            n_resamples=n_resamples,
+            random_state=random_state,
+        )
+        result.insert(0, "model", label)
+        results.append(result)
+
+    return pd.concat(results, ignore_index=True)
@@ -7,20 +7,253 @@ cartes choroplèthes et nuages de mots, à partir de DataFrames pandas.
 """
 
 from collections import Counter
-
-import matplotlib.pyplot as plt
+import contextlib
+import contextvars
+import os
+import re
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 # from plotly.offline import init_notebook_mode
-from wordcloud import WordCloud
+
+from src.metrics import timed_function
 
 # Initialize Plotly for notebooks
 # init_notebook_mode(connected=True)
 
+# Nombre maximal de classes des histogrammes numériques, et écart maximal entre le minimum et le
+# maximum d'une variable entière pour utiliser une classe par valeur
+MAX_HIST_BINS = 100
+MAX_INTEGER_BINS = 100
+
+# Nombre maximal de valeurs atypiques affichées par boîte
+MAX_BOX_OUTLIERS = 200
+
+# Séparateur des listes de langages (espaces autour des « ; » ignorés)
+LANGUAGE_SEPARATOR = re.compile(r"\s*;\s*")
+
+# Résultats intermédiaires (bornes des classes, statistiques des boîtes) déjà calculés, par
+# DataFrame (id)
+_frame_caches = {}
+
+
+def _frame_cache(data):
+    """
+    Returns the cache dictionary attached to a DataFrame, emptied when the DataFrame is freed.
+    """
+    key = id(data)
+    cache = _frame_caches.get(key)
+    if cache is None:
+        cache = _frame_caches[key] = {}
+        weakref.finalize(data, _frame_caches.pop, key, None)
+
+    return cache
+
+
+class LazyFigure:
+    """
+    Figure built on first access, then kept.
+
+    Pages keep their instances across reruns (`st.cache_resource`): a figure that has been
+    built is then neither rebuilt nor read again from the figure cache, and `prefetch_figures`
+    has nothing left to do.
+
+    Parameters
+    ----------
+    build : callable
+        Function building the figure (e.g. `plot_hist` or `cached_figure`).
+    *args, **kwargs
+        Arguments passed to `build`.
+    """
+
+    def __init__(self, build, *args, **kwargs):
+        self._build = build
+        self._args = args
+        self._kwargs = kwargs
+        self._figure = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_built(self):
+        """Whether the figure has already been built."""
+        return self._figure is not None
+
+    def get(self):
+        """
+        Returns the figure, building it if needed.
+        """
+        with self._lock:
+            if self._figure is None:
+                self._figure = self._build(*self._args, **self._kwargs)
+
+        return self._figure
+
+
+def prefetch_figures(figures):
+    """
+    Builds the figures that are not built yet in a background thread.
+
+    Call it after the visible figure has been displayed, so that the other tabs are ready when
+    the user opens them. Prefetching is disabled when the `prefetch_figures` environment
+    variable is "0". Errors are ignored here: they are raised again when the figure is
+    displayed.
+
+    Parameters
+    ----------
+    figures : iterable of LazyFigure
+        Figures to prepare.
+
+    Returns
+    -------
+    threading.Thread or None
+        The prefetch thread, or None if there is nothing to build.
+    """
+    pending = [figure for figure in figures if not figure.is_built]
+    if not pending or os.environ.get("prefetch_figures", "1") == "0":
+        return None
+
+    def build_all():
+        for figure in pending:
+            with contextlib.suppress(Exception):
+                figure.get()
+
+    # The thread runs in a copy of the current context, so that its timings are recorded for
+    # the current page (see src/metrics.py)
+    context = contextvars.copy_context()
+    thread = threading.Thread(
+        target=context.run, args=(build_all,), name="figure-prefetch", daemon=True
+    )
+    thread.start()
+
+    return thread
+
+
+def _bin_edges(values, nbins=None):
+    """
+    Computes regularly spaced bin edges for numeric values.
+
+    Integer values spanning at most `MAX_INTEGER_BINS` get one bin per value. Otherwise the
+    number of bins is `nbins`, or chosen by NumPy's "auto" rule, capped at `MAX_HIST_BINS`.
+    """
+    vmin, vmax = float(values.min()), float(values.max())
+
+    if nbins is None and np.all(values == np.round(values)) and vmax - vmin <= MAX_INTEGER_BINS:
+        return np.arange(vmin - 0.5, vmax + 1.5)
+
+    if vmin == vmax:
+        return np.array([vmin - 0.5, vmax + 0.5])
+
+    if nbins is None:
+        nbins = min(len(np.histogram_bin_edges(values, bins="auto")) - 1, MAX_HIST_BINS)
+
+    return np.linspace(vmin, vmax, nbins + 1)
+
+
+def _cached_bin_edges(data, col, values, nbins=None):
+    """
+    Bin edges of `data[col]`, computed once per DataFrame, column and number of bins.
+    """
+    cache = _frame_cache(data)
+    key = ("bin_edges", col, nbins)
+    if key not in cache:
+        cache[key] = _bin_edges(values, nbins)
+
+    return cache[key]
+
+
+def histogram_counts(data, col, nbins=None):
+    """
+    Computes histogram counts server-side.
+
+    Numeric columns are binned with regularly spaced edges (cached per DataFrame and column) and
+    counted with `np.bincount`. Other columns are counted per category, in category order for
+    categorical columns and in order of appearance otherwise, like `px.histogram`.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        The input DataFrame.
+    col : str
+        The column to count.
+    nbins : int, optional
+        Number of bins for numeric columns. Defaults to an automatic choice.
+
+    Returns
+    -------
+    pandas.DataFrame
+        For numeric columns: the bin centers (`col`), 'count', 'bin_start' and 'bin_end'.
+        Otherwise: the categories (`col`) and 'count'.
+    """
+    series = data[col]
+
+    if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        counts = series.value_counts(sort=False, dropna=True)
+        return pd.DataFrame({col: counts.index, "count": counts.to_numpy()})
+
+    values = series.to_numpy(dtype=float, na_value=np.nan)
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return pd.DataFrame({col: [], "count": [], "bin_start": [], "bin_end": []})
+
+    edges = _cached_bin_edges(data, col, values, nbins)
+    width = edges[1] - edges[0]
+    n_bins = len(edges) - 1
+
+    # Indice de la classe de chaque valeur (la dernière classe inclut sa borne supérieure)
+    bin_index = np.clip(((values - edges[0]) // width).astype(np.int64), 0, n_bins - 1)
+    counts = np.bincount(bin_index, minlength=n_bins)
+
+    return pd.DataFrame(
+        {
+            col: (edges[:-1] + edges[1:]) / 2,
+            "count": counts,
+            "bin_start": edges[:-1],
+            "bin_end": edges[1:],
+        }
+    )
 
-def plot_hist(data, col, title, xaxis_title=None, yaxis_title="Effectif"):
+
+def _plot_binned_hist(counts, col, title, xaxis_title, yaxis_title, cat_orders=None):
+    """
+    Bar chart of precomputed histogram counts (see `histogram_counts`).
+    """
+    if "bin_start" in counts.columns:
+        fig = px.bar(
+            counts,
+            x=col,
+            y="count",
+            text_auto=True,
+            hover_data={col: False, "bin_start": True, "bin_end": True},
+        )
+        # Barres jointives de la largeur des classes, comme un histogramme
+        fig.update_traces(width=float(counts["bin_end"].iloc[0] - counts["bin_start"].iloc[0]))
+        bargap = 0.0
+    else:
+        fig = px.bar(counts, x=col, y="count", text_auto=True, category_orders=cat_orders)
+        bargap = 0.2
+
+    fig.update_layout(
+        title_text=title,
+        xaxis_title_text=xaxis_title,
+        yaxis_title_text=yaxis_title,
+        bargap=bargap,
+        bargroupgap=0.1,
+    )
+    return fig
+
+
+@timed_function
+def plot_hist(data, col, title, xaxis_title=None, yaxis_title="Effectif", nbins=None):
     """
     Creates a histogram of the specified column.
 
+    Bins and counts are computed server-side: only the aggregated counts are sent to the
+    browser, not every row.
+
     Parameters
     ----------
     data : pandas.DataFrame
@@ -33,6 +266,8 @@ def plot_hist(data, col, title, xaxis_title=None, yaxis_title="Effectif"):
         Custom title for the X-axis. Defaults to `col`.
     yaxis_title : str, optional
         Custom title for the Y-axis. Default is "Effectif".
+    nbins : int, optional
+        Number of bins for numeric columns. Defaults to an automatic choice.
 
     Returns
     -------
@@ -41,7 +276,43 @@ def plot_hist(data, col, title, xaxis_title=None, yaxis_title="Effectif"):
     """
     xaxis_label = xaxis_title if xaxis_title is not None else col
 
-    fig = px.histogram(data, x=col, barmode="group", text_auto=True)
+    return _plot_binned_hist(
+        histogram_counts(data, col, nbins), col, title, xaxis_label, yaxis_title
+    )
+
+
+@timed_function
+def plot_hist_from_counts(
+    data, col, title, count_col="count", xaxis_title=None, yaxis_title="Effectif"
+):
+    """
+    Creates a histogram-like bar chart from precomputed counts.
+
+    Unlike `plot_hist`, only the aggregated counts are sent to the browser, not every row.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        DataFrame with one row per category and its count.
+    col : str
+        The column holding the categories.
+    title : str
+        Title of the chart.
+    count_col : str, optional
+        The column holding the counts (default is "count").
+    xaxis_title : str, optional
+        Custom title for the X-axis. Defaults to `col`.
+    yaxis_title : str, optional
+        Custom title for the Y-axis. Default is "Effectif".
+
+    Returns
+    -------
+    plotly.graph_objects.Figure
+        A Plotly bar chart.
+    """
+    xaxis_label = xaxis_title if xaxis_title is not None else col
+
+    fig = px.bar(data, x=col, y=count_col, text_auto=True)
     fig.update_layout(
         title_text=title,
         xaxis_title_text=xaxis_label,
@@ -52,10 +323,13 @@ def plot_hist(data, col, title, xaxis_title=None, yaxis_title="Effectif"):
     return fig
 
 
+@timed_function
 def plot_hist_orders(data, col, title, cat_orders):
     """
     Creates a histogram of the specified column with custom category order.
 
+    Counts are computed server-side, as in `plot_hist`.
+
     Parameters
     ----------
     data : pandas.DataFrame
@@ -72,19 +346,12 @@ def plot_hist_orders(data, col, title, cat_orders):
     plotly.graph_objects.Figure
         A Plotly histogram figure.
     """
-    fig = px.histogram(
-        data, x=col, barmode="group", text_auto=True, category_orders=cat_orders
-    )
-    fig.update_layout(
-        title_text=title,
-        xaxis_title_text=col,
-        yaxis_title_text="Effectif",
-        bargap=0.2,
-        bargroupgap=0.1,
+    return _plot_binned_hist(
+        histogram_counts(data, col), col, title, col, "Effectif", cat_orders=cat_orders
     )
-    return fig
 
 
+@timed_function
 def plot_bar(data, col, title):
     """
     Creates a horizontal bar plot of the specified column.
@@ -126,6 +393,7 @@ def plot_bar(data, col, title):
     return fig
 
 
+@timed_function
 def plot_bar_orders(data, y_col, color_col, title, cat_orders, x_col="percentage"):
     """
     Creates a horizontal bar plot showing the distribution of categories with percentages.
@@ -176,10 +444,77 @@ def plot_bar_orders(data, y_col, color_col, title, cat_orders, x_col="percentage
     return fig
 
 
-def plot_box(
-    data,
+def box_statistics(data, x_col, y_col, color_col=None, max_outliers=MAX_BOX_OUTLIERS):
+    """
+    Computes box plot statistics per group server-side.
+
+    Quartiles use linear interpolation and whiskers extend to the most extreme values within
+    1.5 IQR of the box, as in Plotly. Values beyond the whiskers are outliers; at most
+    `max_outliers` of them are kept per group (always including the minimum and the maximum,
+    the others are drawn at random with a fixed seed).
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        Input data.
+    x_col : str
+        Grouping column (categorical variable).
+    y_col : str
+        Numeric column.
+    color_col : str, optional
+        Second grouping column, if different from `x_col`.
+    max_outliers : int, optional
+        Maximum number of outliers kept per group.
+
+    Returns
+    -------
+    pandas.DataFrame
+        One row per group with 'n', 'mean', 'q1', 'median', 'q3', 'lowerfence', 'upperfence'
+        and 'outliers' (array of outlier values).
+    """
+    group_cols = [x_col] if color_col in (None, x_col) else [x_col, color_col]
+    rng = np.random.default_rng(0)
+
+    rows = []
+    grouped = data.groupby(group_cols, observed=True, sort=True)[y_col]
+    for keys, values in grouped:
+        values = values.to_numpy(dtype=float, na_value=np.nan)
+        values = np.sort(values[~np.isnan(values)])
+        if len(values) == 0:
+            continue
+
+        q1, median, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+        lowerfence, upperfence = inside[0], inside[-1]
+
+        outliers = values[(values < lowerfence) | (values > upperfence)]
+        if len(outliers) > max_outliers:
+            middle = rng.choice(outliers[1:-1], size=max(max_outliers - 2, 0), replace=False)
+            outliers = np.concatenate([outliers[:1], middle, outliers[-1:]])
+
+        keys = keys if isinstance(keys, tuple) else (keys,)
+        rows.append(
+            dict(
+                zip(group_cols, keys),
+                n=len(values),
+                mean=values.mean(),
+                q1=q1,
+                median=median,
+                q3=q3,
+                lowerfence=lowerfence,
+                upperfence=upperfence,
+                outliers=outliers,
+            )
+        )
+
+    return pd.DataFrame(rows)
+
+
+@timed_function
+def plot_box_from_stats(
+    stats,
     x_col,
-    y_col,
     color_col,
     title,
     color_sequence=["rgb(246, 207, 113)", "rgb(102, 197, 204)"],
@@ -187,24 +522,23 @@ def plot_box(
     yaxis_title=None,
 ):
     """
-    Creates a box plot to visualize the distribution of a numeric variable across categories.
+    Creates a box plot from precomputed box statistics.
 
     Parameters
     ----------
-    data : pandas.DataFrame
-        Input data to plot.
+    stats : pandas.DataFrame
+        Box statistics, as returned by `box_statistics` (or computed from quantile sketches).
     x_col : str
         Column used for X-axis (categorical variable).
-    y_col : str
-        Column used for Y-axis (numerical variable).
-    color_col : str
-        Column used for coloring boxes (usually same as `x_col`).
+    color_col : str or None
+        Column used for coloring boxes (usually same as `x_col`). If None, all boxes belong to
+        a single trace, as with `px.box(color=None)`.
     title : str
         Title of the plot.
     color_sequence : list of str, optional
         Color palette for the boxes.
     xaxis_title : str, optional
-        Custom label for the X-axis.
+        Custom label for the X-axis. Defaults to `x_col`.
     yaxis_title : str, optional
         Custom label for the Y-axis.
 
@@ -214,21 +548,58 @@ def plot_box(
         A Plotly box plot.
     """
     x_title = xaxis_title if xaxis_title is not None else x_col
-    y_title = yaxis_title if yaxis_title is not None else y_col
 
-    fig = px.box(
-        data,
-        x=x_col,
-        y=y_col,
-        color=color_col,
-        color_discrete_sequence=color_sequence,
+    # Sans couleur, une seule série contient les boîtes de tous les groupes de l'axe X
+    groups = (
+        [("", stats)]
+        if color_col is None
+        else stats.groupby(color_col, observed=True, sort=False)
     )
 
+    fig = go.Figure()
+    for i, (color_value, group) in enumerate(groups):
+        color = color_sequence[i % len(color_sequence)]
+        name = str(color_value)
+        x_values = group[x_col].astype(str).tolist()
+
+        fig.add_trace(
+            go.Box(
+                x=x_values,
+                q1=group["q1"],
+                median=group["median"],
+                q3=group["q3"],
+                lowerfence=group["lowerfence"],
+                upperfence=group["upperfence"],
+                mean=group["mean"],
+                name=name,
+                marker_color=color,
+                offsetgroup=name,
+                legendgroup=name,
+                showlegend=color_col is not None,
+            )
+        )
+        # Valeurs atypiques (échantillon plafonné)
+        fig.add_trace(
+            go.Scatter(
+                x=np.repeat(x_values, group["outliers"].map(len)),
+                y=np.concatenate(group["outliers"].tolist()),
+                mode="markers",
+                marker_color=color,
+                name=name,
+                offsetgroup=name,
+                legendgroup=name,
+                showlegend=False,
+            )
+        )
+
+    mode = "overlay" if color_col in (None, x_col) else "group"
     fig.update_layout(
         title_text=title,
         xaxis_title_text=x_title,
-        yaxis_title_text=y_title,
+        yaxis_title_text=yaxis_title,
         legend_title_text=color_col,
+        boxmode=mode,
+        scattermode=mode,
         bargap=0.2,
         bargroupgap=0.1,
         width=800,
@@ -238,6 +609,68 @@ def plot_box(
     return fig
 
 
+@timed_function
+def plot_box(
+    data,
+    x_col,
+    y_col,
+    color_col,
+    title,
+    color_sequence=["rgb(246, 207, 113)", "rgb(102, 197, 204)"],
+    xaxis_title=None,
+    yaxis_title=None,
+    max_outliers=MAX_BOX_OUTLIERS,
+):
+    """
+    Creates a box plot to visualize the distribution of a numeric variable across categories.
+
+    The box statistics are computed server-side (see `box_statistics`) and cached per
+    DataFrame and (column, grouping) pair: the figure only contains the quartiles, whiskers and
+    a capped sample of outliers, whatever the number of respondents.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        Input data to plot.
+    x_col : str
+        Column used for X-axis (categorical variable).
+    y_col : str
+        Column used for Y-axis (numerical variable).
+    color_col : str
+        Column used for coloring boxes (usually same as `x_col`).
+    title : str
+        Title of the plot.
+    color_sequence : list of str, optional
+        Color palette for the boxes.
+    xaxis_title : str, optional
+        Custom label for the X-axis.
+    yaxis_title : str, optional
+        Custom label for the Y-axis.
+    max_outliers : int, optional
+        Maximum number of outliers drawn per box.
+
+    Returns
+    -------
+    plotly.graph_objects.Figure
+        A Plotly box plot.
+    """
+    cache = _frame_cache(data)
+    key = ("box", x_col, y_col, color_col, max_outliers)
+    if key not in cache:
+        cache[key] = box_statistics(data, x_col, y_col, color_col, max_outliers)
+
+    return plot_box_from_stats(
+        cache[key],
+        x_col,
+        color_col,
+        title,
+        color_sequence=color_sequence,
+        xaxis_title=xaxis_title,
+        yaxis_title=yaxis_title if yaxis_title is not None else y_col,
+    )
+
+
+@timed_function
 def plot_map(df_carto, min_respondents=100):
     """
     Creates a choropleth map showing the employment rate per country
@@ -273,6 +706,7 @@ def plot_map(df_carto, min_respondents=100):
     return fig
 
 
+@timed_function
 def plot_choropleth_map(
     df,
     location_col,
@@ -332,6 +766,56 @@ def plot_choropleth_map(
     return fig
 
 
+@timed_function
+def plot_fairness_intervals(data, title, epsilon=0.8):
+    """
+    Creates a dot plot of fairness ratios with their bootstrap confidence intervals.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        DataFrame with columns 'model', 'subgroup', 'metric', 'ratio', 'lower' and 'upper'.
+    title : str
+        Title of the plot.
+    epsilon : float, optional
+        Fairness threshold; the acceptable area is [epsilon, 1/epsilon] (default is 0.8).
+
+    Returns
+    -------
+    plotly.graph_objects.Figure
+        A Plotly scatter plot with asymmetric error bars.
+    """
+    data = data.assign(
+        error_plus=data["upper"] - data["ratio"],
+        error_minus=data["ratio"] - data["lower"],
+    )
+
+    fig = px.scatter(
+        data,
+        x="ratio",
+        y="metric",
+        color="model",
+        facet_col="subgroup",
+        error_x="error_plus",
+        error_x_minus="error_minus",
+        color_discrete_sequence=px.colors.qualitative.Pastel,
+    )
+
+    fig.add_vrect(x0=epsilon, x1=1 / epsilon, fillcolor="green", opacity=0.1, line_width=0)
+    fig.add_vline(x=1, line_dash="dash", line_color="grey")
+
+    fig.update_layout(
+        title_text=title,
+        yaxis_title_text="Métrique",
+        legend_title_text="Modèle",
+        height=500,
+    )
+    fig.update_xaxes(title_text="Ratio")
+
+    return fig
+
+
+@timed_function
 def make_wordcloud(data, col):
     """
     Generates and plots a word cloud from a specified column of a DataFrame.
@@ -341,7 +825,9 @@ def make_wordcloud(data, col):
     data : pandas.DataFrame
         Input data.
     col : str
-        Column containing text data (e.g., delimited by semicolons).
+        Column containing text data (e.g., delimited by semicolons). Items are split as in
+        `compute_top_languages_count`: spaces around the semicolons are ignored, as are empty
+        items and missing values.
 
     Returns
     -------
@@ -350,8 +836,12 @@ def make_wordcloud(data, col):
     collections.Counter
         Counter object with word frequencies.
     """
-    tokens = [str(cat).split(";") for cat in data[col]]
-    item_all = [item for sublist in tokens for item in sublist]  # découpage en mots
+    # Importés ici : seule la page des langages utilise matplotlib et wordcloud
+    import matplotlib.pyplot as plt
+    from wordcloud import WordCloud
+
+    tokens = [LANGUAGE_SEPARATOR.split(str(cat).strip()) for cat in data[col].dropna()]
+    item_all = [item for sublist in tokens for item in sublist if item]  # découpage en mots
     item_count = Counter(item_all)  # décompte occurrences
 
     # Création d'un nuage de mots
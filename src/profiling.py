@@ -0,0 +1,246 @@
+"""
+Ce module capture, à la demande, un profil d'exécution (cProfile) et un instantané des
+allocations mémoire (tracemalloc) pour une exécution d'une page de l'application.
+
+La capture est déclenchée :
+- par la variable d'environnement `profile_pages` : `all`, ou liste de noms de pages séparés par
+  des virgules (par exemple `taux_emploi,filtres_croises`) ; toutes les exécutions de ces pages
+  sont alors profilées ;
+- par un opérateur, pour une seule exécution, avec le paramètre d'URL `?profile=<jeton>`, si la
+  variable d'environnement `profile_token` est renseignée et que le jeton correspond.
+
+Les fichiers sont écrits dans `logs/profiles/` (variable `profile_dir`) sous le nom
+`<page>_<horodatage>_<pid>.prof` (statistiques `pstats`) et
+`<page>_<horodatage>_<pid>.tracemalloc` (instantané `tracemalloc`). La page « Profils » de
+l'application permet de les consulter.
+"""
+
+import cProfile
+import hmac
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+import pandas as pd
+
+DEFAULT_PROFILE_DIR = "logs/profiles"
+PROFILE_QUERY_PARAM = "profile"
+# Nombre d'appels conservés par tracemalloc pour chaque allocation
+TRACEMALLOC_FRAMES = 10
+
+# Une seule capture à la fois : cProfile et tracemalloc sont globaux au processus
+_active = None
+_active_lock = threading.Lock()
+
+
+def profile_dir():
+    """Répertoire des captures."""
+    return os.environ.get("profile_dir", DEFAULT_PROFILE_DIR)
+
+
+def profiling_requested(page):
+    """
+    Indique si l'exécution en cours de la page doit être profilée (voir le docstring du module).
+    """
+    pages = os.environ.get("profile_pages", "")
+    if pages.strip() == "all" or page in {p.strip() for p in pages.split(",")}:
+        return True
+
+    token = os.environ.get("profile_token")
+    if not token:
+        return False
+    try:
+        import streamlit as st
+
+        value = st.query_params.get(PROFILE_QUERY_PARAM)
+    except Exception:
+        # Hors d'une session Streamlit
+        return False
+
+    # Comparaison sur les octets : `compare_digest` refuse les chaînes non ASCII
+    return value is not None and hmac.compare_digest(
+        value.encode("utf-8"), token.encode("utf-8")
+    )
+
+
+class PageProfiler:
+    """
+    Capture cProfile et tracemalloc d'une exécution de page.
+
+    Parameters
+    ----------
+    page : str
+        Nom de la page, utilisé dans le nom des fichiers.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self._profile = None
+        self._started_tracemalloc = False
+        self._thread = None
+
+    def start(self):
+        """
+        Démarre la capture. Si une autre capture est en cours dans le processus, cette
+        exécution n'est pas profilée.
+
+        Une capture dont l'exécution s'est interrompue avant `stop` (par exemple par
+        `st.stop()`) est abandonnée dès que son fil d'exécution est terminé.
+
+        Returns
+        -------
+        bool
+            True si la capture a démarré.
+        """
+        global _active
+        with _active_lock:
+            if _active is not None:
+                if _active._thread.is_alive():
+                    return False
+                _active._abandon()
+            _active = self
+
+        self._thread = threading.current_thread()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._started_tracemalloc = True
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+        return True
+
+    def stop(self):
+        """
+        Arrête la capture et écrit les fichiers.
+
+        Returns
+        -------
+        str or None
+            Préfixe commun des fichiers écrits (sans extension), ou None si rien n'a été
+            capturé.
+        """
+        if self._profile is None:
+            return None
+
+        try:
+            self._profile.disable()
+            snapshot = tracemalloc.take_snapshot()
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+
+            directory = profile_dir()
+            os.makedirs(directory, exist_ok=True)
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            prefix = os.path.join(directory, f"{self.page}_{stamp}_{os.getpid()}")
+            self._profile.dump_stats(f"{prefix}.prof")
+            snapshot.dump(f"{prefix}.tracemalloc")
+        finally:
+            self._release()
+
+        return prefix
+
+    def _abandon(self):
+        # Capture interrompue : rien n'est écrit
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+        self._release()
+
+    def _release(self):
+        global _active
+        self._profile = None
+        with _active_lock:
+            if _active is self:
+                _active = None
+
+
+def start_page_profiling(page):
+    """
+    Démarre la capture de l'exécution en cours de la page si elle est demandée.
+
+    Returns
+    -------
+    PageProfiler or None
+        Le profileur démarré, ou None.
+    """
+    if not profiling_requested(page):
+        return None
+
+    profiler = PageProfiler(page)
+    return profiler if profiler.start() else None
+
+
+def list_profiles(directory=None):
+    """
+    Liste les captures disponibles, de la plus récente à la plus ancienne.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Les colonnes 'page', 'captured_at' (horodatage du fichier) et 'prefix' (chemin des
+        fichiers sans extension).
+    """
+    directory = directory or profile_dir()
+    rows = []
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            if not name.endswith(".prof"):
+                continue
+            prefix = os.path.join(directory, name[: -len(".prof")])
+            page = name.rsplit("_", 2)[0]
+            captured_at = pd.Timestamp(os.path.getmtime(f"{prefix}.prof"), unit="s")
+            rows.append((page, captured_at, prefix))
+
+    profiles = pd.DataFrame(rows, columns=["page", "captured_at", "prefix"])
+    return profiles.sort_values("captured_at", ascending=False, ignore_index=True)
+
+
+def top_functions(prefix, n=30, sort_by="cumtime"):
+    """
+    Fonctions les plus coûteuses d'une capture cProfile.
+
+    Parameters
+    ----------
+    prefix : str
+        Chemin des fichiers de la capture, sans extension.
+    n : int, optional
+        Nombre de fonctions renvoyées.
+    sort_by : str, optional
+        'cumtime' (temps cumulé, appels inclus) ou 'tottime' (temps propre).
+
+    Returns
+    -------
+    pandas.DataFrame
+        Les colonnes 'function', 'location', 'ncalls', 'tottime' et 'cumtime' (en secondes).
+    """
+    stats = pstats.Stats(f"{prefix}.prof")
+    rows = [
+        (func, f"{filename}:{line}", ncalls, tottime, cumtime)
+        for (filename, line, func), (_, ncalls, tottime, cumtime, _) in stats.stats.items()
+    ]
+    functions = pd.DataFrame(
+        rows, columns=["function", "location", "ncalls", "tottime", "cumtime"]
+    )
+    return functions.nlargest(n, sort_by).reset_index(drop=True)
+
+
+def top_allocations(prefix, n=30):
+    """
+    Lignes de code ayant alloué le plus de mémoire encore utilisée à la fin de l'exécution.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Les colonnes 'location', 'size_kb' et 'count' (nombre de blocs alloués).
+    """
+    snapshot = tracemalloc.Snapshot.load(f"{prefix}.tracemalloc").filter_traces(
+        [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ]
+    )
+    rows = [
+        (f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}", stat.size / 1024, stat.count)
+        for stat in snapshot.statistics("lineno")[:n]
+    ]
+    return pd.DataFrame(rows, columns=["location", "size_kb", "count"])
@@ -0,0 +1,419 @@
+"""
+Ce module propose des résumés approchés (« sketches ») des quantiles des variables numériques.
+
+L'algorithme est celui de KLL (Karnin, Lang et Liberty) : les valeurs sont conservées dans une
+pile de niveaux, et lorsqu'un niveau dépasse sa capacité, il est trié puis une valeur sur deux
+(en commençant au hasard par la première ou la deuxième) est promue au niveau supérieur avec un
+poids doublé. La mémoire utilisée ne dépend que du paramètre de précision `k`, et non du nombre
+de valeurs résumées ; l'erreur sur le rang des quantiles est donnée par
+`normalized_rank_error(k)` (k = 200 : environ 1.3 %).
+
+Les sketches sont alimentés morceau par morceau et fusionnables : un sketch par partition (ou
+par année, ou par processus) peut être calculé séparément, puis combiné aux autres sans
+reparcourir les données. Tant que le nombre de valeurs ne dépasse pas la capacité du premier
+niveau, les quantiles sont exacts.
+"""
+
+from functools import lru_cache
+import math
+
+import numpy as np
+import pandas as pd
+
+from src.chunked_aggregation import DEFAULT_CHUNKSIZE
+from src.data_loading import dataset_version, iter_survey_batches
+from src.data_preprocessing import labels_translation
+from src.metrics import timed_function
+
+DEFAULT_K = 200
+SKETCH_COLS = ["PreviousSalary", "YearsCode", "YearsCodePro", "ComputerSkills"]
+SKETCH_GROUP_COLS = ["EmployedCat", "Gender"]
+
+# Rapport entre les capacités de deux niveaux successifs
+_CAPACITY_RATIO = 2 / 3
+
+
+def normalized_rank_error(k):
+    """
+    Erreur approchée sur le rang normalisé (entre 0 et 1) des quantiles d'un sketch de
+    paramètre `k`, avec une confiance de 99 % (constantes empiriques de l'implémentation de
+    référence DataSketches).
+    """
+    return 2.296 / k**0.9723
+
+
+def k_for_error(epsilon):
+    """
+    Plus petit paramètre `k` garantissant une erreur de rang d'au plus `epsilon`.
+    """
+    return max(8, math.ceil((2.296 / epsilon) ** (1 / 0.9723)))
+
+
+class KLLSketch:
+    """
+    Sketch KLL des quantiles d'une variable numérique.
+
+    Parameters
+    ----------
+    k : int, optional
+        Paramètre de précision (capacité du niveau le plus haut). Voir `k_for_error` pour le
+        déduire d'une erreur de rang maximale.
+    seed : int, optional
+        Graine du générateur aléatoire des compactions, pour des résultats reproductibles.
+    """
+
+    def __init__(self, k=DEFAULT_K, seed=None):
+        self.k = int(k)
+        self.n = 0
+        self.sum = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def epsilon(self):
+        """Erreur approchée sur le rang normalisé des quantiles."""
+        return normalized_rank_error(self.k)
+
+    @property
+    def n_retained(self):
+        """Nombre de valeurs conservées par le sketch."""
+        return sum(len(level) for level in self.levels)
+
+    @property
+    def mean(self):
+        """Moyenne exacte des valeurs résumées."""
+        return self.sum / self.n if self.n else np.nan
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, math.ceil(self.k * _CAPACITY_RATIO**depth))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            if len(self.levels[level]) <= self._capacity(level):
+                level += 1
+                continue
+
+            grew = level + 1 == len(self.levels)
+            if grew:
+                self.levels.append(np.empty(0))
+
+            items = np.sort(self.levels[level])
+            # Avec un nombre impair de valeurs, la plus petite reste à ce niveau
+            kept, items = items[: len(items) % 2], items[len(items) % 2:]
+            promoted = items[self._rng.integers(2)::2]
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            self.levels[level] = kept
+
+            # Un niveau de plus réduit la capacité des niveaux inférieurs
+            level = 0 if grew else level + 1
+
+    def update(self, values):
+        """
+        Ajoute des valeurs au sketch (les valeurs manquantes sont ignorées).
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+
+        self.n += len(values)
+        self.sum += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+        return self
+
+    def merge(self, other):
+        """
+        Fusionne un autre sketch (autre morceau, autre partition) dans celui-ci.
+        """
+        self.k = min(self.k, other.k)
+        self.n += other.n
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self._compress()
+
+        return self
+
+    def weighted_items(self):
+        """
+        Valeurs conservées, triées, et leurs poids (nombre de valeurs résumées par chacune).
+        """
+        items = np.concatenate(self.levels)
+        weights = np.concatenate(
+            [np.full(len(level), 2**i, dtype=np.int64) for i, level in enumerate(self.levels)]
+        )
+        order = np.argsort(items, kind="stable")
+
+        return items[order], weights[order]
+
+    def quantiles(self, q):
+        """
+        Quantiles approchés (exacts, avec interpolation linéaire, tant qu'aucune compaction n'a
+        eu lieu).
+
+        Parameters
+        ----------
+        q : float or list of float
+            Ordres des quantiles, entre 0 et 1.
+
+        Returns
+        -------
+        numpy.ndarray
+            Les quantiles (NaN si le sketch est vide).
+        """
+        q = np.atleast_1d(np.asarray(q, dtype=float))
+        if not self.n:
+            return np.full(len(q), np.nan)
+        if len(self.levels) == 1:
+            return np.quantile(self.levels[0], q)
+
+        items, weights = self.weighted_items()
+        cumulative = np.cumsum(weights)
+        positions = np.searchsorted(cumulative, q * self.n, side="left")
+        result = items[np.minimum(positions, len(items) - 1)]
+        result[q <= 0] = self.min
+        result[q >= 1] = self.max
+
+        return result
+
+    def quantile(self, q):
+        """Quantile approché d'ordre `q`."""
+        return float(self.quantiles([q])[0])
+
+    def rank(self, value):
+        """Part approchée (entre 0 et 1) des valeurs inférieures ou égales à `value`."""
+        if not self.n:
+            return np.nan
+        items, weights = self.weighted_items()
+        return float(weights[items <= value].sum() / self.n)
+
+    def to_dict(self):
+        """
+        Représentation sérialisable (JSON) du sketch, pour le combiner entre processus.
+        """
+        return {
+            "k": self.k,
+            "n": self.n,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+            "levels": [level.tolist() for level in self.levels],
+        }
+
+    @classmethod
+    def from_dict(cls, state, seed=None):
+        """Reconstruit un sketch à partir de `to_dict`."""
+        sketch = cls(state["k"], seed=seed)
+        sketch.n, sketch.sum = state["n"], state["sum"]
+        sketch.min, sketch.max = state["min"], state["max"]
+        sketch.levels = [np.asarray(level, dtype=float) for level in state["levels"]]
+
+        return sketch
+
+
+class GroupedQuantileSketches:
+    """
+    Sketches des quantiles de plusieurs variables, sur l'ensemble des répondants et par groupe.
+
+    Parameters
+    ----------
+    value_cols : list of str, optional
+        Variables numériques résumées (par défaut `SKETCH_COLS`).
+    group_cols : list of str, optional
+        Variables de regroupement (par défaut `SKETCH_GROUP_COLS`). Un sketch est tenu pour
+        chaque modalité de chacune d'elles.
+    k : int, optional
+        Paramètre de précision des sketches.
+    seed : int, optional
+        Graine des générateurs aléatoires des sketches.
+    """
+
+    def __init__(
+        self, value_cols=SKETCH_COLS, group_cols=SKETCH_GROUP_COLS, k=DEFAULT_K, seed=0
+    ):
+        self.value_cols = list(value_cols)
+        self.group_cols = list(group_cols)
+        self.k = k
+        self.seed = seed
+        self.version = None
+        # {(variable, variable de regroupement ou None, modalité ou None): sketch}
+        self.sketches = {}
+        self._categories = {}
+
+    def sketch(self, col, group_col=None, group_value=None):
+        """
+        Renvoie le sketch d'une variable, pour tous les répondants ou pour une modalité.
+        """
+        key = (col, group_col, group_value)
+        if key not in self.sketches:
+            self.sketches[key] = KLLSketch(self.k, seed=self.seed)
+        return self.sketches[key]
+
+    def _update_categories(self, group_col, values):
+        known = self._categories.setdefault(group_col, [])
+        categories = (
+            values.cat.categories if isinstance(values.dtype, pd.CategoricalDtype) else []
+        )
+        known.extend(category for category in categories if category not in known)
+
+    def update(self, chunk):
+        """
+        Ajoute un morceau de données aux sketches.
+        """
+        for col in self.value_cols:
+            values = pd.to_numeric(chunk[col], errors="coerce")
+            self.sketch(col).update(values)
+            for group_col in self.group_cols:
+                if group_col not in chunk:
+                    continue
+                self._update_categories(group_col, chunk[group_col])
+                for group_value, group in values.groupby(chunk[group_col], observed=True):
+                    self.sketch(col, group_col, group_value).update(group)
+
+        return self
+
+    def merge(self, other):
+        """
+        Fusionne les sketches d'un autre objet `GroupedQuantileSketches`.
+        """
+        for key, sketch in other.sketches.items():
+            self.sketch(*key).merge(sketch)
+        for group_col, categories in other._categories.items():
+            self._update_categories(group_col, pd.Series(pd.Categorical([], categories)))
+
+        return self
+
+    def groups(self, col, group_col):
+        """
+        Modalités de `group_col` observées pour la variable `col`, dans l'ordre des catégories.
+        """
+        values = [value for c, g, value in self.sketches if c == col and g == group_col]
+        order = self._categories.get(group_col, [])
+        return sorted(
+            values,
+            key=lambda value: (order.index(value), "") if value in order else (len(order), value),
+        )
+
+    def quantiles(self, col, group_col=None, q=(0.25, 0.5, 0.75)):
+        """
+        Quantiles approchés d'une variable, pour tous les répondants ou par groupe.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Une ligne par groupe, avec `group_col` (si renseignée), 'n' et une colonne par
+            quantile.
+        """
+        group_values = [None] if group_col is None else self.groups(col, group_col)
+        rows = []
+        for group_value in group_values:
+            sketch = self.sketch(col, group_col, group_value)
+            row = {} if group_col is None else {group_col: group_value}
+            row["n"] = sketch.n
+            row.update(zip(q, sketch.quantiles(q)))
+            rows.append(row)
+
+        return pd.DataFrame(rows)
+
+    def box_statistics(self, col, group_col, max_outliers=200):
+        """
+        Statistiques des boîtes à moustaches de `col` par modalité de `group_col`, au format
+        de `src.plot_utils.box_statistics`, calculées à partir des sketches.
+
+        Les quartiles sont approchés. Les moustaches s'arrêtent aux valeurs conservées par le
+        sketch les plus extrêmes à moins de 1.5 IQR de la boîte ; les valeurs atypiques sont un
+        échantillon des valeurs conservées au-delà (minimum et maximum inclus).
+        """
+        rng = np.random.default_rng(0)
+        rows = []
+        for group_value in self.groups(col, group_col):
+            sketch = self.sketch(col, group_col, group_value)
+            if not sketch.n:
+                continue
+
+            q1, median, q3 = sketch.quantiles([0.25, 0.5, 0.75])
+            iqr = q3 - q1
+            values = np.unique(np.concatenate(sketch.levels + [[sketch.min, sketch.max]]))
+            inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+            lowerfence = inside[0] if len(inside) else q1
+            upperfence = inside[-1] if len(inside) else q3
+
+            outliers = values[(values < lowerfence) | (values > upperfence)]
+            if len(outliers) > max_outliers:
+                middle = rng.choice(outliers[1:-1], size=max(max_outliers - 2, 0), replace=False)
+                outliers = np.sort(np.concatenate([outliers[:1], middle, outliers[-1:]]))
+
+            rows.append(
+                {
+                    group_col: group_value,
+                    "n": sketch.n,
+                    "mean": sketch.mean,
+                    "q1": q1,
+                    "median": median,
+                    "q3": q3,
+                    "lowerfence": lowerfence,
+                    "upperfence": upperfence,
+                    "outliers": outliers,
+                }
+            )
+
+        return pd.DataFrame(rows)
+
+
+@lru_cache(maxsize=4)
+def _build_quantile_sketches(survey_source, chunksize, years, k, *versions):
+    """
+    Construit les sketches par morceaux, une seule fois par version des fichiers sources.
+    """
+    sketches = GroupedQuantileSketches(k=k)
+    for chunk in iter_survey_batches(
+        survey_source,
+        years=years,
+        columns=SKETCH_COLS + ["Gender", "Employed"],
+        batch_size=chunksize,
+    ):
+        sketches.update(labels_translation(chunk))
+    sketches.version = "-".join([str(years), str(k), *versions])
+
+    return sketches
+
+
+@timed_function
+def load_quantile_sketches(
+    survey_source, chunksize=DEFAULT_CHUNKSIZE, years=None, k=DEFAULT_K
+):
+    """
+    Renvoie les sketches des quantiles associés à la version courante des fichiers de données.
+
+    Les sketches sont construits au premier appel puis conservés en mémoire pour toute la durée
+    du processus, tant que les fichiers sources ne changent pas.
+
+    Args:
+        survey_source (str): Chemin ou URL du CSV StackOverflow, ou répertoire du jeu
+            Parquet partitionné par année.
+        chunksize (int): Nombre de lignes lues à la fois, pour borner la mémoire utilisée.
+        years (list of int, optional): Années de l'enquête à résumer. Par défaut, toutes.
+        k (int): Paramètre de précision des sketches (voir `k_for_error`).
+
+    Returns:
+        GroupedQuantileSketches: Les sketches par variable et par groupe.
+    """
+    return _build_quantile_sketches(
+        survey_source,
+        chunksize,
+        None if years is None else tuple(sorted(years)),
+        k,
+        dataset_version(survey_source),
+    )
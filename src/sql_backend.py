@@ -0,0 +1,268 @@
+"""
+Ce module propose un moteur de requêtes SQL embarqué (DuckDB) sur les données de l'enquête.
+
+Le moteur est optionnel : DuckDB n'est importé qu'à la création d'un `SurveyQueryEngine` et
+doit être installé séparément (`pip install duckdb`). Il s'exécute entièrement en local, dans le
+processus, sur des fichiers présents sur disque (CSV, Parquet ou jeu Parquet partitionné par
+année). Les requêtes sont vectorisées et multi-threadées, et les résultats sont renvoyés sous
+forme de DataFrames pandas, directement utilisables par les fonctions de `src.plot_utils`.
+
+Vues disponibles :
+- `survey` : les données brutes de l'enquête ;
+- `survey_fr` : les mêmes données avec les libellés traduits et la colonne `EmployedCat` ;
+- `countries` : la table de référence des pays (codes ISO et continents).
+"""
+
+import os
+
+from src.data_loading import YEAR_COL, is_partitioned_dataset
+from src.data_preprocessing import (
+    EMPLOYMENT_LABELS,
+    LABELS_TRANSLATIONS,
+    add_continent_info,
+    add_iso_codes,
+)
+
+# Séparateur des listes de langages, comme dans `compute_top_languages_count` (expression
+# régulière : espaces autour des « ; » ignorés)
+LANGUAGE_SEPARATOR = r"\s*;\s*"
+
+
+def _quote(identifier):
+    """Protège un nom de colonne ou de vue pour l'inclure dans une requête."""
+    return '"' + str(identifier).replace('"', '""') + '"'
+
+
+def _literal(value):
+    """Protège une chaîne de caractères pour l'inclure dans une requête."""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+class SurveyQueryEngine:
+    """
+    Moteur SQL embarqué sur un instantané des données de l'enquête.
+
+    Parameters
+    ----------
+    survey_source : str
+        Fichier CSV de l'enquête, fichier Parquet, ou répertoire Parquet partitionné par année.
+    iso_df : pandas.DataFrame, optional
+        Table des codes ISO (voir `get_iso_country_codes`), pour la vue `countries`.
+    countries_lang_data_path : str, optional
+        Fichier Excel des pays et continents, pour la vue `countries`.
+    threads : int, optional
+        Nombre de threads utilisés par DuckDB. Par défaut, tous les cœurs disponibles.
+    """
+
+    def __init__(self, survey_source, iso_df=None, countries_lang_data_path=None, threads=None):
+        try:
+            import duckdb
+        except ImportError as e:
+            raise ImportError(
+                "Le moteur SQL nécessite le paquet optionnel duckdb : pip install duckdb"
+            ) from e
+
+        self.connection = duckdb.connect(database=":memory:")
+        self.connection.execute(f"SET threads TO {int(threads or os.cpu_count() or 1)}")
+
+        self._register_survey(survey_source)
+        self._register_translated_view()
+        self._register_countries(iso_df, countries_lang_data_path)
+
+    def _register_survey(self, survey_source):
+        source = str(survey_source)
+        if is_partitioned_dataset(source):
+            pattern = os.path.join(source, "**", "*.parquet")
+            relation = f"read_parquet({_literal(pattern)}, hive_partitioning = true)"
+        elif source.endswith(".parquet"):
+            relation = f"read_parquet({_literal(source)})"
+        else:
+            relation = f"read_csv({_literal(source)}, header = true)"
+
+        self.connection.execute(f"CREATE VIEW survey AS SELECT * FROM {relation}")
+        self.columns = [row[0] for row in self.connection.execute("DESCRIBE survey").fetchall()]
+
+    def _register_translated_view(self):
+        enum_values = ", ".join(_literal(label) for label in EMPLOYMENT_LABELS)
+        self.connection.execute(f"CREATE TYPE employed_cat AS ENUM ({enum_values})")
+
+        replacements = []
+        for col, mapping in LABELS_TRANSLATIONS.items():
+            if col not in self.columns:
+                continue
+            cases = " ".join(
+                f"WHEN {_literal(source)} THEN {_literal(target)}"
+                for source, target in mapping.items()
+            )
+            replacements.append(
+                f"CASE {_quote(col)} {cases} ELSE {_quote(col)} END AS {_quote(col)}"
+            )
+
+        replace_clause = f" REPLACE ({', '.join(replacements)})" if replacements else ""
+        sans_emploi, en_emploi = (_literal(label) for label in EMPLOYMENT_LABELS)
+        self.connection.execute(
+            f"""
+            CREATE VIEW survey_fr AS
+            SELECT *{replace_clause},
+                CAST(
+                    CASE
+                        WHEN "Employed" > -1 AND "Employed" <= 0 THEN {sans_emploi}
+                        WHEN "Employed" > 0 AND "Employed" <= 1 THEN {en_emploi}
+                    END AS employed_cat
+                ) AS "EmployedCat"
+            FROM survey
+            """
+        )
+
+    def _register_countries(self, iso_df, countries_lang_data_path):
+        countries = self.query('SELECT DISTINCT "Country" FROM survey WHERE "Country" IS NOT NULL')
+        if iso_df is not None:
+            countries = add_iso_codes(countries, iso_df)
+        if countries_lang_data_path is not None:
+            countries = add_continent_info(countries, countries_lang_data_path)
+
+        self.connection.register("countries_df", countries)
+        self.connection.execute("CREATE VIEW countries AS SELECT * FROM countries_df")
+
+    def query(self, sql, params=None):
+        """
+        Exécute une requête SQL et renvoie le résultat sous forme de DataFrame pandas.
+        """
+        return self.connection.execute(sql, params or []).df()
+
+    def _relation(self, group_cols, translated):
+        """
+        Vue à interroger : les données de l'enquête, jointes à `countries` si une colonne de la
+        table de référence est demandée.
+        """
+        view = "survey_fr" if translated else "survey"
+        country_cols = [
+            row[0] for row in self.connection.execute("DESCRIBE countries").fetchall()
+        ]
+        if any(col in country_cols and col not in self.columns for col in group_cols):
+            return f'{view} s JOIN countries c USING ("Country")'
+        return view
+
+    def group_percentage_by(
+        self, group_cols, count_col_name="count", percent_col_name="percentage", translated=True
+    ):
+        """
+        Équivalent SQL de `group_percentage_by`.
+
+        Parameters
+        ----------
+        group_cols : list of str
+            Colonnes de regroupement. La première sert au calcul des pourcentages.
+        count_col_name : str, optional
+            Nom de la colonne des effectifs (par défaut "count").
+        percent_col_name : str, optional
+            Nom de la colonne des pourcentages (par défaut "percentage").
+        translated : bool, optional
+            Si True (par défaut), utilise les libellés traduits en français.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Les colonnes de regroupement, les effectifs et les pourcentages.
+        """
+        relation = self._relation(group_cols, translated)
+        cols = ", ".join(_quote(col) for col in group_cols)
+        first = _quote(group_cols[0])
+        not_null = " AND ".join(f"{_quote(col)} IS NOT NULL" for col in group_cols)
+
+        return self.query(
+            f"""
+            WITH grouped AS (
+                SELECT {cols}, COUNT(*) AS {_quote(count_col_name)}
+                FROM {relation}
+                WHERE {not_null}
+                GROUP BY {cols}
+            ),
+            totals AS (
+                SELECT {first}, COUNT(*) AS total
+                FROM {relation}
+                WHERE {first} IS NOT NULL
+                GROUP BY {first}
+            )
+            SELECT
+                {", ".join(f"g.{_quote(col)}" for col in group_cols)},
+                g.{_quote(count_col_name)},
+                ROUND(g.{_quote(count_col_name)} / t.total * 100, 1)
+                    AS {_quote(percent_col_name)}
+            FROM grouped g
+            JOIN totals t USING ({first})
+            ORDER BY {", ".join(f"g.{_quote(col)}" for col in group_cols)}
+            """
+        )
+
+    def employment_rate(self, group_cols, value_col="Employed", translated=False):
+        """
+        Équivalent SQL de `df.groupby(group_cols)[value_col].agg(["count", "mean"])`.
+
+        Les colonnes de la table `countries` (par exemple 'ISO' ou 'Continent') peuvent être
+        utilisées comme colonnes de regroupement : la jointure est alors faite automatiquement.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Les colonnes de regroupement, 'count' et 'mean'.
+        """
+        relation = self._relation(group_cols, translated)
+        cols = ", ".join(_quote(col) for col in group_cols)
+        not_null = " AND ".join(f"{_quote(col)} IS NOT NULL" for col in group_cols)
+
+        return self.query(
+            f"""
+            SELECT {cols}, COUNT({_quote(value_col)}) AS "count", AVG({_quote(value_col)}) AS "mean"
+            FROM {relation}
+            WHERE {not_null}
+            GROUP BY {cols}
+            ORDER BY {cols}
+            """
+        )
+
+    def language_counts(self, col="HaveWorkedWith", top=None, years=None):
+        """
+        Nombre d'occurrences de chaque langage (valeurs séparées par des ';').
+
+        Parameters
+        ----------
+        col : str, optional
+            Colonne contenant les langages (par défaut "HaveWorkedWith").
+        top : int, optional
+            Nombre de langages à renvoyer, du plus au moins cité. Par défaut, tous.
+        years : list of int, optional
+            Années à prendre en compte (jeu partitionné uniquement).
+
+        Returns
+        -------
+        pandas.DataFrame
+            Les colonnes 'Langage' et 'Count', triées par nombre d'occurrences décroissant.
+        """
+        where = f"{_quote(col)} IS NOT NULL"
+        params = []
+        if years is not None and YEAR_COL in self.columns:
+            where += f" AND {_quote(YEAR_COL)} IN (SELECT UNNEST(?))"
+            params.append([int(year) for year in years])
+        limit = f"LIMIT {int(top)}" if top is not None else ""
+
+        return self.query(
+            f"""
+            WITH languages AS (
+                -- Même découpage que `compute_top_languages_count` : espaces autour des « ; »
+                -- et aux extrémités ignorés
+                SELECT UNNEST(
+                    regexp_split_to_array(trim({_quote(col)}), {_literal(LANGUAGE_SEPARATOR)})
+                ) AS "Langage"
+                FROM survey
+                WHERE {where}
+            )
+            SELECT "Langage", COUNT(*) AS "Count"
+            FROM languages
+            WHERE "Langage" <> ''
+            GROUP BY "Langage"
+            ORDER BY "Count" DESC, "Langage"
+            {limit}
+            """,
+            params,
+        )
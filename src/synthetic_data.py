@@ -0,0 +1,383 @@
+"""
+Ce module génère des données synthétiques au format de l'enquête StackOverflow, pour tester
+l'application et ses traitements sur des volumes bien supérieurs à l'extrait de 73 000 lignes,
+sans accès au stockage distant.
+
+Le générateur apprend, sur le vrai fichier, les lois marginales et les lois jointes deux à deux
+des colonnes, puis les combine en un arbre de Chow-Liu : l'arbre couvrant qui maximise la somme
+des informations mutuelles entre colonnes reliées. Chaque colonne est ensuite tirée selon sa loi
+conditionnelle sachant sa colonne parente dans l'arbre, ce qui reproduit exactement les lois
+marginales et les dépendances les plus fortes (par exemple entre le nombre de langages maîtrisés
+et l'emploi).
+
+- Les colonnes catégorielles (`Age`, `Gender`, `EdLevel`, `Country`, `Employed`...) sont
+  utilisées telles quelles.
+- Les colonnes numériques (`YearsCode`, `PreviousSalary`...) sont découpées en classes de
+  quantiles ; une valeur est tirée parmi les valeurs observées de la classe tirée.
+- La colonne des langages (`HaveWorkedWith`) est représentée par une variable binaire par
+  langage, ce qui reproduit aussi les associations entre langages.
+
+Les lignes sont produites par morceaux, de façon déterministe pour une graine et une taille de
+morceau données, et écrites en CSV (format de l'extrait), en fichier Parquet ou dans un jeu
+Parquet partitionné par année (voir `src.data_loading`).
+
+Utilisation :
+    python -m src.synthetic_data data/StackOverflowSurvey.csv data/synthetic.csv --rows 5000000
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.chunked_aggregation import DEFAULT_CHUNKSIZE
+from src.data_loading import (
+    DEFAULT_SURVEY_YEAR,
+    YEAR_COL,
+    load_survey,
+    reset_survey_partition,
+)
+
+LANGUAGES_COL = "HaveWorkedWith"
+# Au-delà de ce nombre de valeurs distinctes, une colonne numérique est découpée en classes
+MAX_CATEGORIES = 30
+DEFAULT_N_BINS = 20
+
+
+def _normalized_languages(values):
+    return values.str.replace(r"\s*;\s*", ";", regex=True).str.strip()
+
+
+class _CategoricalColumn:
+    """Colonne catégorielle : les codes sont les indices des modalités (NaN compris)."""
+
+    def __init__(self, values):
+        codes, categories = pd.factorize(values, use_na_sentinel=False, sort=True)
+        self.categories = np.asarray(categories, dtype=object)
+        self.codes = codes
+
+    @property
+    def n_codes(self):
+        return len(self.categories)
+
+    def decode(self, codes, rng):
+        return self.categories[codes]
+
+
+class _NumericColumn:
+    """
+    Colonne numérique découpée en classes de quantiles ; la dernière classe regroupe les
+    valeurs manquantes. Chaque classe conserve ses valeurs observées et leurs effectifs.
+    """
+
+    def __init__(self, values, n_bins):
+        values = np.asarray(values, dtype=float)
+        missing = np.isnan(values)
+        if missing.all():
+            edges = np.zeros(1)
+        else:
+            edges = np.unique(np.quantile(values[~missing], np.linspace(0, 1, n_bins + 1)))
+        n_value_bins = max(len(edges) - 1, 1)
+
+        codes = np.clip(np.searchsorted(edges, values, side="right") - 1, 0, n_value_bins - 1)
+        codes[missing] = n_value_bins
+        self.codes = codes
+
+        self.bin_values, self.bin_cumprobs = [], []
+        for code in range(n_value_bins + 1):
+            observed, counts = np.unique(values[codes == code], return_counts=True)
+            if code == n_value_bins:
+                observed, counts = np.array([np.nan]), np.array([1])
+            self.bin_values.append(observed)
+            self.bin_cumprobs.append(np.cumsum(counts) / counts.sum() if len(counts) else None)
+
+    @property
+    def n_codes(self):
+        return len(self.bin_values)
+
+    def decode(self, codes, rng):
+        return _sample_grouped(rng, codes, self.bin_cumprobs, self.bin_values)
+
+
+def _mutual_information(codes_a, n_a, codes_b, n_b):
+    joint = np.bincount(codes_a * n_b + codes_b, minlength=n_a * n_b).reshape(n_a, n_b)
+    joint = joint / joint.sum()
+    outer = joint.sum(axis=1, keepdims=True) * joint.sum(axis=0, keepdims=True)
+    nonzero = joint > 0
+    return float(np.sum(joint[nonzero] * np.log(joint[nonzero] / outer[nonzero])))
+
+
+def _maximum_spanning_tree(weights):
+    """
+    Arbre couvrant de poids maximal (algorithme de Prim), enraciné au nœud 0.
+
+    Returns
+    -------
+    parents : list of int
+        Parent de chaque nœud (-1 pour la racine).
+    order : list of int
+        Nœuds dans l'ordre de leur ajout : chaque parent précède ses enfants.
+    """
+    n = len(weights)
+    parents = [-1] * n
+    order = [0]
+    in_tree = np.zeros(n, dtype=bool)
+    in_tree[0] = True
+    best = weights[0].astype(float).copy()
+    best_parent = np.zeros(n, dtype=int)
+
+    for _ in range(n - 1):
+        candidates = np.where(in_tree, -np.inf, best)
+        node = int(np.argmax(candidates))
+        in_tree[node] = True
+        parents[node] = int(best_parent[node])
+        order.append(node)
+        closer = ~in_tree & (weights[node] > best)
+        best[closer] = weights[node][closer]
+        best_parent[closer] = node
+
+    return parents, order
+
+
+def _sample_grouped(rng, groups, cumprobs, values=None):
+    """
+    Tire, pour chaque ligne, une valeur selon la loi de son groupe.
+
+    Parameters
+    ----------
+    rng : numpy.random.Generator
+        Générateur aléatoire.
+    groups : numpy.ndarray
+        Groupe de chaque ligne (entier).
+    cumprobs : list of numpy.ndarray
+        Probabilités cumulées des valeurs, par groupe.
+    values : list of numpy.ndarray, optional
+        Valeurs possibles, par groupe. Par défaut, les indices des valeurs.
+    """
+    order = np.argsort(groups, kind="stable")
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(groups, minlength=len(cumprobs)))])
+    out = np.empty(len(groups), dtype=int if values is None else float)
+
+    for group, (start, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+        if start == end:
+            continue
+        rows = order[start:end]
+        cum = cumprobs[group]
+        drawn = np.searchsorted(cum, rng.random(end - start), side="right")
+        drawn = np.minimum(drawn, len(cum) - 1)
+        out[rows] = drawn if values is None else values[group][drawn]
+
+    return out
+
+
+class SyntheticSurveyModel:
+    """
+    Modèle de Chow-Liu des colonnes de l'enquête.
+
+    Parameters
+    ----------
+    n_bins : int, optional
+        Nombre de classes de quantiles des colonnes numériques.
+    """
+
+    def __init__(self, n_bins=DEFAULT_N_BINS):
+        self.n_bins = n_bins
+        self.columns = []
+        self.languages = []
+        self.dtypes = {}
+
+    def fit(self, df):
+        """
+        Apprend les lois marginales et jointes deux à deux des colonnes de `df`.
+
+        Parameters
+        ----------
+        df : pandas.DataFrame
+            Données de l'enquête (libellés d'origine, non traduits).
+
+        Returns
+        -------
+        SyntheticSurveyModel
+            Le modèle ajusté.
+        """
+        df = df.drop(columns=YEAR_COL, errors="ignore")
+        self.columns = list(df.columns)
+        self.dtypes = {
+            col: df[col].dtype for col in self.columns if not df[col].isna().any()
+        }
+
+        nodes, names = [], []
+        for col in self.columns:
+            if col == LANGUAGES_COL:
+                dummies = _normalized_languages(df[col]).str.get_dummies(";")
+                self.languages = list(dummies.columns)
+                for lang in self.languages:
+                    nodes.append(_CategoricalColumn(dummies[lang].to_numpy()))
+                    names.append((col, lang))
+            elif pd.api.types.is_numeric_dtype(df[col]) and df[col].nunique() > MAX_CATEGORIES:
+                nodes.append(_NumericColumn(df[col].to_numpy(), self.n_bins))
+                names.append((col, None))
+            else:
+                nodes.append(_CategoricalColumn(df[col].to_numpy()))
+                names.append((col, None))
+
+        weights = np.zeros((len(nodes), len(nodes)))
+        for i in range(len(nodes)):
+            for j in range(i + 1, len(nodes)):
+                weights[i, j] = weights[j, i] = _mutual_information(
+                    nodes[i].codes, nodes[i].n_codes, nodes[j].codes, nodes[j].n_codes
+                )
+        self.parents, self.order = _maximum_spanning_tree(weights)
+
+        # Loi marginale de la racine, puis loi de chaque nœud sachant son parent
+        self.cumprobs = []
+        for node, parent in zip(nodes, self.parents):
+            if parent < 0:
+                counts = np.bincount(node.codes, minlength=node.n_codes)[None, :]
+            else:
+                n_parent = nodes[parent].n_codes
+                counts = np.bincount(
+                    nodes[parent].codes * node.n_codes + node.codes,
+                    minlength=n_parent * node.n_codes,
+                ).reshape(n_parent, node.n_codes)
+            totals = np.maximum(counts.sum(axis=1, keepdims=True), 1)
+            self.cumprobs.append(np.cumsum(counts / totals, axis=1))
+
+        for node in nodes:
+            del node.codes
+        self.nodes, self.names = nodes, names
+        self.mutual_information = weights
+
+        return self
+
+    def sample(self, n_rows, rng):
+        """
+        Tire `n_rows` lignes synthétiques.
+
+        Parameters
+        ----------
+        n_rows : int
+            Nombre de lignes.
+        rng : numpy.random.Generator
+            Générateur aléatoire.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Les lignes, avec les colonnes et les types des données d'apprentissage.
+        """
+        codes = [None] * len(self.nodes)
+        for node in self.order:
+            parent = self.parents[node]
+            groups = np.zeros(n_rows, dtype=int) if parent < 0 else codes[parent]
+            codes[node] = _sample_grouped(rng, groups, list(self.cumprobs[node]))
+
+        columns, language_bits = {}, []
+        for (col, lang), node, node_codes in zip(self.names, self.nodes, codes):
+            if lang is None:
+                columns[col] = node.decode(node_codes, rng)
+            else:
+                language_bits.append(node.decode(node_codes, rng).astype(bool))
+
+        if self.languages:
+            columns[LANGUAGES_COL] = self._join_languages(np.column_stack(language_bits))
+
+        df = pd.DataFrame(columns)[self.columns]
+        return df.astype({col: dtype for col, dtype in self.dtypes.items() if col in df})
+
+    def _join_languages(self, bits):
+        names = np.array(self.languages, dtype=object)
+        joined = [";".join(names[row]) for row in bits]
+        return pd.Series(joined, dtype=object).replace("", np.nan).to_numpy()
+
+    def iter_chunks(self, n_rows, chunksize=DEFAULT_CHUNKSIZE, seed=0):
+        """
+        Produit `n_rows` lignes synthétiques par morceaux de `chunksize` lignes.
+
+        Chaque morceau a son propre générateur, dérivé de la graine et du numéro du morceau :
+        le résultat ne dépend que de `seed` et de `chunksize`.
+
+        Yields
+        ------
+        pandas.DataFrame
+            Un morceau, indexé par le numéro de ligne dans le jeu complet.
+        """
+        for i, start in enumerate(range(0, n_rows, chunksize)):
+            size = min(chunksize, n_rows - start)
+            chunk = self.sample(size, np.random.default_rng([seed, i]))
+            chunk.index = pd.RangeIndex(start, start + size)
+            yield chunk
+
+
+def write_synthetic_survey(
+    model, n_rows, output, chunksize=DEFAULT_CHUNKSIZE, seed=0, year=DEFAULT_SURVEY_YEAR
+):
+    """
+    Écrit des données synthétiques, morceau par morceau.
+
+    Selon `output` :
+    - `*.csv` : fichier CSV au format de l'extrait de l'enquête (index dans la première
+      colonne) ;
+    - `*.parquet` : fichier Parquet, un groupe de lignes par morceau ;
+    - autre chemin : jeu Parquet partitionné par année, les données étant écrites dans
+      `<output>/year=<year>/` (un fichier par morceau).
+
+    Returns
+    -------
+    str
+        Le chemin écrit.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    directory = os.path.dirname(output) if output.endswith((".csv", ".parquet")) else output
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    writer, schema = None, None
+    try:
+        for i, chunk in enumerate(model.iter_chunks(n_rows, chunksize, seed)):
+            if output.endswith(".csv"):
+                chunk.to_csv(output, mode="w" if i == 0 else "a", header=i == 0)
+                continue
+
+            table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            schema = table.schema
+            if output.endswith(".parquet"):
+                writer = writer or pq.ParquetWriter(output, schema)
+                writer.write_table(table)
+            else:
+                # Les fichiers d'une génération précédente de la même année sont supprimés
+                if i == 0:
+                    partition_dir = reset_survey_partition(output, year)
+                pq.write_table(table, os.path.join(partition_dir, f"part-{i:05d}.parquet"))
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Génère des données synthétiques au format de l'enquête StackOverflow."
+    )
+    parser.add_argument("source", help="Données réelles : CSV de l'enquête ou jeu partitionné")
+    parser.add_argument(
+        "output", help="Fichier .csv, fichier .parquet ou répertoire du jeu partitionné"
+    )
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Nombre de lignes")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--bins", type=int, default=DEFAULT_N_BINS)
+    parser.add_argument(
+        "--year", type=int, default=DEFAULT_SURVEY_YEAR, help="Année du jeu partitionné"
+    )
+    args = parser.parse_args()
+
+    fitted = SyntheticSurveyModel(args.bins).fit(load_survey(args.source))
+    written = write_synthetic_survey(
+        fitted, args.rows, args.output, args.chunksize, args.seed, args.year
+    )
+    print(f"{args.rows} lignes synthétiques écrites dans {written}")
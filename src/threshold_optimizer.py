@@ -0,0 +1,228 @@
+"""
+Ce module implémente une mitigation des biais en post-traitement : l'ajustement des seuils de
+décision par groupe.
+
+Les seuils sont choisis à partir des probabilités déjà prédites par un modèle, sans le
+ré-entraîner. Pour chaque groupe, toutes les valeurs de seuil candidates sont évaluées d'un coup
+grâce à un tri des scores suivi de sommes cumulées (complexité O(n log n)).
+"""
+
+import numpy as np
+import pandas as pd
+
+CRITERIA = {
+    "equal_opportunity": "TPR",
+    "demographic_parity": "STP",
+}
+
+
+def threshold_sweep(y_true, y_score):
+    """
+    Évalue tous les seuils candidats d'un groupe en une seule passe.
+
+    Un individu est classé positif si son score est supérieur ou égal au seuil. Les seuils
+    candidats sont les scores observés, plus un seuil au-dessus du maximum (aucun positif).
+
+    Paramètres
+    ----------
+    y_true : array-like
+        Labels observés (0 ou 1).
+    y_score : array-like
+        Probabilités prédites.
+
+    Retourne
+    --------
+    DataFrame
+        Une ligne par seuil candidat avec les colonnes 'threshold', 'TPR', 'STP' et 'ACC'.
+    """
+    y_true = np.asarray(y_true).astype(int)
+    y_score = np.asarray(y_score, dtype=float)
+
+    order = np.argsort(-y_score, kind="stable")
+    sorted_scores = y_score[order]
+    sorted_labels = y_true[order]
+
+    # On ne garde que la dernière position de chaque valeur de score (gestion des ex-aequo)
+    last_of_run = np.append(sorted_scores[1:] != sorted_scores[:-1], True)
+
+    true_positives = np.concatenate([[0], np.cumsum(sorted_labels)[last_of_run]])
+    predicted_positives = np.concatenate([[0], np.flatnonzero(last_of_run) + 1])
+    thresholds = np.concatenate([[np.inf], sorted_scores[last_of_run]])
+
+    n_obs = len(y_true)
+    n_positives = y_true.sum()
+    false_positives = predicted_positives - true_positives
+    true_negatives = (n_obs - n_positives) - false_positives
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tpr = true_positives / n_positives
+
+    return pd.DataFrame(
+        {
+            "threshold": thresholds,
+            "TPR": tpr,
+            "STP": predicted_positives / n_obs,
+            "ACC": (true_positives + true_negatives) / n_obs,
+        }
+    )
+
+
+def optimize_group_thresholds(
+    y_true,
+    y_score,
+    protected,
+    privileged,
+    criterion="equal_opportunity",
+    base_cutoff=0.5,
+):
+    """
+    Cherche, pour chaque groupe, le seuil de décision qui aligne le critère d'équité choisi
+    sur celui du groupe privilégié.
+
+    Le groupe privilégié conserve le seuil `base_cutoff`. Pour les autres groupes, on retient le
+    seuil dont la métrique visée est la plus proche de celle du groupe privilégié ; à écart égal,
+    celui qui maximise l'accuracy du groupe.
+
+    Paramètres
+    ----------
+    y_true : array-like
+        Labels observés (0 ou 1).
+    y_score : array-like
+        Probabilités prédites par le modèle.
+    protected : array-like
+        Valeurs de la variable protégée.
+    privileged : str
+        Modalité considérée comme privilégiée.
+    criterion : str, optional
+        "equal_opportunity" (égalité des taux de vrais positifs) ou "demographic_parity"
+        (égalité des taux de positifs).
+    base_cutoff : float, optional
+        Seuil appliqué au groupe privilégié (0.5 par défaut, comme dans dalex).
+
+    Retourne
+    --------
+    dict
+        Seuil de décision par modalité de la variable protégée.
+    """
+    if criterion not in CRITERIA:
+        raise ValueError(
+            f"Critère inconnu : {criterion!r}. Valeurs possibles : {list(CRITERIA)}"
+        )
+    metric = CRITERIA[criterion]
+
+    y_true = np.asarray(y_true).astype(int)
+    y_score = np.asarray(y_score, dtype=float)
+    protected = np.asarray(protected)
+
+    is_privileged = protected == privileged
+    if not is_privileged.any():
+        raise ValueError(f"La modalité privilégiée {privileged!r} est absente des données.")
+
+    # Valeur cible : métrique du groupe privilégié au seuil de base
+    predicted = y_score[is_privileged] >= base_cutoff
+    if metric == "TPR":
+        target = predicted[y_true[is_privileged] == 1].mean()
+    else:
+        target = predicted.mean()
+
+    thresholds = {privileged: base_cutoff}
+    for group in np.unique(protected).tolist():
+        if group == privileged:
+            continue
+        mask = protected == group
+        sweep = threshold_sweep(y_true[mask], y_score[mask])
+        gap = (sweep[metric] - target).abs().round(6)
+        if gap.isna().all():
+            thresholds[group] = base_cutoff
+            continue
+        best = sweep.assign(gap=gap).sort_values(["gap", "ACC"], ascending=[True, False])
+        thresholds[group] = float(best["threshold"].iloc[0])
+
+    return thresholds
+
+
+class GroupThresholdClassifier:
+    """
+    Enveloppe un modèle déjà entraîné pour lui appliquer des seuils de décision par groupe.
+
+    Les probabilités renvoyées par `predict_proba` sont recalées de façon monotone dans chaque
+    groupe pour que le seuil du groupe corresponde à 0.5. Le modèle enveloppé reste donc
+    utilisable tel quel par dalex (`Explainer`, `model_fairness`), qui applique un seuil de 0.5.
+
+    Paramètres
+    ----------
+    model : estimator
+        Modèle (ou pipeline) entraîné exposant `predict_proba`.
+    thresholds : dict
+        Seuil de décision par modalité de la variable protégée.
+    protected_col : str
+        Nom de la colonne contenant la variable protégée dans les données d'entrée.
+    default_threshold : float, optional
+        Seuil appliqué aux modalités absentes de `thresholds`.
+    """
+
+    _estimator_type = "classifier"
+
+    def __init__(self, model, thresholds, protected_col, default_threshold=0.5):
+        self.model = model
+        self.thresholds = thresholds
+        self.protected_col = protected_col
+        self.default_threshold = default_threshold
+        self.classes_ = getattr(model, "classes_", np.array([0, 1]))
+
+    @classmethod
+    def from_predictions(
+        cls,
+        model,
+        y_true,
+        y_score,
+        protected,
+        privileged,
+        protected_col,
+        criterion="equal_opportunity",
+    ):
+        """
+        Construit l'enveloppe à partir de probabilités déjà calculées (sans ré-entraînement).
+        """
+        thresholds = optimize_group_thresholds(
+            y_true, y_score, protected, privileged, criterion=criterion
+        )
+        return cls(model, thresholds, protected_col)
+
+    def _group_thresholds(self, X):
+        return (
+            pd.Series(np.asarray(X[self.protected_col]))
+            .map(self.thresholds)
+            .fillna(self.default_threshold)
+            .to_numpy(dtype=float)
+        )
+
+    def adjust_scores(self, y_score, thresholds):
+        """
+        Recale les scores pour que chaque seuil de groupe soit ramené à 0.5.
+        """
+        y_score = np.asarray(y_score, dtype=float)
+        thresholds = np.maximum(thresholds, 1e-12)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            below = 0.5 * y_score / thresholds
+            above = np.where(
+                thresholds < 1.0, 0.5 + 0.5 * (y_score - thresholds) / (1.0 - thresholds), 1.0
+            )
+
+        return np.clip(np.where(y_score < thresholds, below, above), 0.0, 1.0)
+
+    def predict_proba(self, X):
+        """
+        Probabilités recalées selon le seuil du groupe de chaque individu.
+        """
+        y_score = self.model.predict_proba(X)[:, 1]
+        adjusted = self.adjust_scores(y_score, self._group_thresholds(X))
+
+        return np.column_stack([1 - adjusted, adjusted])
+
+    def predict(self, X):
+        """
+        Décision finale avec les seuils par groupe.
+        """
+        return (self.predict_proba(X)[:, 1] >= 0.5).astype(int)
@@ -0,0 +1,219 @@
+"""
+Ce module préchauffe les caches de l'application au démarrage du conteneur, avant que Streamlit
+n'accepte des connexions.
+
+Sans préchauffage, le premier utilisateur après chaque redémarrage paie le téléchargement des
+données, la lecture du fichier Excel, la récupération des codes ISO, la construction des
+Explainers des modèles et de toutes les figures. Ici, chaque page est exécutée une fois, dans
+son état par défaut, avec l'API de test de Streamlit (`streamlit.testing.v1.AppTest`) et dans
+le processus qui servira ensuite l'application : les caches en mémoire (`lru_cache`,
+`st.cache_resource`, cache des figures) sont donc déjà remplis à l'arrivée du premier
+utilisateur. Les figures enregistrées sur disque par une exécution précédente sont d'abord
+rechargées en mémoire.
+
+La durée de chaque étape est journalisée et écrite dans un rapport JSON. Avec `--serve`, le
+serveur Streamlit est démarré dans le même processus une fois le préchauffage terminé : son
+point de santé (`/_stcore/health`) ne répond donc qu'à ce moment-là. Un fichier témoin
+(`--ready-file`) peut aussi être écrit pour une sonde de disponibilité.
+
+Utilisation :
+    python -m src.warmup --serve --server.port=8501 --server.address=0.0.0.0
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from src.figure_cache import get_figure_cache
+from src.logging_setup import get_page_logger
+from src.metrics import export_metrics, registry
+
+APP_SCRIPT = "Accueil.py"
+DEFAULT_REPORT_PATH = "logs/warmup.json"
+DEFAULT_TIMEOUT = 600
+
+# Pages préchauffées, dans l'ordre (la page « Profils » n'a pas de cache)
+WARMUP_PAGES = [
+    "pages/1_Distribution_des_variables_principales.py",
+    "pages/2_Taux_d_emploi_global.py",
+    "pages/3_Répartition_géographique.py",
+    "pages/4_Langages_utilisés.py",
+    "pages/5_Emploi_et_variables_catégorielles.py",
+    "pages/6_Emploi_et_variables_numériques.py",
+    "pages/7_Modélisation_de_l_emploi.py",
+    "pages/8_Etude_de_l_équité.py",
+    "pages/9_Filtres_croisés.py",
+]
+
+logger = get_page_logger("warmup")
+
+
+def _stage_sums():
+    return {(entry["page"], entry["stage"]): entry["sum"] for entry in registry.snapshot()}
+
+
+def warm_page(path, timeout=DEFAULT_TIMEOUT):
+    """
+    Exécute une page dans son état par défaut pour remplir ses caches.
+
+    Parameters
+    ----------
+    path : str
+        Chemin du script de la page.
+    timeout : float, optional
+        Durée maximale de l'exécution, en secondes.
+
+    Returns
+    -------
+    dict
+        'page', 'seconds', 'ok', 'errors' (messages d'erreur affichés par la page) et
+        'stages' (durée de chaque étape mesurée par la page, en secondes).
+    """
+    from streamlit.testing.v1 import AppTest
+
+    before = _stage_sums()
+    start = time.perf_counter()
+    try:
+        at = AppTest.from_file(path, default_timeout=timeout).run()
+        errors = [element.value for element in at.error]
+        errors += [element.message for element in at.exception]
+    except Exception as e:
+        errors = [str(e)]
+    seconds = time.perf_counter() - start
+
+    stages = {
+        f"{page}/{stage}": total - before.get((page, stage), 0.0)
+        for (page, stage), total in _stage_sums().items()
+        if total != before.get((page, stage), 0.0) and page
+    }
+    return {
+        "page": path,
+        "seconds": seconds,
+        "ok": not errors,
+        "errors": errors,
+        "stages": stages,
+    }
+
+
+def warm_up(pages=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Préchauffe le cache des figures, vérifie les modèles et construit leurs Explainers, puis
+    préchauffe chaque page.
+
+    Une page en erreur (par exemple une source de données indisponible) est signalée dans le
+    rapport mais n'interrompt pas le préchauffage des suivantes.
+
+    Returns
+    -------
+    dict
+        'seconds' (durée totale), 'figures_loaded' (figures rechargées depuis le disque),
+        'models' (construction des Explainers) et 'pages' (résultat de `warm_page` pour chaque
+        page).
+    """
+    start = time.perf_counter()
+
+    figures_loaded = get_figure_cache().warm()
+    logger.info(
+        f"Préchauffage : {figures_loaded} figures rechargées depuis le disque en "
+        f"{time.perf_counter() - start:.2f} s"
+    )
+
+    # Les Explainers sont construits au premier usage : on construit aussi ceux qu'aucune page
+    # n'affiche dans son état par défaut
+    stage_start = time.perf_counter()
+    try:
+        from src.model_manifest import verify_models
+        from src.models_visualisation_utils import MODEL_FILES, MODELS_DIR, get_explainer
+
+        # Un modèle qui ne correspond pas au manifeste est signalé avant toute construction
+        verified = verify_models(MODELS_DIR)
+        logger.info(f"Préchauffage : {len(verified)} modèles conformes au manifeste")
+        for model in MODEL_FILES:
+            get_explainer(model)
+            get_explainer(model, mitigated=True)
+        models_error = None
+        logger.info(
+            f"Préchauffage : Explainers construits en {time.perf_counter() - stage_start:.2f} s"
+        )
+    except Exception as e:
+        models_error = str(e)
+        logger.error(f"Préchauffage des Explainers en erreur : {e}")
+    models_seconds = time.perf_counter() - stage_start
+
+    results = []
+    for path in pages or WARMUP_PAGES:
+        result = warm_page(path, timeout)
+        results.append(result)
+        if result["ok"]:
+            logger.info(f"Préchauffage de {path} : {result['seconds']:.2f} s")
+        else:
+            logger.error(
+                f"Préchauffage de {path} en erreur ({result['seconds']:.2f} s) : "
+                f"{' ; '.join(result['errors'])}"
+            )
+        for stage, seconds in result["stages"].items():
+            logger.debug(f"  {stage} : {seconds:.3f} s")
+
+    report = {
+        "seconds": time.perf_counter() - start,
+        "figures_loaded": figures_loaded,
+        "models": {"seconds": models_seconds, "ok": models_error is None, "error": models_error},
+        "pages": results,
+    }
+    logger.success(f"Préchauffage terminé en {report['seconds']:.2f} s")
+    return report
+
+
+def _write_file(path, content):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Préchauffe les caches de l'application, puis démarre éventuellement "
+        "Streamlit. Les options inconnues sont transmises à `streamlit run`."
+    )
+    parser.add_argument("--pages", nargs="+", help="Pages à préchauffer (par défaut toutes)")
+    parser.add_argument(
+        "--timeout", type=float, default=DEFAULT_TIMEOUT, help="Durée maximale par page"
+    )
+    parser.add_argument(
+        "--report",
+        default=os.environ.get("warmup_report_path", DEFAULT_REPORT_PATH),
+        help="Rapport JSON des durées",
+    )
+    parser.add_argument(
+        "--ready-file",
+        default=os.environ.get("warmup_ready_file"),
+        help="Fichier écrit une fois le préchauffage terminé",
+    )
+    parser.add_argument(
+        "--serve", action="store_true", help="Démarre Streamlit après le préchauffage"
+    )
+    args, streamlit_args = parser.parse_known_args()
+
+    report = warm_up(args.pages, args.timeout)
+    _write_file(args.report, json.dumps(report, ensure_ascii=False, indent=2))
+    export_metrics()
+    if args.ready_file:
+        _write_file(args.ready_file, f"{time.time()}\n")
+
+    if not args.serve:
+        ok = report["models"]["ok"] and all(result["ok"] for result in report["pages"])
+        return 0 if ok else 1
+
+    # Même processus : les caches remplis ci-dessus servent aux sessions des utilisateurs
+    from streamlit.web import cli as stcli
+
+    sys.argv = ["streamlit", "run", APP_SCRIPT, *streamlit_args]
+    return stcli.main()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+"""
+Tests des agrégations par morceaux (`src.chunked_aggregation`).
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.chunked_aggregation import chunked_group_percentage_by, iter_survey_chunks
+from src.data_preprocessing import group_percentage_by, labels_translation
+
+
+@pytest.fixture
+def survey_csv(tmp_path):
+    rng = np.random.default_rng(0)
+    n_rows = 500
+    df = pd.DataFrame(
+        {
+            "Age": rng.choice(["<35", ">35"], n_rows),
+            "Accessibility": rng.choice(["No", "Yes"], n_rows),
+            "EdLevel": rng.choice(["Master", "Undergraduate", "PhD", "Other"], n_rows),
+            "Gender": rng.choice(["Man", "Woman", "NonBinary"], n_rows),
+            "MentalHealth": rng.choice(["No", "Yes"], n_rows),
+            "MainBranch": rng.choice(["Dev", "NotDev"], n_rows),
+            "Employed": rng.integers(0, 2, n_rows),
+        }
+    )
+    path = tmp_path / "survey.csv"
+    df.to_csv(path)
+    return str(path)
+
+
+@pytest.mark.parametrize("group_cols", [["Gender", "EmployedCat"], ["EdLevel", "EmployedCat"]])
+def test_chunked_group_percentage_by_on_translated_labels(survey_csv, group_cols):
+    translated = labels_translation(pd.read_csv(survey_csv, index_col="Unnamed: 0"))
+    expected = group_percentage_by(translated, group_cols)
+
+    chunks = iter_survey_chunks(survey_csv, chunksize=64, transform=labels_translation)
+    result = chunked_group_percentage_by(chunks, group_cols)
+
+    pd.testing.assert_frame_equal(
+        result.reset_index(drop=True), expected.reset_index(drop=True), check_dtype=False
+    )
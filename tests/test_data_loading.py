@@ -0,0 +1,44 @@
+"""
+Tests du chargement des données de l'enquête (`src.data_loading`).
+"""
+
+import pandas as pd
+
+from src.data_loading import (
+    iter_survey_batches,
+    load_survey,
+    survey_years,
+    write_survey_year,
+)
+
+
+def _survey(n_rows):
+    return pd.DataFrame({"Age": ["<35"] * n_rows, "Employed": [1] * n_rows})
+
+
+def test_write_survey_year_replaces_every_file_of_the_year(tmp_path):
+    partition_dir = tmp_path / "year=2023"
+    partition_dir.mkdir()
+    # Année écrite auparavant en plusieurs fichiers (par exemple par `src.synthetic_data`)
+    for i in range(3):
+        _survey(1000).to_parquet(partition_dir / f"part-{i:05d}.parquet", index=False)
+
+    write_survey_year(_survey(1000), str(tmp_path), 2023)
+
+    assert len(load_survey(str(tmp_path), years=[2023])) == 1000
+
+
+def test_load_survey_reads_a_single_parquet_file(tmp_path):
+    # Fichier produit par `src.synthetic_data` avec une sortie `*.parquet` (sans colonne `year`)
+    path = str(tmp_path / "survey.parquet")
+    _survey(1000).to_parquet(path, index=False)
+
+    df = load_survey(path, columns=["Age"], filters={"Age": "<35"})
+    assert list(df.columns) == ["Age", "year"]
+    assert len(df) == 1000 and (df["year"] == 2022).all()
+    assert survey_years(path) == [2022]
+    assert load_survey(path, years=[2023]).empty
+
+    batches = list(iter_survey_batches(path, years=[2022], batch_size=300))
+    assert sum(len(batch) for batch in batches) == 1000
+    assert all((batch["year"] == 2022).all() for batch in batches)
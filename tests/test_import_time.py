@@ -0,0 +1,32 @@
+"""
+Vérifie que le temps d'import des modules `src` de chaque page reste sous le budget de
+`benchmarks/import_time.py` (bibliothèques communes à toutes les pages exclues).
+
+À lancer depuis la racine du dépôt :
+    python -m pytest tests
+"""
+
+import glob
+import os
+
+import pytest
+
+from benchmarks.import_time import DEFAULT_BUDGET_MS, measure_page
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = ["Accueil.py"] + sorted(
+    os.path.relpath(path, ROOT_DIR)
+    for path in glob.glob(os.path.join(ROOT_DIR, "pages", "*.py"))
+)
+
+
+@pytest.mark.parametrize("page", PAGES)
+def test_page_import_time_within_budget(page, monkeypatch):
+    # Les imports de la page sont mesurés dans un interpréteur lancé à la racine du dépôt
+    monkeypatch.chdir(ROOT_DIR)
+    result = measure_page(page, repeat=3)
+
+    assert result["src_ms"] <= DEFAULT_BUDGET_MS, (
+        f"{page} : imports de src en {result['src_ms']} ms (budget {DEFAULT_BUDGET_MS} ms), "
+        f"dépendances lourdes : {result['heavy']}"
+    )
@@ -0,0 +1,26 @@
+"""
+Tests de l'export des forêts aléatoires projeté en mémoire (`src.model_artifacts`).
+"""
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from src.model_artifacts import MemmapForestClassifier
+
+
+def test_predict_proba_matches_the_forest_with_missing_values(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(2000, 5))
+    y = (X[:, 0] + X[:, 1] > 0).astype(int)
+    # Valeurs manquantes à l'entraînement : scikit-learn choisit le côté de chaque nœud
+    X[rng.random(X.shape) < 0.1] = np.nan
+    forest = RandomForestClassifier(n_estimators=10, max_depth=8, random_state=0).fit(X, y)
+
+    classifier, arrays = MemmapForestClassifier.from_forest(forest)
+    for name, array in arrays.items():
+        np.save(tmp_path / f"{name}.npy", array)
+    classifier.attach(str(tmp_path))
+
+    X_test = rng.normal(size=(3000, 5))
+    X_test[rng.random(X_test.shape) < 0.2] = np.nan
+    np.testing.assert_allclose(classifier.predict_proba(X_test), forest.predict_proba(X_test))